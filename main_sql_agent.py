@@ -8,10 +8,13 @@ TODO: Allow users to download results into an excel/csv file
 
 import streamlit as st
 import pandas as pd  # Needed for Streamlit UI (e.g. st.dataframe)
+import uuid
 import logging
 
 # Import the core AI functionality from the scripts folder
-from scripts.run_advanced_langchain import run_advanced_langchain_tool
+from scripts.run_advanced_langchain import (stream_advanced_langchain_tool, warm_up, STAGE_SQL, STAGE_RESULTS,
+                                            STAGE_SUMMARY, STAGE_DONE)
+from src.text_to_sql import result_refinement
 from scripts.chart_generator import build_chart_studio
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -24,6 +27,18 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # Hide sidebar for a single-page app
 )
 
+# --- Agent warm-up ---
+@st.cache_resource(show_spinner="Warming up the agent...")
+def warm_up_agent() -> dict[str, float]:
+    """
+    Runs once per server process, not on every rerun: builds the LLM clients and chain, schema text, example
+    index, question templates and DB pool so the first question does not pay for them.
+    """
+    return warm_up()
+
+
+warm_up_agent()
+
 # --- Sample Query Suggestions ---
 SUGGESTIONS = [
     "Compare Virat Kohli's and Rohit Sharma's total runs and average across all IPL seasons.",
@@ -45,6 +60,63 @@ if 'last_results_data' not in st.session_state:
     st.session_state['last_results_data'] = []
 if 'last_results_headers' not in st.session_state:
     st.session_state['last_results_headers'] = []
+# Identifies this browser session to the agent, which keeps its last result for follow-up refinements
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex
+# True on the run that streamed the answer onto the page, so it is not drawn a second time below
+answer_rendered_live = False
+
+
+def render_results_table(results_data: list, results_headers: list):
+    st.subheader("Query Results:")
+    custom_index = range(1, len(results_data) + 1)
+    df_results = pd.DataFrame(results_data, columns=results_headers, index=custom_index)
+    st.dataframe(df_results, width="stretch")
+    build_chart_studio(df_results)
+
+
+def render_answer_stream(question: str) -> tuple[str, list, list, bool]:
+    """
+    Renders the agent's answer piece by piece as the pipeline produces it: the SQL, then the result table,
+    then the summary as it streams. The answer goes above the table, so its slot is reserved first.
+    """
+    answer_area = st.container()
+    sql_area = st.empty()
+    table_area = st.container()
+    events = stream_advanced_langchain_tool(question, st.session_state['session_id'])
+    outcome = ("Sorry, I couldn't process that request.", [], [], False)
+
+    def summary_chunks(first_chunk: str):
+        nonlocal outcome
+        yield first_chunk
+        for stage, payload in events:
+            if stage == STAGE_SUMMARY:
+                yield payload
+            elif stage == STAGE_DONE:
+                outcome = payload
+
+    with st.spinner("Thinking... Generating query and fetching answer..."):
+        event = next(events, None)
+    while event is not None:
+        stage, payload = event
+        if stage == STAGE_SQL:
+            with sql_area.expander("Generated SQL"):
+                st.code(payload, language="sql")
+        elif stage == STAGE_RESULTS and payload[0]:
+            with table_area:
+                render_results_table(*payload)
+        elif stage == STAGE_SUMMARY:
+            with answer_area:
+                st.subheader("Answer:")
+                st.write_stream(summary_chunks(payload))
+            break
+        elif stage == STAGE_DONE:
+            outcome = payload
+            break
+        with st.spinner("Running query and summarising..."):
+            event = next(events, None)
+    return outcome
+
 
 # --- Build the Streamlit Page ---
 st.title("Ask Your Cricket guru! 🏏")
@@ -58,6 +130,7 @@ st.markdown("""
 -   **Be Specific:** Mention player names, teams, seasons (e.g., "IPL 2023").
 -   **Focus on Facts:** I'm best at answering questions that require data retrieval from the database (e.g., "how many", "who", "what is", "list").
 -   **Limit Results:** By default, I'll return the top 10 results. If you need more, ask for "top N rows" (e.g., "top 10 batsmen").
+-   **Follow-ups:** After an answer you can refine it without a new search, e.g. "only show left-handers", "sort by strike rate", "top 5 only" or "how many are there".
 -   **Player Names:** I am trained to resolve common names (e.g., "Virat", "Raina", "Dhoni"), However, it is advisable to use the first and last name of the player if known (e.g., "Dale Steyn", "Yuvraj Singh")
 """)
 
@@ -97,6 +170,9 @@ if clear_button:
     st.session_state['api_called_success'] = False
     st.session_state['last_results_data'] = []
     st.session_state['last_results_headers'] = []
+    previous_results = result_refinement.get_session_results()
+    if previous_results:
+        previous_results.drop(st.session_state['session_id'])
     st.rerun()  # Clear and rerun the app to reset state
 
 if generate_button and user_query:
@@ -112,9 +188,9 @@ if generate_button and user_query:
     else:
         st.session_state['last_question'] = user_query_stripped
 
-        # Call the core AI logic
-        with st.spinner("Thinking... Generating query and fetching answer..."):
-            final_answer, results_data, results_headers, success_status = run_advanced_langchain_tool(user_query_stripped)
+        # Call the core AI logic, rendering each piece of the answer as soon as it is available
+        final_answer, results_data, results_headers, success_status = render_answer_stream(user_query_stripped)
+        answer_rendered_live = success_status
 
         st.session_state['last_answer'] = final_answer
         st.session_state['api_called_success'] = success_status
@@ -125,21 +201,12 @@ if generate_button and user_query:
             st.error(st.session_state['last_answer'])  # Display the error message from the AI directly
 
 # --- Display Results Section ---
-if st.session_state['api_called_success']:
+if st.session_state['api_called_success'] and not answer_rendered_live:
     st.subheader("Answer:")
     st.info(st.session_state['last_answer'])  # Display the natural language answer
 
     if st.session_state['last_results_data']:
-        st.subheader("Query Results:")
-        num_rows = len(st.session_state['last_results_data'])
-        custom_index = range(1, num_rows + 1)
-        df_results = pd.DataFrame(
-            st.session_state['last_results_data'],
-            columns=st.session_state['last_results_headers'],
-            index=custom_index)
-        st.dataframe(df_results, width="stretch")
-
-        build_chart_studio(df_results)
+        render_results_table(st.session_state['last_results_data'], st.session_state['last_results_headers'])
 
     elif st.session_state['api_called_success'] and not st.session_state['last_results_data']:
         st.info("The query executed successfully but returned no results from the database.")
\ No newline at end of file
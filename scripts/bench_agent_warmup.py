@@ -0,0 +1,57 @@
+# scripts/bench_agent_warmup.py
+"""
+Per-question latency of the SQL agent cold (first question in a fresh process, building LLM clients, chain,
+schema text, indexes and the DB pool on the way) and warm (after warm_up()). The question and result caches
+are switched off so every warm question still generates, executes and summarises.
+
+    python -m scripts.bench_agent_warmup                  # LLM_PROVIDER
+    python -m scripts.bench_agent_warmup --provider stub
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from src import config
+from scripts.bench_sql_prompt import BENCH_QUESTIONS
+from scripts import run_advanced_langchain as agent
+
+logger = logging.getLogger(__name__)
+
+
+def time_question(question: str) -> tuple[float, bool]:
+    start = time.perf_counter()
+    _, _, _, success = agent.run_advanced_langchain_tool(question)
+    return time.perf_counter() - start, success
+
+
+def run_benchmark(questions: list[str]):
+    config.QUESTION_CACHE_ENABLED = False
+    config.RESULT_CACHE_ENABLED = False
+
+    cold_seconds, cold_ok = time_question(questions[0])
+    warm_up_timings = agent.warm_up()
+    warm = [(question, *time_question(question)) for question in questions]
+
+    print("\n--- SQL Agent Warm-up Benchmark ---")
+    print(f"Provider:           {config.LLM_PROVIDER}")
+    print("Warm-up steps:      " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in warm_up_timings.items()))
+    print(f"Cold first question: {cold_seconds:.2f}s{'' if cold_ok else ' (failed)'}")
+    for question, seconds, ok in warm:
+        print(f"  warm {seconds:>6.2f}s  {question[:80]}{'' if ok else ' (failed)'}")
+    print(f"Same question warm: {warm[0][1]:.2f}s ({cold_seconds - warm[0][1]:+.2f}s saved)")
+    print(f"Warm latency:       median {statistics.median(s for _, s, _ in warm):.2f}s, "
+          f"max {max(s for _, s, _ in warm):.2f}s")
+    print("-----------------------------------\n")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Compare cold and warm per-question latency of the SQL agent.")
+    parser.add_argument("--provider", default=None, help="LLM provider (defaults to LLM_PROVIDER)")
+    args = parser.parse_args()
+    if args.provider:
+        config.LLM_PROVIDER = args.provider
+
+    run_benchmark(BENCH_QUESTIONS)
@@ -0,0 +1,109 @@
+# scripts/bench_ai_enrichment.py
+"""
+Throughput check for the AI enrichment engines in etl_05 (players) and etl_06 (match timings).
+Runs against llm_client.StubGenerativeModel, so no API key, network or database is needed.
+
+    python -m scripts.bench_ai_enrichment --players 300 --rpm 600 --workers 16 --quota-error-rate 0.05
+    python -m scripts.bench_ai_enrichment --players 300 --batch
+    python -m scripts.bench_ai_enrichment --timings --matches 50
+"""
+
+import argparse
+import logging
+import time
+
+from src import ai_utils
+from src import llm_client
+from src.etl import etl_05_enrich_player_data
+from src.etl import etl_06_innings_timings_and_delays
+
+logger = logging.getLogger(__name__)
+
+
+def run_benchmark(num_players: int, rpm: int, tpm: int, workers: int, latency: float, quota_error_rate: float,
+                  batch_mode: bool = False):
+    stub = llm_client.StubGenerativeModel(
+        llm_client.stub_player_batch_response if batch_mode else llm_client.stub_player_response,
+        latency_seconds=latency,
+        latency_jitter=latency / 2,
+        quota_error_rate=quota_error_rate,
+        seed=42
+    )
+    model = llm_client.LLMClient(stub, 'enrichment', 'stub')
+    limiter = ai_utils.RateLimiter(rpm, tpm)
+    players = [
+        {'identifier': f"stub{i:05d}", 'name': f"Stub Player {i}", 'last_season_year': 2024,
+         'last_match_date': "2024-05-01", 'last_match_played': "Team A v/s Team B",
+         'last_venue_name': "Stub Stadium", 'last_city': "Stub City"}
+        for i in range(num_players)
+    ]
+
+    start = time.perf_counter()
+    succeeded = 0
+    if batch_mode:
+        completed = etl_05_enrich_player_data.enrich_players_in_batches(players, model, limiter, workers)
+    else:
+        completed = etl_05_enrich_player_data.enrich_players_concurrently(players, model, limiter, workers)
+    for _, enriched_data in completed:
+        if enriched_data:
+            succeeded += 1
+    elapsed = time.perf_counter() - start
+
+    print("\n--- Enrichment Benchmark ---")
+    print(f"Players:            {num_players} ({succeeded} enriched)")
+    print(f"Mode:               {'batched' if batch_mode else 'one player per call'}")
+    print(f"Workers / RPM:      {workers} / {rpm}")
+    print(f"Stub calls:         {stub.calls} ({stub.quota_errors} simulated 429s)")
+    print(f"Elapsed:            {elapsed:.1f}s")
+    print(f"Throughput:         {num_players / elapsed * 60:.0f} players/minute")
+    print("----------------------------\n")
+    print_usage_stats()
+
+
+def run_timings_benchmark(num_matches: int, latency: float):
+    """Times one etl_06 batch prompt -> parse round trip for `num_matches` synthetic matches."""
+    model = llm_client.get_client('timings', provider='stub')
+    model.model.latency_seconds, model.model.latency_jitter = latency, latency / 2
+    matches = [
+        {'match_id': f"stub{i:05d}", 'season_year': 2024, 'match_date_played': "2024-05-01",
+         'venue_name': "Stub Stadium", 'team1': "Team A", 'team2': "Team B",
+         'inning_1_id': 2 * i + 1, 'inning_2_id': 2 * i + 2}
+        for i in range(num_matches)
+    ]
+
+    start = time.perf_counter()
+    enriched = etl_06_innings_timings_and_delays.get_match_timings_from_ai(matches, model) or []
+    elapsed = time.perf_counter() - start
+
+    print("\n--- Timings Benchmark ---")
+    print(f"Matches:            {num_matches} ({len(enriched)} returned)")
+    print(f"Elapsed:            {elapsed:.2f}s")
+    print("-------------------------\n")
+    print_usage_stats()
+
+
+def print_usage_stats():
+    for (provider, role, model), s in sorted(llm_client.usage_stats.snapshot().items()):
+        mean_latency = s['latency_seconds'] / s['requests'] if s['requests'] else 0.0
+        print(f"{provider}/{role}/{model}: {s['requests']} requests, {s['errors']} errors, "
+              f"mean latency {mean_latency:.2f}s, {s['prompt_tokens']} prompt / {s['completion_tokens']} completion tokens")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Benchmark concurrent AI player enrichment against a stub model.")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean simulated latency per call in seconds")
+    parser.add_argument("--quota-error-rate", type=float, default=0.05)
+    parser.add_argument("--batch", action="store_true", help="Pack several players into each prompt")
+    parser.add_argument("--timings", action="store_true", help="Benchmark etl_06 match timings instead of players")
+    parser.add_argument("--matches", type=int, default=20, help="Matches per timings prompt")
+    args = parser.parse_args()
+
+    if args.timings:
+        run_timings_benchmark(args.matches, args.latency)
+    else:
+        run_benchmark(args.players, args.rpm, args.tpm, args.workers, args.latency, args.quota_error_rate, args.batch)
@@ -0,0 +1,128 @@
+# scripts/bench_sql_prompt.py
+"""
+Compares the full SQL agent prompt (whole schema, every few-shot example) against the per-question prompt
+(pruned schema, top-k retrieved examples): prompt tokens, selection time and (optionally) SQL generation latency.
+No database is needed: unless --with-schema is given, each table's DDL file stands in for its reflected info.
+
+    python -m scripts.bench_sql_prompt                     # token savings only
+    python -m scripts.bench_sql_prompt --generate          # also time generation (LLM_PROVIDER)
+    python -m scripts.bench_sql_prompt --generate --provider stub --top-k 2
+"""
+
+import os
+import glob
+import argparse
+import logging
+import statistics
+import time
+
+from src import config
+from src import ai_utils
+from src import llm_client
+from src.text_to_sql import example_index
+from src.text_to_sql import schema_cache
+from src.text_to_sql import schema_selector
+from scripts.run_advanced_langchain import construct_prompt
+
+logger = logging.getLogger(__name__)
+
+# The Streamlit app's suggestions plus a few questions in the style of the examples
+BENCH_QUESTIONS = [
+    "Compare Virat Kohli's and Rohit Sharma's total runs and average across all IPL seasons.",
+    "Which player has the best strike rate in death overs (overs 16-20) in IPL 2023 for players who faced at least 50 balls?",
+    "List the top 3 venues with the highest average first innings score where at least 10 matches have been played.",
+    "Find the number of centuries scored by each player in IPL history, ordered by the count of centuries descending.",
+    "What is the average number of boundaries (fours and sixes combined) hit per match in IPL 2024?",
+    "How many runs has Jasprit Bumrah conceded against Chennai Super Kings?",
+    "Which batting pair has the best partnership run rate in IPL 2022?",
+    "Has any bowler taken a hat-trick in IPL 2019?",
+]
+
+
+def ddl_table_info() -> dict[str, str]:
+    """{table: DDL file text} for the tables the agent can see, a stand-in for the reflected schema."""
+    table_info = {}
+    for path in sorted(glob.glob(os.path.join(schema_cache.DDL_DIRECTORY, "*.sql"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        for name, _ in schema_selector._CREATE_TABLE.findall(ddl):
+            if name.lower() not in schema_cache.AGENT_IGNORED_TABLES:
+                table_info[name.lower()] = ddl
+    return table_info
+
+
+def render_prompt(schema: str, examples: str, question: str) -> str:
+    return construct_prompt(schema, examples, question).format(schema=schema, examples=examples, question=question)
+
+
+def time_generation(model, prompt: str) -> float:
+    start = time.perf_counter()
+    model.generate_content(prompt)
+    return time.perf_counter() - start
+
+
+def run_benchmark(top_k: int, token_budget: int, generate: bool, provider: str = None, with_schema: bool = False):
+    index = example_index.get_example_index()
+    all_examples = index.format_all()
+    table_info = schema_cache.get_schema_cache().get_table_info() if with_schema else ddl_table_info()
+    full_schema = "\n\n".join(table_info[table] for table in sorted(table_info))
+    model = llm_client.get_client('sql', provider=provider) if generate else None
+
+    rows = []
+    for question in BENCH_QUESTIONS:
+        start = time.perf_counter()
+        selected = index.select(question, top_k, token_budget)
+        selected_text = example_index.format_examples(selected)
+        schema, tables = schema_selector.select_schema_text(question, table_info)
+        select_ms = (time.perf_counter() - start) * 1000
+
+        full_prompt = render_prompt(full_schema, all_examples, question)
+        short_prompt = render_prompt(schema, selected_text, question)
+        row = {
+            'question': question,
+            'selected': [ex.get('name') for ex in selected],
+            'tables': tables,
+            'select_ms': select_ms,
+            'full_tokens': ai_utils.estimate_tokens(full_prompt),
+            'short_tokens': ai_utils.estimate_tokens(short_prompt),
+        }
+        if model is not None:
+            row['full_seconds'] = time_generation(model, full_prompt)
+            row['short_seconds'] = time_generation(model, short_prompt)
+        rows.append(row)
+
+    print("\n--- SQL Prompt Benchmark ---")
+    for row in rows:
+        print(f"{row['question'][:70]:<70}  {row['full_tokens']:>6} -> {row['short_tokens']:>6} tokens  "
+              f"({row['select_ms']:.2f} ms)")
+        print(f"{'':<70}  tables {row['tables']}")
+        print(f"{'':<70}  examples {row['selected']}")
+        if 'full_seconds' in row:
+            print(f"{'':<70}  generation {row['full_seconds']:.2f}s -> {row['short_seconds']:.2f}s")
+
+    full_total = sum(r['full_tokens'] for r in rows)
+    short_total = sum(r['short_tokens'] for r in rows)
+    print(f"\nSchema:             {len(table_info)} tables ({ai_utils.estimate_tokens(full_schema)} tokens, "
+          f"{'reflected' if with_schema else 'DDL files'})")
+    print(f"Examples indexed:   {len(index.examples)} ({sum(index.token_counts)} tokens)")
+    print(f"Top-k / budget:     {top_k} / {token_budget} tokens")
+    print(f"Prompt tokens:      {full_total} -> {short_total} "
+          f"({(1 - short_total / full_total) if full_total else 0:.0%} fewer)")
+    print(f"Selection time:     median {statistics.median(r['select_ms'] for r in rows):.2f} ms")
+    if model is not None:
+        print(f"Generation latency: median {statistics.median(r['full_seconds'] for r in rows):.2f}s -> "
+              f"{statistics.median(r['short_seconds'] for r in rows):.2f}s ({model.model_name})")
+    print("----------------------------\n")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Measure prompt tokens and latency saved by schema pruning and example retrieval.")
+    parser.add_argument("--top-k", type=int, default=config.SQL_EXAMPLES_TOP_K)
+    parser.add_argument("--token-budget", type=int, default=config.SQL_EXAMPLES_TOKEN_BUDGET)
+    parser.add_argument("--generate", action="store_true", help="Also time SQL generation with both prompts")
+    parser.add_argument("--provider", default=None, help="LLM provider for --generate (defaults to LLM_PROVIDER)")
+    parser.add_argument("--with-schema", action="store_true", help="Use the reflected schema (needs the database)")
+    args = parser.parse_args()
+
+    run_benchmark(args.top_k, args.token_budget, args.generate, args.provider, args.with_schema)
@@ -0,0 +1,96 @@
+# scripts/bench_summary_prompt.py
+"""
+Compares the summarisation prompt with the result rendered as a psql table (the old encoding) against the
+compact encoding: prompt tokens and (optionally) summary latency. The fixed question set is the few-shot
+examples, whose SQL is run against the database to get realistic results.
+
+    python -m scripts.bench_summary_prompt                        # token savings only
+    python -m scripts.bench_summary_prompt --summarise            # also time summarisation (LLM_PROVIDER)
+    python -m scripts.bench_summary_prompt --summarise --provider stub --top-k 10
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from tabulate import tabulate
+
+from src import config
+from src import ai_utils
+from src import llm_client
+from src.text_to_sql import example_index
+from src.text_to_sql import result_summary
+from src.text_to_sql.sql_normalise import strip_sql_comments
+from scripts.run_advanced_langchain import build_summary_prompt, execute_query
+
+logger = logging.getLogger(__name__)
+
+
+def time_summary(model, prompt: str) -> float:
+    start = time.perf_counter()
+    model.generate_content(prompt)
+    return time.perf_counter() - start
+
+
+def run_benchmark(top_k: int, summarise: bool, provider: str = None):
+    model = llm_client.get_client('summary', provider=provider) if summarise else None
+
+    rows = []
+    for example in example_index.load_examples():
+        question = example.get('question', '')
+        results, headers, success, error = execute_query(strip_sql_comments(example.get('sql', '')))
+        if not success or not results:
+            print(f"Skipping '{example.get('name')}': {error or 'no results'}")
+            continue
+        start = time.perf_counter()
+        compact = result_summary.encode_results(results, headers, top_k)
+        encode_ms = (time.perf_counter() - start) * 1000
+        psql_prompt = build_summary_prompt(question, tabulate(results, headers=headers, tablefmt="psql"))
+        compact_prompt = build_summary_prompt(question, compact)
+        row = {
+            'question': question,
+            'rows': len(results),
+            'encode_ms': encode_ms,
+            'psql_tokens': ai_utils.estimate_tokens(psql_prompt),
+            'compact_tokens': ai_utils.estimate_tokens(compact_prompt),
+            'rules': result_summary.summarise_locally(results, headers) is not None,
+        }
+        if model is not None:
+            row['psql_seconds'] = time_summary(model, psql_prompt)
+            row['compact_seconds'] = time_summary(model, compact_prompt)
+        rows.append(row)
+
+    if not rows:
+        print("No results to benchmark.")
+        return
+
+    print("\n--- Summary Prompt Benchmark ---")
+    for row in rows:
+        print(f"{row['question'][:70]:<70}  {row['rows']:>4} rows  {row['psql_tokens']:>6} -> {row['compact_tokens']:>6} tokens"
+              f"{'  (rule-based)' if row['rules'] else ''}")
+        if 'psql_seconds' in row:
+            print(f"{'':<70}  summary {row['psql_seconds']:.2f}s -> {row['compact_seconds']:.2f}s")
+
+    psql_total = sum(r['psql_tokens'] for r in rows)
+    compact_total = sum(r['compact_tokens'] for r in rows)
+    print(f"\nQuestions:          {len(rows)} ({sum(r['rules'] for r in rows)} answered by the rule-based summariser)")
+    print(f"Top-k rows:         {top_k}")
+    print(f"Prompt tokens:      {psql_total} -> {compact_total} "
+          f"({(1 - compact_total / psql_total) if psql_total else 0:.0%} fewer)")
+    print(f"Encoding time:      median {statistics.median(r['encode_ms'] for r in rows):.2f} ms")
+    if model is not None:
+        print(f"Summary latency:    median {statistics.median(r['psql_seconds'] for r in rows):.2f}s -> "
+              f"{statistics.median(r['compact_seconds'] for r in rows):.2f}s ({model.model_name})")
+    print("--------------------------------\n")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Measure prompt tokens and latency saved by the compact result encoding.")
+    parser.add_argument("--top-k", type=int, default=config.SUMMARY_PROMPT_TOP_K)
+    parser.add_argument("--summarise", action="store_true", help="Also time summarisation with both prompts")
+    parser.add_argument("--provider", default=None, help="LLM provider for --summarise (defaults to LLM_PROVIDER)")
+    args = parser.parse_args()
+
+    run_benchmark(args.top_k, args.summarise, args.provider)
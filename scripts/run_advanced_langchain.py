@@ -1,26 +1,33 @@
 # scripts/run_advanced_langchain.py
-import os
+import time
 import threading
 
 import psycopg2
-import yaml
-import pathlib
 import logging
 import pyperclip
-import google.generativeai as genai
-from dotenv import load_dotenv
 from tabulate import tabulate
 
 # --- LangChain Imports ---
-from langchain_community.utilities import SQLDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 
 # Import your config and db_utils
 from src import config
 from src import db_utils
+from src import ai_utils
+from src import llm_client
+from src.text_to_sql import schema_cache
+from src.text_to_sql import example_index
+from src.text_to_sql import schema_selector
+from src.text_to_sql import question_cache
+from src.text_to_sql import result_cache
+from src.text_to_sql import query_guard
+from src.text_to_sql import question_templates
+from src.text_to_sql import result_summary
+from src.text_to_sql import dimension_index
+from src.text_to_sql import concurrency
+from src.text_to_sql import result_refinement
+from src.text_to_sql import query_log
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -34,39 +41,13 @@ logger = logging.getLogger(__name__)
 _llm_cache_lock = threading.Lock()
 _llm_cache: dict = {}
 
+SUMMARY_ERROR_MESSAGE = "There was an error summarizing the results."
 
-# --- Helper Functions ---
-def load_few_shot_examples(examples_path):
-    """Loads few-shot examples from a YAML file."""
-    try:
-        with open(examples_path, 'r') as file:
-            return yaml.safe_load(file)
-    except FileNotFoundError:
-        logger.warning(f"Few-shot examples file not found at '{examples_path}'.")
-        return []
-    except yaml.YAMLError as e:
-        logger.error(f"Could not parse YAML file: {e}")
-        return []
-
-
-def format_examples(examples):
-    """Formats the few-shot examples into a string for the prompt."""
-    if not examples:
-        return ""
-
-    example_texts = []
-    for ex in examples:
-        example_texts.append(f"""
-### Example
-Question: "{ex['question']}"
-SQL Query:
-{ex['sql']}
-### End Example""")
-
-    # Join all example texts together
-    return "\n\n".join(example_texts)
+# Set once warm_up() has run; questions before that are logged as cold
+_warmed_up = False
 
 
+# --- Helper Functions ---
 def construct_prompt(schema, examples, user_question):
     template = """You are a PostgreSQL expert. Your task is to write a single, high-quality, executable PostgreSQL query based on the user's question. You must use the provided schema. Given an input question, first create a syntactically correct postgresql query to run, then look at the results of the query and return the answer to the input question.
 
@@ -151,7 +132,6 @@ def is_safe_query(sql_query: str) -> bool:
 
 def execute_query(sql_query: str):
 
-    conn = None
     results = []
     headers = []
     error_message = ""
@@ -160,62 +140,180 @@ def execute_query(sql_query: str):
     """Executes a safe SQL query and displays the results in a formatted table."""
     if not is_safe_query(sql_query):
         logger.warning("Execution blocked: The generated query is not a safe SELECT statement.")
+        query_log.record_error('UnsafeQuery')
         return results, headers, False, error_message
 
-    try:
-        conn = db_utils.get_db_connection()
-        cursor = conn.cursor()
-
-        logger.info("Executing safe query against the database...")
-        cursor.execute(sql_query)
+    # Identical SQL (up to whitespace, comments and alias names) is only run once per ETL load generation
+    results_cache = result_cache.get_result_cache()
+    if results_cache:
+        cached = results_cache.get(sql_query)
+        if cached:
+            results, headers, error_message = cached
+            stats = results_cache.stats()
+            logger.info(f"Query results served from the SQL result cache ({len(results)} rows; "
+                        f"{stats['hits']} hits / {stats['misses']} misses so far).")
+            return results, headers, True, error_message
 
-        if cursor.description:
-            headers = [desc[0] for desc in cursor.description]
-            results = cursor.fetchall()
-
-            print("\n--- Query Results ---")
-            if not results:
-                print("The query returned no results.")
-                success = True
-                error_message = "The query ran successfully but returned no results were obtained."
-                #return [], []
+    try:
+        # Pooled connection: the open transaction is rolled back when it goes back to the pool
+        with concurrency.db_slot(), db_utils.pooled_connection() as conn, conn.cursor() as cursor:
+            logger.info("Executing safe query against the database...")
+            start = time.perf_counter()
+            # Even a query that passed the cost guard is cancelled if it runs far longer than planned
+            cursor.execute("SET LOCAL statement_timeout = %s;", (config.SQL_STATEMENT_TIMEOUT_MS,))
+            cursor.execute(sql_query)
+
+            if cursor.description:
+                headers = [desc[0] for desc in cursor.description]
+                results = cursor.fetchall()
+                execution_seconds = time.perf_counter() - start
+
+                print("\n--- Query Results ---")
+                if not results:
+                    print("The query returned no results.")
+                    success = True
+                    error_message = "The query ran successfully but returned no results were obtained."
+                    #return [], []
+                else:
+                    # Use tabulate to format the output nicely
+                    print(tabulate(results, headers=headers, tablefmt="psql"))
+                    success = True
+                    #return results, headers
+                print("--------------------\n")
+                if results_cache:
+                    results_cache.put(sql_query, results, headers, error_message, execution_seconds)
             else:
-                # Use tabulate to format the output nicely
-                print(tabulate(results, headers=headers, tablefmt="psql"))
+                conn.commit()
+                logger.info("Query executed, but it did not return any data rows (e.g., it was an UPDATE or INSERT).")
                 success = True
-                #return results, headers
-            print("--------------------\n")
-        else:
-            conn.commit()
-            logger.info("Query executed, but it did not return any data rows (e.g., it was an UPDATE or INSERT).")
-            success = True
-            error_message = "Query executed successfully, but no data was returned (e.g., not a SELECT query)."
-            #return [], []
+                error_message = "Query executed successfully, but no data was returned (e.g., not a SELECT query)."
+                #return [], []
 
     except (Exception, psycopg2.Error) as error:
+        query_log.record_error(type(error).__name__)
         logger.error(f"Database query failed: {error}", exc_info=True)
         logger.error(error_message, exc_info=True)
         success = False
 
-    finally:
-        if conn:
-            if 'cursor' in locals() and cursor and not cursor.closed:
-                cursor.close()
-            conn.close()
-
     return results, headers, success, error_message
 
 
-def summarize_results_with_ai(user_question: str, db_results: list, headers: list) -> str:
+def check_query_cost(sql_query: str) -> str:
     """
-    Takes the raw DB results and asks the AI to formulate a natural language answer.
+    Runs the EXPLAIN cost guard on a safe query. Returns the reasons it was rejected (phrased as feedback
+    for the model), or an empty string if it may run. Planning errors are left for execution to report.
     """
-    if not db_results:
-        return "The query ran successfully but returned no results."
+    guard = query_guard.get_query_guard()
+    if guard is None or not is_safe_query(sql_query):
+        return ""
+    try:
+        return guard.check(sql_query).feedback()
+    except Exception as e:
+        logger.warning(f"Could not EXPLAIN the generated query: {e}")
+        return ""
+
+
+def regeneration_question(user_question: str, rejected_sql: str, feedback: str) -> str:
+    return (f"{user_question}\n\nA previous attempt at this question produced the query below, which was rejected "
+            f"before execution: {feedback}\nRejected query:\n{rejected_sql}\n"
+            f"Write a cheaper query that answers the same question.")
+
+
+def match_question_template(user_question: str):
+    """
+    Returns the template match for the question if its SQL also passes the cost guard, otherwise None so the
+    question goes to the LLM.
+    """
+    matcher = question_templates.get_template_matcher()
+    if matcher is None:
+        return None
+    with query_log.span('template'):
+        template = matcher.match(user_question)
+    if template is None:
+        return None
+    logger.info(f"Question matched template '{template.template}' in {template.seconds * 1000:.1f} ms "
+                f"(shape '{template.shape}', slots {template.slots}).")
+    with query_log.span('safety'):
+        cost_feedback = check_query_cost(template.sql)
+    if cost_feedback:
+        logger.warning(f"Template '{template.template}' rejected by the cost guard, generating SQL instead: {cost_feedback}")
+        return None
+    return template
+
+
+def get_sql_query_chain():
+    """
+    The prompt | LLM | parser chain, built once per process. Schema and examples are inputs chosen per
+    question (see sql_prompt_inputs), so the same chain serves every question.
+    """
+    with _llm_cache_lock:
+        if 'sql_chain' not in _llm_cache:
+            if 'sql' not in _llm_cache:
+                _llm_cache['sql'] = llm_client.get_chat_model('sql')
+                logger.info(f"LLM client configured successfully (provider: {config.LLM_PROVIDER}).")
+            prompt_template = construct_prompt("{schema}", "{examples}", "{question}")
+            _llm_cache['sql_chain'] = prompt_template | _llm_cache['sql'] | StrOutputParser()
+        return _llm_cache['sql_chain']
+
+
+def get_summary_model():
+    with _llm_cache_lock:
+        if 'summary' not in _llm_cache:
+            _llm_cache['summary'] = llm_client.get_client('summary')
+        return _llm_cache['summary']
 
-    data_as_string = tabulate(db_results, headers=headers, tablefmt="psql")
 
-    prompt = f"""
+def sql_prompt_inputs(user_question: str) -> dict:
+    # Reflected once per process (and cached on disk); re-reflected only when the DDL fingerprint changes.
+    # Only the tables relevant to the question, plus the tables needed to join them, go into the prompt.
+    db_schema, schema_tables = schema_selector.select_schema_text(user_question)
+    logger.info(f"Schema for prompt: {len(schema_tables)} tables {schema_tables} "
+                f"({ai_utils.estimate_tokens(db_schema)} of "
+                f"{ai_utils.estimate_tokens(schema_cache.get_schema_cache().get_schema_text())} schema tokens).")
+
+    # Few-shot examples are indexed once per process; each question only gets its top-k most relevant ones
+    index = example_index.get_example_index()
+    selected_examples = index.select(user_question)
+    formatted_examples = example_index.format_examples(selected_examples)
+    logger.info(f"Selected few-shot examples {[ex.get('name') for ex in selected_examples]} "
+                f"({ai_utils.estimate_tokens(formatted_examples)} of {sum(index.token_counts)} example tokens).")
+
+    return {"schema": db_schema, "examples": formatted_examples, "question": user_question}
+
+
+def warm_up() -> dict[str, float]:
+    """
+    Builds every heavyweight agent object (LLM clients and chain, schema text, indexes, DB pool) ahead of the
+    first question and returns the seconds spent on each. A step that fails is logged and left to be retried
+    lazily by the first question that needs it.
+    """
+    global _warmed_up
+    steps = [
+        ('sql_chain', get_sql_query_chain),
+        ('summary_client', get_summary_model),
+        ('db_pool', db_utils.get_db_pool),
+        ('schema_text', lambda: schema_cache.get_schema_cache().get_schema_text()),
+        ('schema_selector', schema_selector.get_schema_selector),
+        ('example_index', example_index.get_example_index),
+        ('question_templates', question_templates.get_template_matcher),
+        ('dimension_index', dimension_index.get_dimension_index),
+    ]
+    timings = {}
+    for name, build in steps:
+        start = time.perf_counter()
+        try:
+            build()
+        except Exception as e:
+            logger.warning(f"Warm-up step '{name}' failed: {e}")
+        timings[name] = time.perf_counter() - start
+    _warmed_up = True
+    logger.info(f"SQL agent warmed up in {sum(timings.values()):.2f}s: "
+                + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    return timings
+
+
+def build_summary_prompt(user_question: str, data_as_string: str) -> str:
+    return f"""
     You are a helpful cricket analyst. Your job is to answer the user's question in a clear, friendly, natural language sentence.
     Use the data provided below, which was retrieved from a database, to formulate your answer.
     
@@ -231,72 +329,168 @@ def summarize_results_with_ai(user_question: str, db_results: list, headers: lis
         Good Summary(Preferred) : "While over 20 players have multiple centuries, Virat Kohli and Jos Buttler are in a class of their own, leading the pack with 7 each."
         Okay Summary(Also acceptable) : "Here's the list of all the players who have scored at least 2 centuries in their IPL career." (The results will be separately displayed in a table to the user)
         
-    Data retrieved from database:
+    Data retrieved from database ('|'-separated, header first; long results show the first rows and column statistics):
     {data_as_string}
 
     Based on the data, what is the answer to the user's question?
     """
 
+
+def stream_summary_with_ai(user_question: str, db_results: list, headers: list):
+    """
+    Asks the AI to formulate a natural language answer from the raw DB results and yields it in chunks as
+    the model streams it.
+    """
+    if not db_results:
+        yield "The query ran successfully but returned no results."
+        return
+
+    # Compact encoding instead of a padded ASCII table: a fraction of the tokens for the same information
+    prompt = build_summary_prompt(user_question, result_summary.encode_results(db_results, headers))
+
+    streamed_any = False
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        response = model.generate_content(prompt)
-        return response.text
+        model = get_summary_model()
+        chunks = None
+        while True:
+            # The LLM slot is held only while waiting on the model, never while the consumer has a chunk, so a
+            # slow or abandoned consumer does not keep a slot occupied
+            with concurrency.llm_slot():
+                if chunks is None:
+                    chunks = iter(model.generate_content(prompt, stream=True))
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            try:
+                text = chunk.text
+            except ValueError:  # e.g. a chunk carrying only safety ratings
+                continue
+            if text:
+                streamed_any = True
+                yield text
     except Exception as e:
         logger.error(f"Failed to summarize results with AI: {e}", exc_info=True)
-        return "There was an error summarizing the results."
+        yield f"\n\n{SUMMARY_ERROR_MESSAGE}" if streamed_any else SUMMARY_ERROR_MESSAGE
 
 
-def run_advanced_langchain_tool(user_question: str) -> tuple[str, list, list, bool]:
-    with _llm_cache_lock:
-        if not _llm_cache:
-            load_dotenv()
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                logger.error("ERROR: GOOGLE_API_KEY not found. Please set it in your .env file.")
-                return "API key not found.", [], [], False
+def summarize_results_with_ai(user_question: str, db_results: list, headers: list) -> str:
+    """
+    Takes the raw DB results and asks the AI to formulate a natural language answer.
+    """
+    return "".join(stream_summary_with_ai(user_question, db_results, headers))
+
+
+def stream_results_summary(user_question: str, db_results: list, headers: list):
+    """
+    Answers scalar, single-row and short ranked results with the rule-based summariser and everything else
+    with the LLM (streamed), recording the latency of each path.
+    """
+    start = time.perf_counter()
+    summary = result_summary.summarise_locally(db_results, headers) if config.SUMMARY_RULES_ENABLED else None
+    if summary is not None:
+        path = 'rules'
+        yield summary
+    else:
+        path = 'llm'
+        yield from stream_summary_with_ai(user_question, db_results, headers)
+    elapsed = time.perf_counter() - start
+    result_summary.record_latency(path, elapsed)
+    logger.info(f"Summarised {len(db_results)} rows via {path} in {elapsed * 1000:.1f} ms.")
+
+
+def summarise_results(user_question: str, db_results: list, headers: list) -> str:
+    return "".join(stream_results_summary(user_question, db_results, headers))
 
-            try:
-                genai.configure(api_key=api_key)
-                logger.info("Gemini API configured successfully.")
-                _llm_cache['llm'] = genai.GenerativeModel('gemini-2.5-flash')
-            except Exception as e:
-                logger.error(f"Error configuring API: {e}")
-                return f"API Configuration failed: {e}", [], [], False
 
-        llm_model = _llm_cache['llm']
+# --- Staged, streaming answer pipeline ---
+# stream_advanced_langchain_tool yields (stage, payload) events as each piece of the answer becomes available:
+#   ('sql', generated_sql)           as soon as the query exists
+#   ('results', (rows, headers))     once it has run
+#   ('summary', text)                one or more chunks of the answer text
+#   ('done', (final_answer, results, headers, success))   always last
+STAGE_SQL = 'sql'
+STAGE_RESULTS = 'results'
+STAGE_SUMMARY = 'summary'
+STAGE_DONE = 'done'
+
+
+def stream_advanced_langchain_tool(user_question: str, session_id: str = None):
+    """
+    Yields the answer's stages (see above) and logs time to first content and total latency, warm or cold.
+    With a session_id, a successful result is kept as that session's previous result, and follow-ups that
+    only filter, sort or count it are answered from it without a new query. Every question is traced per
+    stage into the query log (src/text_to_sql/query_log.py).
+    """
+    start = time.perf_counter()
+    with query_log.traced(user_question) as trace:
+        for stage, payload in _answer_stages(user_question, session_id, trace):
+            trace.mark_first_content()
+            if stage == STAGE_SQL:
+                trace.sql = payload
+            elif stage == STAGE_RESULTS:
+                trace.row_count = len(payload[0])
+            elif stage == STAGE_DONE:
+                logger.info(f"Question answered in {(time.perf_counter() - start) * 1000:.0f} ms "
+                            f"({'warm' if _warmed_up else 'cold'}; first content after "
+                            f"{trace.first_content_seconds * 1000:.0f} ms).")
+                _, results, headers, success = payload
+                trace.success = success
+                previous_results = result_refinement.get_session_results()
+                if session_id and previous_results and success:
+                    previous_results.put(session_id, user_question, trace.sql, results, headers)
+            yield stage, payload
+
+
+def _answer_stages(user_question: str, session_id: str, trace: query_log.Trace):
+    # Follow-ups that only refine the session's previous result are answered from it, before any cache: a
+    # question like "sort by strike rate" means something different after every result
+    previous_results = result_refinement.get_session_results()
+    if session_id and previous_results:
+        with trace.span('refine'):
+            refined = previous_results.refine(session_id, user_question)
+        if refined:
+            trace.path = query_log.PATH_REFINEMENT
+            refinement, results, headers, answer = refined
+            yield STAGE_SQL, refinement.sql
+            yield STAGE_RESULTS, (results, headers)
+            yield STAGE_SUMMARY, answer
+            yield STAGE_DONE, (answer, results, headers, True)
+            return
+
+    # Repeated (or near-identical) questions are answered from the cache until the next ETL run
+    answers = question_cache.get_question_cache()
+    if answers:
+        start = time.perf_counter()
+        with trace.span('cache_lookup'):
+            cached = answers.get(user_question)
+        if cached:
+            trace.path = query_log.PATH_QUESTION_CACHE
+            logger.info(f"Answered from question cache in {(time.perf_counter() - start) * 1000:.1f} ms "
+                        f"(matched '{cached['matched_question']}').")
+            yield STAGE_SQL, cached['sql']
+            yield STAGE_RESULTS, (cached['results'], cached['headers'])
+            yield STAGE_SUMMARY, cached['summary']
+            yield STAGE_DONE, (cached['summary'], cached['results'], cached['headers'], True)
+            return
+
+    # Common question shapes get parameterised SQL from a template, with no LLM call for generation
+    template = match_question_template(user_question)
+
+    if template is None:
+        try:
+            sql_query_chain = get_sql_query_chain()
+        except Exception as e:
+            trace.fail(type(e).__name__)
+            logger.error(f"Error configuring API: {e}")
+            yield STAGE_DONE, (f"API Configuration failed: {e}", [], [], False)
+            return
 
     # Validate database credentials before building connection string
     if not config.DB_PASSWORD:
+        trace.fail('ConfigurationError')
         logger.error("ERROR: DB_PASSWORD not found in configuration.")
-        return "Database configuration error.", [], [], False
-    
-    db_uri = f"postgresql+psycopg2://{config.DB_USER}:{config.DB_PASSWORD}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
-    db = SQLDatabase.from_uri(db_uri, ignore_tables = ['people', 'stg_match_data', 'officials'])
-    db_schema = db.get_table_info()
-
-    #print(db.dialect)
-    #print(db.get_usable_table_names())
-
-    # Load few-shot examples
-    project_root = pathlib.Path(__file__).parent.parent
-    examples_file = project_root / "src/text_to_sql/prompts/few_shot_examples.yaml"
-    few_shot_examples = load_few_shot_examples(examples_file)
-    formatted_examples = format_examples(few_shot_examples)
-    logger.info(f"Loaded {len(few_shot_examples)} few-shot examples and database schema.")
-
-    # Build the LangChain componenets (Prompt and Chain)
-    prompt_template = construct_prompt(db_schema, formatted_examples, "{question}")
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
-    sql_query_chain = (
-            {
-                "schema": lambda x: db_schema,  # Always use the db_schema we loaded
-                "examples": lambda x: formatted_examples,  # Always use the examples we loaded
-                "question": RunnablePassthrough()  # Pass the user's question through
-            }
-            | prompt_template
-            | llm
-            | StrOutputParser()
-    )
+        yield STAGE_DONE, ("Database configuration error.", [], [], False)
+        return
 
     final_answer = "Sorry, I couldn't process that request." # Default error message for the user
     results = []
@@ -304,41 +498,96 @@ def run_advanced_langchain_tool(user_question: str) -> tuple[str, list, list, bo
     success_status = False
 
     try:
-        logger.info(f"Generating SQL query for question: '{user_question}'")
-        raw_sql_response = sql_query_chain.invoke(user_question)
-        generated_sql = clean_generated_sql(raw_sql_response)
-        logger.info(f"Generated SQL:\n{generated_sql.strip()}")
+        if template:
+            trace.path = query_log.PATH_TEMPLATE
+            generated_sql = template.sql
+            logger.info(f"Template SQL:\n{generated_sql}")
+        else:
+            with trace.span('generate'):
+                prompt_inputs = sql_prompt_inputs(user_question)
+                logger.info(f"Generating SQL query for question: '{user_question}'")
+                with concurrency.llm_slot():
+                    raw_sql_response = sql_query_chain.invoke(prompt_inputs)
+            with trace.span('clean'):
+                generated_sql = clean_generated_sql(raw_sql_response)
+            logger.info(f"Generated SQL:\n{generated_sql.strip()}")
+
+            # Over-budget queries get one regeneration with the planner's verdict as feedback
+            with trace.span('safety'):
+                cost_feedback = check_query_cost(generated_sql)
+            if cost_feedback and config.SQL_GUARD_REGENERATE:
+                logger.warning(f"Generated SQL rejected by the cost guard, regenerating once: {cost_feedback}")
+                with trace.span('regenerate'), concurrency.llm_slot():
+                    raw_sql_response = sql_query_chain.invoke(
+                        {**prompt_inputs, "question": regeneration_question(user_question, generated_sql, cost_feedback)})
+                with trace.span('clean'):
+                    generated_sql = clean_generated_sql(raw_sql_response)
+                logger.info(f"Regenerated SQL:\n{generated_sql.strip()}")
+                with trace.span('safety'):
+                    cost_feedback = check_query_cost(generated_sql)
+            if cost_feedback:
+                trace.fail('CostGuardRejected')
+                logger.error(f"SQL for question '{user_question}' rejected by the cost guard: {cost_feedback}")
+                final_answer = ("That question needs a query that is too expensive to run. Please try narrowing it down, "
+                                "for example to a season, team or player.")
+                yield STAGE_DONE, (final_answer, results, headers, False)
+                return
+
+        yield STAGE_SQL, generated_sql
 
         # Copy results to clipboard
         #pyperclip.copy(generated_sql.strip())
         #logger.info("✅ SQL query also copied to clipboard.")
 
         # Execute the query to get raw data
-        results, headers, success_from_exec, query_execution_error_msg = execute_query(generated_sql)
+        with trace.span('execute'):
+            results, headers, success_from_exec, query_execution_error_msg = execute_query(generated_sql)
 
         if success_from_exec:
+            yield STAGE_RESULTS, (results, headers)
             if results:
-                # If we have data, ask AI to summarize it
-                logger.info("Summarizing results with AI ....")
-                final_answer = summarize_results_with_ai(user_question, results, headers)
+                # If we have data, summarise it, streaming the answer as it is written
+                logger.info("Summarizing results ....")
+                chunks = []
+                # Includes the time the consumer takes to render each streamed chunk
+                with trace.span('summarise'):
+                    for chunk in stream_results_summary(user_question, results, headers):
+                        chunks.append(chunk)
+                        yield STAGE_SUMMARY, chunk
+                final_answer = "".join(chunks)
                 success_status = True
                 logger.info(f"AI Summary:\n{final_answer}")
+                if answers and SUMMARY_ERROR_MESSAGE not in final_answer:
+                    answers.put(user_question, generated_sql, results, headers, final_answer)
             else:
                 # If the query results nothing
                 final_answer = query_execution_error_msg if query_execution_error_msg else "The query executed successfully but returned no results."
                 success_status = True
                 logger.info(final_answer)
+                yield STAGE_SUMMARY, final_answer
+                if answers:
+                    answers.put(user_question, generated_sql, results, headers, final_answer)
         else:
+            trace.fail('QueryFailed')
             final_answer = "I encountered an issue while retrieving data. Please try rephrasing your question or check the data availability. (Technical details logged for debugging)."
             success_status = False
             logger.error(f"SQL execution failed for user question '{user_question}'. Error: {query_execution_error_msg}")
 
     except Exception as e:
+        trace.fail(type(e).__name__)
         logger.error(f"An error occurred during AI SQL generation or execution: {e}", exc_info=True)
         final_answer = "I apologize, but I encountered an unexpected error. Could you please try asking your question again in a different way?"
         success_status = False
 
-    return final_answer, results, headers, success_status
+    yield STAGE_DONE, (final_answer, results, headers, success_status)
+
+
+def run_advanced_langchain_tool(user_question: str, session_id: str = None) -> tuple[str, list, list, bool]:
+    """Runs the whole pipeline and returns (final_answer, results, headers, success)."""
+    for stage, payload in stream_advanced_langchain_tool(user_question, session_id):
+        if stage == STAGE_DONE:
+            return payload
+    return "Sorry, I couldn't process that request.", [], [], False
 
 
 if __name__ == "__main__":
@@ -357,4 +606,5 @@ if __name__ == "__main__":
     else:
         print("No query results data.")
     print(f"Success: {success_status}")
-    print("------------------------------")
\ No newline at end of file
+    print("------------------------------")
+    result_summary.log_latency_stats()
\ No newline at end of file
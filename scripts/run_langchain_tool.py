@@ -1,16 +1,14 @@
 # scripts/run_langchain_tool.py
 
-import os
 import logging
-from dotenv import load_dotenv
 
 # LangChain Imports
 from langchain_community.utilities import SQLDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import create_sql_query_chain
 
 # Import your config for DB details
 from src import config
+from src import llm_client
 
 # --- Setup Logging (Same as main_etl_pipeline) ---
 logging.basicConfig(
@@ -22,10 +20,11 @@ logger = logging.getLogger(__name__)
 
 
 def run_langchain_sql_tool():
-    # --- 1. Load API Key ---
-    load_dotenv()
-    if not os.getenv("GOOGLE_API_KEY"):
-        logger.error("ERROR: GOOGLE_API_KEY not found. Please set it in your .env file.")
+    # --- 1. Initialize the LLM (provider and model come from config) ---
+    try:
+        llm = llm_client.get_chat_model('sql')
+    except RuntimeError as e:
+        logger.error(f"ERROR: {e}")
         return
 
     # --- 2. Set up the Database Connection for LangChain ---
@@ -37,15 +36,12 @@ def run_langchain_sql_tool():
     db = SQLDatabase.from_uri(db_uri)
     logger.info("Database connection successful and schema loaded by LangChain.")
 
-    # --- 3. Initialize the LLM ---
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
-
-    # --- 4. Create the Text-to-SQL Chain ---
+    # --- 3. Create the Text-to-SQL Chain ---
     # This single line replaces all our manual prompt engineering.
     # It knows how to get the schema from the 'db' object and create an effective prompt.
     generate_query_chain = create_sql_query_chain(llm, db)
 
-    # --- 5. Start the Interactive Loop ---
+    # --- 4. Start the Interactive Loop ---
     print("-" * 50)
     print("LangChain Text-to-SQL Tool is Ready.")
     print("Type your question and press Enter.")
@@ -63,7 +59,7 @@ def run_langchain_sql_tool():
 
             logger.info("Generating SQL query with LangChain...")
 
-            # --- 6. Invoke the Chain ---
+            # --- 5. Invoke the Chain ---
             # We send the question to the chain...
             generated_sql = generate_query_chain.invoke({"question": user_question})
 
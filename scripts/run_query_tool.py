@@ -2,8 +2,8 @@
 import os
 import pathlib
 import yaml  # Import the YAML library
-import google.generativeai as genai
-from dotenv import load_dotenv
+
+from src import llm_client
 
 
 def load_schema_from_ddl_files(ddl_path):
@@ -69,15 +69,9 @@ SQL Query:
 
 def run_text_to_sql_tool():
     """Main function to run the Text-to-SQL generation tool."""
-    load_dotenv()
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        print("ERROR: GOOGLE_API_KEY not found. Please set it in your .env file.")
-        return
-
     try:
-        genai.configure(api_key=api_key)
-        print("Gemini API configured successfully.")
+        model = llm_client.get_client('sql')
+        print(f"LLM client configured successfully ({model.provider}/{model.model_name}).")
     except Exception as e:
         print(f"Error configuring API: {e}")
         return
@@ -99,8 +93,6 @@ def run_text_to_sql_tool():
     print("Type 'exit' or 'quit' to end.")
     print("-" * 50)
 
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
-
     while True:
         user_question = input("> ")
         if user_question.lower() in ['exit', 'quit']:
@@ -125,7 +117,7 @@ def run_text_to_sql_tool():
             print("----------------------\n")
 
         except Exception as e:
-            print(f"\nAn error occurred while calling the Gemini API: {e}")
+            print(f"\nAn error occurred while calling the LLM API: {e}")
 
 
 if __name__ == "__main__":
@@ -112,4 +112,15 @@ CREATE INDEX IF NOT EXISTS idx_players_name_lower
 CREATE INDEX IF NOT EXISTS idx_players_unique_name_lower
     ON public.players USING btree
     (lower(unique_name) COLLATE pg_catalog."default" ASC NULLS LAST)
-    TABLESPACE pg_default;
\ No newline at end of file
+    TABLESPACE pg_default;
+-- Index: idx_players_needs_enrichment
+
+-- DROP INDEX IF EXISTS public.idx_players_needs_enrichment;
+
+-- Partial index over the (shrinking) set of players the AI enrichment step (etl_05) still has to fill in
+CREATE INDEX IF NOT EXISTS idx_players_needs_enrichment
+    ON public.players USING btree
+    (identifier COLLATE pg_catalog."default" ASC NULLS LAST)
+    TABLESPACE pg_default
+    WHERE batting_hand IS NULL OR bowling_hand IS NULL OR player_role IS NULL OR bowling_style IS NULL
+        OR date_of_birth IS NULL OR country IS NULL OR full_name IS NULL;
@@ -0,0 +1,31 @@
+-- Table: public.player_last_appearance
+
+-- DROP TABLE IF EXISTS public.player_last_appearance;
+
+CREATE TABLE IF NOT EXISTS public.player_last_appearance
+(
+    player_identifier text COLLATE pg_catalog."default" NOT NULL,
+    match_id text COLLATE pg_catalog."default" NOT NULL,
+    match_date date,
+    CONSTRAINT player_last_appearance_pkey PRIMARY KEY (player_identifier),
+    CONSTRAINT player_last_appearance_match_id_fkey FOREIGN KEY (match_id)
+        REFERENCES public.matches (match_id) MATCH SIMPLE
+        ON UPDATE NO ACTION
+        ON DELETE NO ACTION,
+    CONSTRAINT player_last_appearance_player_identifier_fkey FOREIGN KEY (player_identifier)
+        REFERENCES public.players (identifier) MATCH SIMPLE
+        ON UPDATE NO ACTION
+        ON DELETE NO ACTION
+        NOT VALID
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE IF EXISTS public.player_last_appearance
+    OWNER to postgres;
+
+COMMENT ON TABLE public.player_last_appearance
+    IS 'Internal ETL summary table holding the most recent match of every player. It is maintained incrementally while matches are loaded and is used to pick AI enrichment candidates. DO NOT use this table for analytical queries.';
+
+COMMENT ON COLUMN public.player_last_appearance.match_id
+    IS 'The latest match (by match_date, then match_id) the player appeared in.';
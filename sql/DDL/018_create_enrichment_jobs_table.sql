@@ -0,0 +1,51 @@
+-- Table: public.enrichment_jobs
+
+-- DROP TABLE IF EXISTS public.enrichment_jobs;
+
+CREATE TABLE IF NOT EXISTS public.enrichment_jobs
+(
+    job_id SERIAL NOT NULL,
+    job_type text COLLATE pg_catalog."default" NOT NULL,
+    entity_id text COLLATE pg_catalog."default" NOT NULL,
+    status text COLLATE pg_catalog."default" NOT NULL DEFAULT 'pending',
+    attempts integer NOT NULL DEFAULT 0,
+    last_error text COLLATE pg_catalog."default",
+    next_attempt_at timestamp with time zone NOT NULL DEFAULT now(),
+    locked_by text COLLATE pg_catalog."default",
+    locked_at timestamp with time zone,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    updated_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT enrichment_jobs_pkey PRIMARY KEY (job_id),
+    CONSTRAINT enrichment_jobs_job_type_entity_id_key UNIQUE (job_type, entity_id),
+    CONSTRAINT enrichment_jobs_job_type_check CHECK (job_type IN ('player', 'match')),
+    CONSTRAINT enrichment_jobs_status_check CHECK (status IN ('pending', 'running', 'done', 'failed'))
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE IF EXISTS public.enrichment_jobs
+    OWNER to postgres;
+
+COMMENT ON TABLE public.enrichment_jobs
+    IS 'Internal work queue for the AI enrichment jobs (etl_05 players, etl_06 match timings). Workers claim rows with FOR UPDATE SKIP LOCKED. DO NOT use this table for analytical queries.';
+
+COMMENT ON COLUMN public.enrichment_jobs.job_type
+    IS 'Either player (entity_id is players.identifier) or match (entity_id is matches.match_id).';
+
+COMMENT ON COLUMN public.enrichment_jobs.status
+    IS 'pending -> running -> done, or back to pending with a backoff on failure; failed once attempts are exhausted.';
+
+COMMENT ON COLUMN public.enrichment_jobs.next_attempt_at
+    IS 'A pending job is not claimed before this time (exponential backoff after failures).';
+
+COMMENT ON COLUMN public.enrichment_jobs.locked_at
+    IS 'When the job was claimed. Running jobs whose lease has expired are reclaimed from crashed workers.';
+-- Index: idx_enrichment_jobs_claimable
+
+-- DROP INDEX IF EXISTS public.idx_enrichment_jobs_claimable;
+
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_claimable
+    ON public.enrichment_jobs USING btree
+    (job_type COLLATE pg_catalog."default" ASC NULLS LAST, next_attempt_at ASC NULLS LAST)
+    TABLESPACE pg_default
+    WHERE status IN ('pending', 'running');
@@ -0,0 +1,41 @@
+-- Sequence: public.etl_runs_generation_seq
+
+CREATE SEQUENCE IF NOT EXISTS public.etl_runs_generation_seq;
+
+-- Table: public.etl_runs
+
+-- DROP TABLE IF EXISTS public.etl_runs;
+
+CREATE TABLE IF NOT EXISTS public.etl_runs
+(
+    run_id SERIAL NOT NULL,
+    status text COLLATE pg_catalog."default" NOT NULL DEFAULT 'running',
+    started_at timestamp with time zone NOT NULL DEFAULT now(),
+    finished_at timestamp with time zone,
+    generation bigint,
+    CONSTRAINT etl_runs_pkey PRIMARY KEY (run_id),
+    CONSTRAINT etl_runs_status_check CHECK (status IN ('running', 'completed', 'aborted'))
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE IF EXISTS public.etl_runs
+    OWNER to postgres;
+
+-- Tables created before runs had a generation of their own: runs finished back then keep their run_id as the
+-- generation, and the sequence continues after it so no generation is ever reused
+ALTER TABLE IF EXISTS public.etl_runs
+    ADD COLUMN IF NOT EXISTS generation bigint;
+
+UPDATE public.etl_runs SET generation = run_id WHERE finished_at IS NOT NULL AND generation IS NULL;
+
+SELECT setval('public.etl_runs_generation_seq', MAX(generation)) FROM public.etl_runs HAVING MAX(generation) IS NOT NULL;
+
+COMMENT ON TABLE public.etl_runs
+    IS 'Internal log of ETL pipeline runs. The highest generation is the current load generation, which the SQL agent uses to invalidate its caches. DO NOT use this table for analytical queries.';
+
+COMMENT ON COLUMN public.etl_runs.status
+    IS 'running while the pipeline is loading; completed, or aborted if a critical step failed. Both finished states bump the generation, since either may have changed data.';
+
+COMMENT ON COLUMN public.etl_runs.generation
+    IS 'Taken from etl_runs_generation_seq when the run finishes, so a run that finishes later always has the higher generation even if it started first. NULL while running.';
@@ -0,0 +1,61 @@
+-- Table: public.query_log
+
+-- DROP TABLE IF EXISTS public.query_log;
+
+CREATE TABLE IF NOT EXISTS public.query_log
+(
+    log_id BIGSERIAL NOT NULL,
+    trace_id text COLLATE pg_catalog."default" NOT NULL,
+    logged_at timestamp with time zone NOT NULL DEFAULT now(),
+    question text COLLATE pg_catalog."default" NOT NULL,
+    answer_path text COLLATE pg_catalog."default" NOT NULL,
+    sql_hash text COLLATE pg_catalog."default",
+    sql_text text COLLATE pg_catalog."default",
+    row_count integer,
+    success boolean NOT NULL,
+    error_class text COLLATE pg_catalog."default",
+    total_ms double precision NOT NULL,
+    first_content_ms double precision,
+    prompt_tokens integer NOT NULL DEFAULT 0,
+    completion_tokens integer NOT NULL DEFAULT 0,
+    spans jsonb NOT NULL DEFAULT '[]'::jsonb,
+    CONSTRAINT query_log_pkey PRIMARY KEY (log_id),
+    CONSTRAINT query_log_answer_path_check CHECK (answer_path IN ('refinement', 'question_cache', 'template', 'llm'))
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE IF EXISTS public.query_log
+    OWNER to postgres;
+
+COMMENT ON TABLE public.query_log
+    IS 'Internal telemetry of the SQL agent: one row per answered question with per-stage timings and token counts, written in batches. DO NOT use this table for analytical queries.';
+
+COMMENT ON COLUMN public.query_log.answer_path
+    IS 'How the question was answered: refinement of the previous result, question cache, template SQL or LLM-generated SQL.';
+
+COMMENT ON COLUMN public.query_log.sql_hash
+    IS 'Hash of the canonicalised SQL (see src/text_to_sql/sql_normalise.py), so differently aliased or formatted queries share a shape. sql_text is the canonical form.';
+
+COMMENT ON COLUMN public.query_log.error_class
+    IS 'Exception class of the failure (e.g. QueryCanceled, UndefinedColumn), or CostGuardRejected / UnsafeQuery when the query was not run. NULL on success.';
+
+COMMENT ON COLUMN public.query_log.spans
+    IS 'Stages in order: [{"name", "ms", "prompt_tokens", "completion_tokens", "error"}]. Names are generate, regenerate, clean, safety, execute, summarise, template, cache_lookup and refine.';
+-- Index: idx_query_log_logged_at
+
+-- DROP INDEX IF EXISTS public.idx_query_log_logged_at;
+
+CREATE INDEX IF NOT EXISTS idx_query_log_logged_at
+    ON public.query_log USING btree
+    (logged_at ASC NULLS LAST)
+    TABLESPACE pg_default;
+-- Index: idx_query_log_sql_hash
+
+-- DROP INDEX IF EXISTS public.idx_query_log_sql_hash;
+
+CREATE INDEX IF NOT EXISTS idx_query_log_sql_hash
+    ON public.query_log USING btree
+    (sql_hash COLLATE pg_catalog."default" ASC NULLS LAST)
+    TABLESPACE pg_default
+    WHERE sql_hash IS NOT NULL;
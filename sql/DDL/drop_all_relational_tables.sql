@@ -12,5 +12,7 @@ TRUNCATE
     Deliveries,
     Wickets,
     WicketFielders,
-    Replacements
+    Replacements,
+    player_last_appearance,
+    enrichment_jobs
 RESTART IDENTITY CASCADE;
\ No newline at end of file
@@ -1,3 +1,7 @@
+-- Earlier enrichment runs normalised RFM and LFM to codes that are not valid bowling styles
+UPDATE players SET bowling_style = 'RFM/RAFM' WHERE bowling_style = 'RFM/RAMF';
+UPDATE players SET bowling_style = 'LFM/LAFM' WHERE bowling_style = 'LFM/LAMF';
+
 UPDATE players
 SET
     full_name = 'Eshan Malinga',
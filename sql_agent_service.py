@@ -0,0 +1,148 @@
+# sql_agent_service.py
+"""
+HTTP service for the NL-to-SQL agent, for clients other than the Streamlit page.
+
+    uvicorn sql_agent_service:app --host 127.0.0.1 --port 8000
+    python sql_agent_service.py                          # same, using SERVICE_HOST / SERVICE_PORT
+
+    curl -s localhost:8000/query -H 'Content-Type: application/json' -d '{"question": "How many matches were played in IPL 2023?"}'
+
+The pipeline is synchronous, so each question runs on a bounded thread pool (SERVICE_MAX_WORKERS). Questions
+that normalise to the same text while one is already being answered wait for that answer instead of running
+again (single-flight). A request may carry a session_id: the session's last result is then kept, and
+follow-ups that only filter, sort or count it are answered from it in-process. LLM calls and database queries have their own limits inside the pipeline
+(SQL_AGENT_MAX_LLM_CALLS / SQL_AGENT_MAX_DB_QUERIES). With LLM_PROVIDER=stub it runs without network access
+against a local Postgres.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Optional
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+
+from src import config
+from src import llm_client
+from src.text_to_sql import concurrency
+from src.text_to_sql import result_refinement
+from src.text_to_sql.question_cache import normalise_question
+from scripts.run_advanced_langchain import (stream_advanced_langchain_tool, warm_up, STAGE_SQL, STAGE_RESULTS,
+                                            STAGE_SUMMARY, STAGE_DONE)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRequest(BaseModel):
+    question: str = Field(min_length=5, max_length=500)
+    session_id: Optional[str] = Field(default=None, min_length=1, max_length=100)
+
+
+def answer_question(question: str, session_id: str = None) -> dict:
+    """Runs the whole pipeline for one question (on a worker thread) and collects its stages."""
+    start = time.perf_counter()
+    answer = {'question': question, 'sql': None, 'headers': [], 'rows': [], 'answer': "", 'success': False}
+    for stage, payload in stream_advanced_langchain_tool(question, session_id):
+        if stage == STAGE_SQL:
+            answer['sql'] = payload
+        elif stage == STAGE_RESULTS:
+            answer['rows'], answer['headers'] = payload
+        elif stage == STAGE_SUMMARY:
+            answer['answer'] += payload
+        elif stage == STAGE_DONE:
+            answer['answer'], answer['rows'], answer['headers'], answer['success'] = payload
+    answer['seconds'] = time.perf_counter() - start
+    return answer
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight questions: the first caller starts the work on the executor, later callers
+    with the same key await the same future. Only touched from the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, max_pending: int):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def run(self, key: str, fn, *args) -> tuple[dict, bool]:
+        """Returns (result, coalesced)."""
+        future = self.in_flight.get(key)
+        coalesced = future is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many questions in progress, please retry shortly.")
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            self.started += 1
+        # A client disconnecting must not cancel work other callers are waiting on
+        return await asyncio.shield(future), coalesced
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self.in_flight),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+        }
+
+
+executor = ThreadPoolExecutor(max_workers=max(1, config.SERVICE_MAX_WORKERS), thread_name_prefix="sql-agent")
+single_flight = SingleFlight(executor, config.SERVICE_MAX_PENDING)
+warm_up_timings: dict[str, float] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_timings.update(await asyncio.get_running_loop().run_in_executor(executor, warm_up))
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="IPL SQL Agent", lifespan=lifespan)
+
+
+@app.post("/query")
+async def query(request: QueryRequest) -> dict:
+    question = request.question.strip()
+    # A session's follow-ups depend on its previous result, so they are only coalesced within the session
+    key = normalise_question(question) if request.session_id is None else f"{request.session_id}\n{normalise_question(question)}"
+    answer, coalesced = await single_flight.run(key, answer_question, question, request.session_id)
+    return jsonable_encoder({**answer, 'coalesced': coalesced})
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {'status': 'ok', 'warmed_up': bool(warm_up_timings)}
+
+
+@app.get("/stats")
+async def stats() -> dict:
+    previous_results = result_refinement.get_session_results()
+    return {
+        'workers': config.SERVICE_MAX_WORKERS,
+        'requests': single_flight.stats(),
+        'limits': concurrency.stats(),
+        'refinements': previous_results.stats() if previous_results else None,
+        'warm_up_seconds': warm_up_timings,
+        'llm_usage': [{'provider': p, 'role': r, 'model': m, **s} for (p, r, m), s in llm_client.usage_stats.snapshot().items()],
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    uvicorn.run(app, host=config.SERVICE_HOST, port=config.SERVICE_PORT)
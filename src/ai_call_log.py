@@ -0,0 +1,188 @@
+# ai_call_log.py
+"""
+Structured log of every LLM call, written as gzip-compressed JSONL segments under AI_CALL_LOG_DIR.
+Records are handed to a background writer thread, so logging never blocks an API worker on disk I/O.
+A segment is closed and a new one started once it exceeds AI_CALL_LOG_SEGMENT_MB of uncompressed
+JSON or has been open for AI_CALL_LOG_ROTATE_MINUTES; only the newest AI_CALL_LOG_MAX_SEGMENTS are kept.
+
+    python -m src.ai_call_log            # summarise the log by model and outcome
+"""
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "ai_calls-"
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+class AICallLog:
+    """Background-thread writer of rotated, compressed JSONL segments."""
+
+    def __init__(self, log_dir: str = config.AI_CALL_LOG_DIR,
+                 segment_bytes: int = config.AI_CALL_LOG_SEGMENT_BYTES,
+                 rotate_seconds: int = config.AI_CALL_LOG_ROTATE_SECONDS,
+                 max_segments: int = config.AI_CALL_LOG_MAX_SEGMENTS):
+        self.log_dir = log_dir
+        self.segment_bytes = segment_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_segments = max_segments
+        self.dropped = 0
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._file = None
+        self._segment_written = 0
+        self._segment_opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, name="ai-call-log", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        """Queues a record without blocking; if the writer has fallen far behind the record is dropped."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    # --- Writer thread ---
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                record = ...
+            if record is None:
+                self._close_segment()
+                return
+            try:
+                if record is not ...:
+                    self._write_line(json.dumps(record, default=str) + "\n")
+                if self._file and (time.monotonic() - last_flush >= FLUSH_INTERVAL_SECONDS):
+                    # A sync flush makes everything written so far readable while the segment is still open
+                    self._file.flush()
+                    last_flush = time.monotonic()
+                if self._file and time.time() - self._segment_opened_at >= self.rotate_seconds:
+                    self._close_segment()
+            except Exception as e:
+                logger.error(f"AI call log writer failed: {e}")
+
+    def _write_line(self, line: str):
+        data = line.encode('utf-8')
+        if self._file and self._segment_written + len(data) > self.segment_bytes:
+            self._close_segment()
+        if self._file is None:
+            self._open_segment()
+        self._file.write(data)
+        self._segment_written += len(data)
+
+    def _open_segment(self):
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(self.log_dir, f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}.jsonl.gz")
+        self._file = gzip.open(path, 'wb')
+        self._segment_written = 0
+        self._segment_opened_at = time.time()
+        self._prune_segments()
+
+    def _close_segment(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _prune_segments(self):
+        segments = sorted(glob.glob(os.path.join(self.log_dir, f"{SEGMENT_PREFIX}*.jsonl.gz")))
+        for path in segments[:max(0, len(segments) - self.max_segments)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove old AI call log segment {path}: {e}")
+
+
+_call_log: Optional[AICallLog] = None
+_call_log_lock = threading.Lock()
+
+
+def get_call_log() -> Optional[AICallLog]:
+    """Returns the process-wide call log, or None if it is disabled in config."""
+    global _call_log
+    if not config.AI_CALL_LOG_ENABLED:
+        return None
+    with _call_log_lock:
+        if _call_log is None:
+            _call_log = AICallLog()
+            atexit.register(_call_log.close)
+        return _call_log
+
+
+def log_call(*, provider: str, role: str, model: str, prompt_sha256: str, latency_seconds: float,
+             prompt_tokens: int, completion_tokens: int, outcome: str, error: Optional[str] = None,
+             streamed: bool = False, prompt: Optional[str] = None, response: Optional[str] = None):
+    """Records one LLM call. Prompt and response texts are kept only when AI_CALL_LOG_INCLUDE_TEXT is set."""
+    call_log = get_call_log()
+    if call_log is None:
+        return
+    record = {
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'provider': provider,
+        'role': role,
+        'model': model,
+        'prompt_sha256': prompt_sha256,
+        'latency_ms': round(latency_seconds * 1000, 1),
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'outcome': outcome,
+        'streamed': streamed,
+    }
+    if error:
+        record['error'] = error[:500]
+    if config.AI_CALL_LOG_INCLUDE_TEXT:
+        record['prompt'] = prompt
+        record['response'] = response
+    call_log.write(record)
+
+
+def read_call_log(log_dir: str = config.AI_CALL_LOG_DIR):
+    """Yields every record from all segments, oldest first. A segment still being written is read up to its last flush."""
+    for path in sorted(glob.glob(os.path.join(log_dir, f"{SEGMENT_PREFIX}*.jsonl.gz"))):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, OSError, json.JSONDecodeError):
+            # Open or crash-truncated segment: everything up to the last complete line has been read
+            continue
+
+
+def summarise_call_log(log_dir: str = config.AI_CALL_LOG_DIR):
+    groups = {}
+    for record in read_call_log(log_dir):
+        g = groups.setdefault((record.get('role'), record.get('model'), record.get('outcome')), [])
+        g.append(record)
+    print(f"{'role':<12} {'model':<32} {'outcome':<8} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'tokens in/out':>16}")
+    for (role, model, outcome), records in sorted(groups.items(), key=lambda kv: tuple(str(k) for k in kv[0])):
+        latencies = sorted(r['latency_ms'] for r in records)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        tokens = f"{sum(r['prompt_tokens'] for r in records)}/{sum(r['completion_tokens'] for r in records)}"
+        print(f"{str(role):<12} {str(model):<32} {outcome:<8} {len(records):>6} {p50:>9.0f} {p95:>9.0f} {tokens:>16}")
+
+
+if __name__ == "__main__":
+    summarise_call_log()
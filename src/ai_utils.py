@@ -0,0 +1,193 @@
+# ai_utils.py
+import json
+import random
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+from src.llm_cache import model_name_of
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for Gemini models (~4 characters per token)."""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Returns True if the exception looks like a 429 / quota exhausted error from the API."""
+    if getattr(error, 'code', None) == 429:
+        return True
+    error_text = f"{type(error).__name__} {error}".lower()
+    return "429" in error_text or "resourceexhausted" in error_text or "quota" in error_text
+
+
+class RateLimiter:
+    """
+    Thread-safe token-bucket limiter enforcing a requests-per-minute and an optional tokens-per-minute budget.
+    Callers block in acquire() until both buckets have enough capacity, so no fixed sleeps are needed.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: Optional[int] = None):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive.")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute and tokens_per_minute > 0 else None
+
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(self.tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(self.requests_per_minute,
+                                      self._request_allowance + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._token_allowance = min(self.tokens_per_minute,
+                                        self._token_allowance + elapsed * self.tokens_per_minute / 60.0)
+
+    def acquire(self, tokens: int = 0):
+        """Blocks until one request (and `tokens` tokens) can be spent without exceeding the budgets."""
+        # A single request larger than the whole minute budget can never fit, so cap it at the bucket size
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        while True:
+            with self._lock:
+                self._refill()
+                request_deficit = 1 - self._request_allowance
+                token_deficit = tokens - self._token_allowance if self.tokens_per_minute else 0
+                if request_deficit <= 0 and token_deficit <= 0:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+
+                wait_seconds = 0.0
+                if request_deficit > 0:
+                    wait_seconds = max(wait_seconds, request_deficit * 60.0 / self.requests_per_minute)
+                if token_deficit > 0:
+                    wait_seconds = max(wait_seconds, token_deficit * 60.0 / self.tokens_per_minute)
+            time.sleep(wait_seconds)
+
+
+def call_with_backoff(func: Callable, *, limiter: Optional[RateLimiter] = None, tokens: int = 0,
+                      max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+    """
+    Calls `func` under the rate limiter, retrying quota (429) errors with jittered exponential backoff.
+    Any other exception, or a quota error after `max_retries` retries, is re-raised to the caller.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire(tokens)
+        try:
+            return func()
+        except Exception as e:
+            if not is_quota_error(e) or attempt >= max_retries:
+                raise
+            # "Full jitter" backoff keeps concurrent workers from retrying in lock-step
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            logger.warning(f"Quota error from AI API, retry {attempt}/{max_retries} in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+def generate_text(model, prompt: str, *, cache=None, generation_config=None,
+                  limiter: Optional[RateLimiter] = None, tokens: int = 0, max_retries: int = 5) -> tuple[str, bool]:
+    """
+    Returns (response_text, from_cache). The response cache (llm_cache.LLMResponseCache) is consulted first;
+    on a miss the model is called under the limiter with backoff. Callers put() the text into the cache
+    themselves once it has parsed and validated, so bad answers are never replayed.
+    """
+    if cache:
+        cached_text = cache.get(model_name_of(model), prompt, generation_config)
+        if cached_text is not None:
+            return cached_text, True
+
+    if generation_config is not None:
+        response = call_with_backoff(lambda: model.generate_content(prompt, generation_config=generation_config),
+                                     limiter=limiter, tokens=tokens, max_retries=max_retries)
+    else:
+        response = call_with_backoff(lambda: model.generate_content(prompt),
+                                     limiter=limiter, tokens=tokens, max_retries=max_retries)
+    return response.text, False
+
+
+def _chunk_texts(response):
+    """Text of each streamed chunk; chunks without text parts (e.g. a bare finish reason) are skipped."""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            continue
+        if text:
+            yield text
+
+
+def stream_text(model, prompt: str, *, cache=None, generation_config=None,
+                limiter: Optional[RateLimiter] = None, tokens: int = 0, max_retries: int = 5):
+    """
+    Streaming counterpart of generate_text. Returns (iterator of text chunks, from_cache); a cache hit yields
+    the whole cached text as one chunk. Backoff covers starting the stream, not failures midway through it.
+    """
+    if cache:
+        cached_text = cache.get(model_name_of(model), prompt, generation_config)
+        if cached_text is not None:
+            return iter([cached_text]), True
+
+    kwargs = {'stream': True}
+    if generation_config is not None:
+        kwargs['generation_config'] = generation_config
+    response = call_with_backoff(lambda: model.generate_content(prompt, **kwargs),
+                                 limiter=limiter, tokens=tokens, max_retries=max_retries)
+    return _chunk_texts(response), False
+
+
+def iter_json_array(text_chunks):
+    """
+    Incrementally parses a JSON array of objects arriving in pieces (e.g. a streamed, code-fenced LLM answer)
+    and yields each element as soon as it is complete. Text before the opening '[' is skipped. Parsing stops
+    at the first element that is truncated or malformed; the remaining input is still consumed so the stream
+    completes, and a warning reports how much was left unparsed.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = "", None
+    finished = False
+    for chunk in text_chunks:
+        if finished:
+            continue
+        buffer += chunk
+        if pos is None:
+            start = buffer.find('[')
+            if start == -1:
+                continue
+            pos = start + 1
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                finished = True
+                break
+            try:
+                element, pos_after = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet, wait for more text
+            pos = pos_after
+            yield element
+        # Drop what has been parsed so retries only rescan the current element
+        buffer, pos = buffer[pos:], 0
+
+    if pos is None:
+        logger.warning(f"No JSON array found in the response: {buffer[:200]}")
+    elif not finished:
+        leftover = buffer.strip()
+        logger.warning(f"JSON array ended without a closing ']' ({len(leftover)} characters unparsed): "
+                       f"{leftover[:200]}")
+
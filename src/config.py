@@ -5,6 +5,12 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_flag(name: str, default: bool) -> bool:
+    """A boolean setting: 1, true or yes (any case) turn it on, anything else turns it off."""
+    return os.getenv(name, "true" if default else "false").strip().lower() in ("1", "true", "yes")
+
+
 # Database Configuration
 DB_NAME: str = os.getenv("DB_NAME", "postgres")
 DB_USER: str = os.getenv("DB_USER", "postgres")
@@ -14,4 +20,119 @@ DB_PORT: str = os.getenv("DB_PORT", "5432")
 
 # Path Configuration
 JSON_FILES_DIRECTORY: str = os.getenv("JSON_FILES_DIRECTORY", "data/raw_json_cricsheet/")
-PEOPLE_CSV_PATH: str = os.getenv("PEOPLE_CSV_PATH", "data/master_data/people.csv")
\ No newline at end of file
+PEOPLE_CSV_PATH: str = os.getenv("PEOPLE_CSV_PATH", "data/master_data/people.csv")
+
+# AI Enrichment Configuration
+AI_REQUESTS_PER_MINUTE: int = int(os.getenv("AI_REQUESTS_PER_MINUTE", "60"))
+AI_TOKENS_PER_MINUTE: int = int(os.getenv("AI_TOKENS_PER_MINUTE", "250000"))
+AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_MAX_RETRIES: int = int(os.getenv("AI_MAX_RETRIES", "5"))
+AI_ENRICHMENT_PLAYER_LIMIT: int = int(os.getenv("AI_ENRICHMENT_PLAYER_LIMIT", "0"))  # 0 means no limit
+AI_ENRICHMENT_BATCH_MODE: bool = _env_flag("AI_ENRICHMENT_BATCH_MODE", False)
+AI_ENRICHMENT_BATCH_TOKEN_BUDGET: int = int(os.getenv("AI_ENRICHMENT_BATCH_TOKEN_BUDGET", "6000"))
+AI_ENRICHMENT_MAX_BATCH_SIZE: int = int(os.getenv("AI_ENRICHMENT_MAX_BATCH_SIZE", "25"))
+AI_ENRICHMENT_BATCH_MAX_ATTEMPTS: int = int(os.getenv("AI_ENRICHMENT_BATCH_MAX_ATTEMPTS", "3"))
+
+# LLM Response Cache Configuration
+LLM_CACHE_ENABLED: bool = _env_flag("LLM_CACHE_ENABLED", True)
+LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 24 * 60 * 60
+LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+# AI Enrichment Work Queue Configuration
+AI_QUEUE_CLAIM_SIZE: int = int(os.getenv("AI_QUEUE_CLAIM_SIZE", "100"))
+AI_QUEUE_MAX_ATTEMPTS: int = int(os.getenv("AI_QUEUE_MAX_ATTEMPTS", "5"))
+AI_QUEUE_LEASE_SECONDS: int = int(os.getenv("AI_QUEUE_LEASE_SECONDS", "1800"))
+AI_QUEUE_RETRY_BASE_SECONDS: int = int(os.getenv("AI_QUEUE_RETRY_BASE_SECONDS", "300"))
+AI_TIMINGS_MATCH_LIMIT: int = int(os.getenv("AI_TIMINGS_MATCH_LIMIT", "100"))  # 0 means no limit
+
+# Match Timings Chunking Configuration
+AI_TIMINGS_OUTPUT_TOKEN_BUDGET: int = int(os.getenv("AI_TIMINGS_OUTPUT_TOKEN_BUDGET", "3000"))
+AI_TIMINGS_MAX_CHUNK_SIZE: int = int(os.getenv("AI_TIMINGS_MAX_CHUNK_SIZE", "10"))
+AI_TIMINGS_CHUNK_MAX_ATTEMPTS: int = int(os.getenv("AI_TIMINGS_CHUNK_MAX_ATTEMPTS", "3"))
+AI_TIMINGS_WRITE_BATCH_SIZE: int = int(os.getenv("AI_TIMINGS_WRITE_BATCH_SIZE", "25"))
+
+# Structured AI Call Log Configuration
+AI_CALL_LOG_ENABLED: bool = _env_flag("AI_CALL_LOG_ENABLED", True)
+AI_CALL_LOG_DIR: str = os.getenv("AI_CALL_LOG_DIR", "logs/ai_calls")
+AI_CALL_LOG_SEGMENT_BYTES: int = int(os.getenv("AI_CALL_LOG_SEGMENT_MB", "20")) * 1024 * 1024
+AI_CALL_LOG_ROTATE_SECONDS: int = int(os.getenv("AI_CALL_LOG_ROTATE_MINUTES", "60")) * 60
+AI_CALL_LOG_MAX_SEGMENTS: int = int(os.getenv("AI_CALL_LOG_MAX_SEGMENTS", "200"))
+AI_CALL_LOG_INCLUDE_TEXT: bool = _env_flag("AI_CALL_LOG_INCLUDE_TEXT", False)
+
+# LLM Provider Configuration ('gemini' or 'stub' for an offline, deterministic backend)
+LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")
+LLM_MODEL_ENRICHMENT: str = os.getenv("LLM_MODEL_ENRICHMENT", "gemini-2.5-flash")
+LLM_MODEL_TIMINGS: str = os.getenv("LLM_MODEL_TIMINGS", "gemini-2.5-pro")
+LLM_MODEL_SQL: str = os.getenv("LLM_MODEL_SQL", "gemini-2.5-flash")
+LLM_MODEL_SUMMARY: str = os.getenv("LLM_MODEL_SUMMARY", "gemini-2.5-flash-lite")
+LLM_RECORD_RESPONSES: bool = _env_flag("LLM_RECORD_RESPONSES", False)
+LLM_RECORDINGS_PATH: str = os.getenv("LLM_RECORDINGS_PATH", "cache/llm_recordings.jsonl")
+LLM_STUB_LATENCY_SECONDS: float = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0"))
+LLM_STUB_QUOTA_ERROR_RATE: float = float(os.getenv("LLM_STUB_QUOTA_ERROR_RATE", "0"))
+LLM_STUB_SEED: int = int(os.getenv("LLM_STUB_SEED", "42"))
+
+# SQL Agent Schema Cache Configuration
+SCHEMA_CACHE_DIR: str = os.getenv("SCHEMA_CACHE_DIR", "cache/schema")
+SCHEMA_CACHE_CHECK_SECONDS: int = int(os.getenv("SCHEMA_CACHE_CHECK_SECONDS", "300"))
+
+# SQL Agent Few-Shot Example Retrieval
+SQL_EXAMPLES_TOP_K: int = int(os.getenv("SQL_EXAMPLES_TOP_K", "3"))
+SQL_EXAMPLES_TOKEN_BUDGET: int = int(os.getenv("SQL_EXAMPLES_TOKEN_BUDGET", "2500"))
+
+# SQL Agent Schema Pruning (only the tables relevant to the question, plus their join paths)
+SQL_SCHEMA_PRUNING_ENABLED: bool = _env_flag("SQL_SCHEMA_PRUNING_ENABLED", True)
+SQL_SCHEMA_MAX_TABLES: int = int(os.getenv("SQL_SCHEMA_MAX_TABLES", "5"))
+
+# SQL Agent Question Cache (answers are tagged with the ETL load generation from etl_runs;
+# the fuzzy threshold is the similarity a misspelt word needs to still count as the same word)
+QUESTION_CACHE_ENABLED: bool = _env_flag("QUESTION_CACHE_ENABLED", True)
+QUESTION_CACHE_PATH: str = os.getenv("QUESTION_CACHE_PATH", "cache/question_cache.sqlite3")
+QUESTION_CACHE_FUZZY_THRESHOLD: float = float(os.getenv("QUESTION_CACHE_FUZZY_THRESHOLD", "0.8"))
+QUESTION_CACHE_MAX_ENTRIES: int = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "2000"))
+ETL_GENERATION_CHECK_SECONDS: int = int(os.getenv("ETL_GENERATION_CHECK_SECONDS", "60"))
+
+# SQL Agent Result Cache (in-process, keyed by canonicalised SQL, cleared on a new ETL load generation)
+RESULT_CACHE_ENABLED: bool = _env_flag("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_BYTES: int = int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# SQL Agent Cost Guard (EXPLAIN budgets checked before executing generated SQL)
+SQL_COST_GUARD_ENABLED: bool = _env_flag("SQL_COST_GUARD_ENABLED", True)
+SQL_MAX_PLAN_COST: float = float(os.getenv("SQL_MAX_PLAN_COST", "1000000"))
+SQL_MAX_PLAN_ROWS: float = float(os.getenv("SQL_MAX_PLAN_ROWS", "100000"))
+SQL_GUARD_REGENERATE: bool = _env_flag("SQL_GUARD_REGENERATE", True)
+SQL_EXPLAIN_TIMEOUT_MS: int = int(os.getenv("SQL_EXPLAIN_TIMEOUT_MS", "5000"))
+SQL_STATEMENT_TIMEOUT_MS: int = int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", "30000"))
+
+# SQL Agent Template Fast Path (parameterised SQL for common question shapes, no LLM call)
+SQL_TEMPLATES_ENABLED: bool = _env_flag("SQL_TEMPLATES_ENABLED", True)
+
+# SQL Agent Result Summary (rule-based answers for small results, compact result encoding for the LLM)
+SUMMARY_RULES_ENABLED: bool = _env_flag("SUMMARY_RULES_ENABLED", True)
+SUMMARY_RULES_MAX_ROWS: int = int(os.getenv("SUMMARY_RULES_MAX_ROWS", "10"))
+SUMMARY_PROMPT_TOP_K: int = int(os.getenv("SUMMARY_PROMPT_TOP_K", "20"))
+
+# Database connection pool (used by the SQL agent; the ETL opens its own connections)
+DB_POOL_MIN_CONNECTIONS: int = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "1"))
+DB_POOL_MAX_CONNECTIONS: int = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "10"))
+
+# SQL Agent concurrency limits (per process, across all questions being answered)
+SQL_AGENT_MAX_LLM_CALLS: int = int(os.getenv("SQL_AGENT_MAX_LLM_CALLS", "4"))
+SQL_AGENT_MAX_DB_QUERIES: int = int(os.getenv("SQL_AGENT_MAX_DB_QUERIES", "8"))
+
+# SQL Agent HTTP service (sql_agent_service.py)
+SERVICE_HOST: str = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_MAX_WORKERS: int = int(os.getenv("SERVICE_MAX_WORKERS", "8"))
+SERVICE_MAX_PENDING: int = int(os.getenv("SERVICE_MAX_PENDING", "64"))
+
+# SQL Agent follow-up refinement (filter / sort / top N / count over the session's previous result, in SQLite)
+RESULT_REFINEMENT_ENABLED: bool = _env_flag("RESULT_REFINEMENT_ENABLED", True)
+RESULT_REFINEMENT_MAX_SESSIONS: int = int(os.getenv("RESULT_REFINEMENT_MAX_SESSIONS", "200"))
+RESULT_REFINEMENT_MAX_ROWS: int = int(os.getenv("RESULT_REFINEMENT_MAX_ROWS", "10000"))
+
+# SQL Agent query log (per-stage timings and tokens per question, written to query_log in batches)
+QUERY_LOG_ENABLED: bool = _env_flag("QUERY_LOG_ENABLED", True)
+QUERY_LOG_BATCH_SIZE: int = int(os.getenv("QUERY_LOG_BATCH_SIZE", "50"))
+QUERY_LOG_FLUSH_SECONDS: float = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "5"))
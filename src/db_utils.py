@@ -1,7 +1,11 @@
 # db_utils.py
 import psycopg2
+import psycopg2.pool
 import psycopg2.extensions
 import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
 from . import config
 
 logger = logging.getLogger(__name__)
@@ -24,4 +28,72 @@ def get_db_connection() -> psycopg2.extensions.connection:
         raise
     except Exception as e:
         logger.error(f"Unexpected error connecting to database: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def get_sqlalchemy_uri() -> str:
+    """SQLAlchemy URI for the same database, as used by LangChain's SQLDatabase."""
+    return f"postgresql+psycopg2://{config.DB_USER}:{config.DB_PASSWORD}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
+
+
+# --- Connection pool (query-serving paths; the ETL keeps its own connections) ---
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """The process-wide pool, opened with DB_POOL_MIN_CONNECTIONS connections on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                config.DB_POOL_MIN_CONNECTIONS, config.DB_POOL_MAX_CONNECTIONS,
+                dbname=config.DB_NAME,
+                user=config.DB_USER,
+                password=config.DB_PASSWORD,
+                host=config.DB_HOST,
+                port=config.DB_PORT
+            )
+            logger.info(f"Database connection pool opened ({config.DB_POOL_MIN_CONNECTIONS}-"
+                        f"{config.DB_POOL_MAX_CONNECTIONS} connections to {config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}).")
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    A connection borrowed from the pool. Whatever transaction is left open is rolled back before the
+    connection goes back, so callers commit explicitly. If the pool is exhausted a one-off connection is
+    opened (and closed afterwards) instead of failing.
+    """
+    pool = get_db_pool()
+    try:
+        conn = pool.getconn()
+    except psycopg2.pool.PoolError:
+        logger.warning("Database connection pool exhausted, opening a one-off connection.")
+        conn = get_db_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    discard = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        discard = True
+        raise
+    finally:
+        if not conn.closed and not discard:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        pool.putconn(conn, close=discard or bool(conn.closed))
+
+
+def close_db_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
@@ -0,0 +1,126 @@
+# src/etl/enrichment_queue.py
+import os
+import socket
+import logging
+from psycopg2 import extras
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+PLAYER_JOB = 'player'
+MATCH_JOB = 'match'
+
+
+def worker_id() -> str:
+    """Identifies this process in enrichment_jobs.locked_by, e.g. 'etl-host-1:4242'."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_jobs(cursor, job_type: str, entity_ids: list[str],
+                 max_attempts: int = config.AI_QUEUE_MAX_ATTEMPTS) -> int:
+    """
+    Adds pending jobs for the given entities and returns how many are now pending. Entities already queued or
+    running are left alone, and jobs that exhausted their attempts stay 'failed' until reset_failed_jobs is
+    called. A 'done' job is re-opened, since the entity only shows up as a candidate again if its data is still
+    or again missing (e.g. the N/A reset). It keeps its attempts, so an entity that enrichment never fills in
+    goes 'failed' once every re-opening has used up `max_attempts` instead of being retried on every run.
+    """
+    if not entity_ids:
+        return 0
+    queued = extras.execute_values(cursor, """
+        INSERT INTO enrichment_jobs (job_type, entity_id) VALUES %s
+        ON CONFLICT (job_type, entity_id) DO UPDATE SET
+            status = CASE WHEN enrichment_jobs.attempts >= {max_attempts} THEN 'failed' ELSE 'pending' END,
+            last_error = CASE WHEN enrichment_jobs.attempts >= {max_attempts}
+                              THEN 'Data still missing after ' || enrichment_jobs.attempts || ' enrichments' END,
+            next_attempt_at = now(),
+            updated_at = now()
+        WHERE enrichment_jobs.status = 'done'
+        RETURNING status;
+    """.format(max_attempts=int(max_attempts)), [(job_type, entity_id) for entity_id in entity_ids], fetch=True)
+    return sum(1 for (status,) in queued if status == 'pending')
+
+
+def claim_jobs(conn, job_type: str, batch_size: int, locked_by: str,
+               lease_seconds: int = config.AI_QUEUE_LEASE_SECONDS) -> list[str]:
+    """
+    Atomically claims up to `batch_size` due jobs and returns their entity ids. FOR UPDATE SKIP LOCKED lets
+    several processes claim concurrently without ever handing out the same job twice. Running jobs whose
+    lease has expired (crashed worker) are claimable again. Commits so the claim is visible immediately.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE enrichment_jobs SET
+                status = 'running',
+                attempts = attempts + 1,
+                locked_by = %(locked_by)s,
+                locked_at = now(),
+                updated_at = now()
+            WHERE job_id IN (
+                SELECT job_id
+                FROM enrichment_jobs
+                WHERE job_type = %(job_type)s
+                  AND (
+                      (status = 'pending' AND next_attempt_at <= now())
+                      OR (status = 'running' AND locked_at < now() - make_interval(secs => %(lease_seconds)s))
+                  )
+                ORDER BY next_attempt_at, job_id
+                LIMIT %(batch_size)s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING entity_id;
+        """, {'job_type': job_type, 'batch_size': batch_size, 'locked_by': locked_by, 'lease_seconds': lease_seconds})
+        entity_ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return entity_ids
+
+
+def complete_jobs(cursor, job_type: str, entity_ids: list[str]):
+    if not entity_ids:
+        return
+    cursor.execute("""
+        UPDATE enrichment_jobs SET
+            status = 'done',
+            last_error = NULL,
+            locked_by = NULL,
+            locked_at = NULL,
+            updated_at = now()
+        WHERE job_type = %s AND entity_id = ANY(%s);
+    """, (job_type, list(entity_ids)))
+
+
+def fail_jobs(cursor, job_type: str, entity_ids: list[str], error: str,
+              max_attempts: int = config.AI_QUEUE_MAX_ATTEMPTS,
+              retry_base_seconds: int = config.AI_QUEUE_RETRY_BASE_SECONDS):
+    """Records a failed attempt; the job is retried after an exponential backoff or marked 'failed' for good."""
+    if not entity_ids:
+        return
+    cursor.execute("""
+        UPDATE enrichment_jobs SET
+            status = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'pending' END,
+            last_error = %(error)s,
+            next_attempt_at = now() + make_interval(secs => %(retry_base_seconds)s * power(2, attempts - 1)),
+            locked_by = NULL,
+            locked_at = NULL,
+            updated_at = now()
+        WHERE job_type = %(job_type)s AND entity_id = ANY(%(entity_ids)s);
+    """, {'job_type': job_type, 'entity_ids': list(entity_ids), 'error': error[:2000],
+          'max_attempts': max_attempts, 'retry_base_seconds': retry_base_seconds})
+
+
+def reset_failed_jobs(cursor, job_type: str) -> int:
+    """Gives every permanently failed job of this type a fresh set of attempts."""
+    cursor.execute("""
+        UPDATE enrichment_jobs SET status = 'pending', attempts = 0, next_attempt_at = now(), updated_at = now()
+        WHERE job_type = %s AND status = 'failed';
+    """, (job_type,))
+    return cursor.rowcount
+
+
+def log_queue_summary(cursor, job_type: str):
+    cursor.execute("""
+        SELECT status, COUNT(*) FROM enrichment_jobs WHERE job_type = %s GROUP BY status ORDER BY status;
+    """, (job_type,))
+    counts = ", ".join(f"{status}: {count}" for status, count in cursor.fetchall())
+    logger.info(f"Enrichment queue ({job_type}) - {counts or 'empty'}")
@@ -33,6 +33,42 @@ def get_player_identifier(player_name, cursor, player_name_to_identifier_cache):
         return None
 
 
+def update_player_last_appearance(cursor, match_id):
+    """
+    Incrementally maintains player_last_appearance for the players of one match. A player's row only moves
+    forward to this match if it is more recent (by match_date, then match_id) than the one already stored.
+    """
+    cursor.execute("""
+        INSERT INTO player_last_appearance (player_identifier, match_id, match_date)
+        SELECT mp.player_identifier, m.match_id, m.match_date
+        FROM MatchPlayers mp
+        JOIN Matches m ON mp.match_id = m.match_id
+        WHERE mp.match_id = %s
+        ON CONFLICT (player_identifier) DO UPDATE SET
+            match_id = EXCLUDED.match_id,
+            match_date = EXCLUDED.match_date
+        WHERE player_last_appearance.match_id = EXCLUDED.match_id -- Same match reloaded, pick up any date fix
+           OR (COALESCE(EXCLUDED.match_date, '-infinity'::date), EXCLUDED.match_id)
+              > (COALESCE(player_last_appearance.match_date, '-infinity'::date), player_last_appearance.match_id);
+    """, (match_id,))
+
+
+def rebuild_player_last_appearance(cursor):
+    """Full rebuild of player_last_appearance from MatchPlayers, used to bootstrap an empty table."""
+    cursor.execute("""
+        INSERT INTO player_last_appearance (player_identifier, match_id, match_date)
+        SELECT DISTINCT ON (mp.player_identifier)
+            mp.player_identifier, m.match_id, m.match_date
+        FROM MatchPlayers mp
+        JOIN Matches m ON mp.match_id = m.match_id
+        ORDER BY mp.player_identifier, m.match_date DESC NULLS LAST, m.match_id DESC
+        ON CONFLICT (player_identifier) DO UPDATE SET
+            match_id = EXCLUDED.match_id,
+            match_date = EXCLUDED.match_date;
+    """)
+    logger.info(f"Rebuilt player_last_appearance for {cursor.rowcount} players.")
+
+
 def load_matches_and_related(team_id_cache, venue_id_cache, player_name_to_identifier_cache):
     """
     Processes stg_match_data to populate Matches, MatchPlayers,
@@ -44,6 +80,12 @@ def load_matches_and_related(team_id_cache, venue_id_cache, player_name_to_ident
         conn = db_utils.get_db_connection()
         cursor = conn.cursor()
 
+        # Bootstrap the summary table once for databases that already hold match history
+        cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM player_last_appearance);")
+        if cursor.fetchone()[0]:
+            rebuild_player_last_appearance(cursor)
+            conn.commit()
+
         cursor.execute("SELECT id, match_details FROM stg_match_data;")
         staged_matches = cursor.fetchall()
 
@@ -164,6 +206,8 @@ def load_matches_and_related(team_id_cache, venue_id_cache, player_name_to_ident
                                 VALUES (%s, %s, %s) ON CONFLICT (match_id, player_identifier) DO NOTHING;
                             """, (match_file_id, player_identifier, current_team_id))
 
+                update_player_last_appearance(cursor, match_file_id)
+
                 for pom_player_name in info.get('player_of_match', []):
                     #player_identifier = get_player_identifier(pom_player_name, cursor, player_name_to_identifier_cache)
                     player_identifier = people_registry[pom_player_name]
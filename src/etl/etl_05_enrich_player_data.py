@@ -1,15 +1,18 @@
 # src/etl/etl_05_enrich_player_data.py
-import os
-import time
 import json
 import psycopg2
 import logging
-from dotenv import load_dotenv
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from psycopg2 import extras
+from datetime import datetime
 
 from src import config
 from src import db_utils
+from src import ai_utils
+from src import llm_cache
+from src import llm_client
+from src.etl import enrichment_queue
+from src.etl import etl_runs
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,60 @@ VALID_BOWLING_STYLES = [
     "OB", "LB", "LBG", #Right arm spin bowling
     "SLA", "SLW", "LAG" #Left arm spin bowling
 ]
+VALID_BATTING_HANDS = ["Right-hand bat", "Left-hand bat"]
+VALID_BOWLING_HANDS = ["Right-arm", "Left-arm"]
+VALID_PLAYER_ROLES = ["Batsman", "Bowler", "All-rounder", "Wicket Keeper"]
+ENRICHMENT_FIELDS = ["batting_hand", "bowling_hand", "bowling_style", "date_of_birth", "country", "player_role", "full_name"]
+
+# The per-field instructions shared by the single-player and batched prompts
+ENRICHMENT_FIELD_RULES = f"""
+    1.  "batting_hand": Must be one of {json.dumps(VALID_BATTING_HANDS)}.
+    2.  "bowling_hand": Must be one of {json.dumps(VALID_BOWLING_HANDS)}.
+    3.  "bowling_style": Must be one of the following exact abbreviations: {", ".join(VALID_BOWLING_STYLES)}.
+    4.  "date_of_birth": Must be in "YYYY-MM-DD" format. If not found return '1900-01-01'.
+    5.  "country": Country of origin of the cricketer. Must be a single country.
+    6.  "player_role": Must be one of the {json.dumps(VALID_PLAYER_ROLES)}
+    7.  "full_name": Full name of the player
+"""
+
+# Rough size of one player's JSON answer, used when sizing batches against the token budget
+BATCH_OUTPUT_TOKENS_PER_PLAYER = 90
+
+# Players missing any enrichable field, with details of their latest match. player_last_appearance
+# (maintained by etl_03) already points at that match, so only the candidate rows are joined out to
+# Matches, Venues and Teams. %(ids)s optionally restricts the result to a claimed set of identifiers.
+ENRICHMENT_CANDIDATES_QUERY = """
+    SELECT
+        p.identifier,
+        p.name,
+        p.unique_name,
+        v.country,
+        m.match_date as last_match_date,
+        m.season_year as last_season_year,
+        m.match_number as last_match_number,
+        v.venue_name as last_venue_name,
+        v.city as last_city,
+        concat(t1.team_name, ' v/s ', t2.team_name) as last_match_played
+    FROM
+        players p
+    JOIN player_last_appearance pla ON p.identifier = pla.player_identifier
+    JOIN Matches m ON pla.match_id = m.match_id
+    JOIN venues v on m.venue_id = v.venue_id
+    JOIN teams t1 on m.team1_id = t1.team_id
+    JOIN teams t2 on m.team2_id = t2.team_id
+    WHERE
+        -- Finds players who are missing the data we want to enrich (served by idx_players_needs_enrichment)
+        (
+            p.batting_hand IS NULL OR 
+            p.bowling_hand IS NULL OR 
+            p.player_role IS NULL OR 
+            p.bowling_style IS NULL OR 
+            p.date_of_birth IS NULL OR 
+            p.country IS NULL OR
+            p.full_name IS NULL
+        )
+        AND (%(ids)s::text[] IS NULL OR p.identifier = ANY(%(ids)s));
+"""
 
 
 def build_enrichment_prompt(player_data: dict) -> str:
@@ -42,219 +99,437 @@ def build_enrichment_prompt(player_data: dict) -> str:
     Based on the cricketer with the following details:
     {context}
     Provide the following missing information in a strict JSON format.
-    1.  "batting_hand": Must be one of ["Right-hand bat", "Left-hand bat"].
-    2.  "bowling_hand": Must be one of ["Right-arm", "Left-arm"].
-    3.  "bowling_style": Must be one of the following exact abbreviations: {", ".join(VALID_BOWLING_STYLES)}.
-    4.  "date_of_birth": Must be in "YYYY-MM-DD" format. If not found return '1900-01-01'.
-    5.  "country": Country of origin of the cricketer. Must be a single country.
-    6.  "player_role": Must be one of the ["Batsman", "Bowler", "All-rounder", "Wicket Keeper"]
-    7.  "full_name": Full name of the player
-
+    {ENRICHMENT_FIELD_RULES}
     If a value is unknown or the player is not a bowler, return N/A for that key, but please provide the other keys.
     Only return the JSON object and nothing else.
     """
     return rules
 
 
-def get_player_details_from_ai(player_data: dict) -> dict | None:
+def get_player_details_from_ai(player_data: dict, model=None, limiter: ai_utils.RateLimiter | None = None) -> dict | None:
     """Queries the Gemini API with a prompt and returns a validated JSON object."""
+    response_text = None
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        if model is None:
+            model = llm_client.get_client('enrichment')
         prompt = build_enrichment_prompt(player_data)
         #print(prompt)
 
-        response = model.generate_content(prompt)
+        cache = llm_cache.get_response_cache()
+        response_text, from_cache = ai_utils.generate_text(
+            model, prompt,
+            cache=cache,
+            limiter=limiter,
+            tokens=ai_utils.estimate_tokens(prompt),
+            max_retries=config.AI_MAX_RETRIES
+        )
 
         # Clean the response to extract the JSON part
-        json_text = response.text.strip().removeprefix("```json").removesuffix("```").strip()
+        json_text = response_text.strip().removeprefix("```json").removesuffix("```").strip()
 
         enriched_data = json.loads(json_text)
+        # Same checks as a batched answer; an invalid one fails this player's job only
+        if not validate_enrichment(enriched_data):
+            logger.warning(f"Discarding invalid AI answer for player {player_data.get('name')}: {enriched_data}")
+            return None
+        if cache and not from_cache:
+            cache.put(llm_cache.model_name_of(model), prompt, response_text)
         return enriched_data
     except json.JSONDecodeError:
-        logger.error(f"AI returned malformed JSON for player {player_data.get('name')}: {response.text}")
+        logger.error(f"AI returned malformed JSON for player {player_data.get('name')}: {response_text}")
         return None
     except Exception as e:
         logger.error(f"API call failed for player {player_data.get('name')}: {e}")
         return None
 
 
-def run_ai_enrichment():
-    """Finds players missing data and uses AI to enrich their records."""
-    load_dotenv()
-    if not os.getenv("GOOGLE_API_KEY"):
-        logger.error("ERROR: GOOGLE_API_KEY not found in .env file.")
+def enrich_players_concurrently(players: list[dict], model, limiter: ai_utils.RateLimiter | None = None,
+                                max_workers: int = config.AI_MAX_CONCURRENCY):
+    """
+    Runs get_player_details_from_ai for every player on a bounded thread pool, pacing requests with the limiter.
+    Yields (player_dict, enriched_data) tuples in completion order; enriched_data is None on failure.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ai-enrich") as executor:
+        futures = {executor.submit(get_player_details_from_ai, player, model, limiter): player for player in players}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+# --- Batched enrichment (several players per API call) ---
+
+def _player_context(player_data: dict) -> dict:
+    """The subset of a candidate row that is sent to the AI, keyed by identifier."""
+    return {
+        'identifier': player_data.get('identifier'),
+        'name': player_data.get('name'),
+        'last_season_year': player_data.get('last_season_year'),
+        'last_match_date': player_data.get('last_match_date'),
+        'last_match_played': player_data.get('last_match_played'),
+        'last_venue_name': player_data.get('last_venue_name'),
+        'last_city': player_data.get('last_city'),
+    }
+
+
+def build_batch_enrichment_prompt(players: list[dict]) -> str:
+    """Constructs one prompt asking for the attributes of several players, each keyed by its identifier."""
+    # One compact JSON object per line keeps the per-player token cost low
+    players_json = "[\n" + ",\n".join(json.dumps(_player_context(p), default=str) for p in players) + "\n]"
+
+    rules = f"""
+    Below is a JSON array of cricketers. Each entry has a unique "identifier", the player's name and details of \
+    the last IPL match played by the cricketer.
+    {players_json}
+
+    For EACH cricketer, provide the following missing information.
+    {ENRICHMENT_FIELD_RULES}
+    If a value is unknown or the player is not a bowler, return N/A for that key, but please provide the other keys.
+    Return a single JSON array with exactly one object per cricketer. Every object MUST contain the "identifier" \
+    copied exactly from the input along with the 7 keys above.
+    Only return the JSON array and nothing else.
+    """
+    return rules
+
+
+def validate_enrichment(enriched_data) -> bool:
+    """Checks a single player's AI answer against the allowed values for each field."""
+    if not isinstance(enriched_data, dict):
+        return False
+    if any(field not in enriched_data for field in ENRICHMENT_FIELDS):
+        return False
+
+    def allowed(value, valid_values):
+        return value in (None, 'N/A') or value in valid_values
+
+    # Short forms such as 'RFM' are accepted here and normalised to 'RFM/RAFM' in SQL afterwards
+    valid_styles = set(VALID_BOWLING_STYLES) | {part for style in VALID_BOWLING_STYLES for part in style.split('/')}
+    if not (allowed(enriched_data['batting_hand'], VALID_BATTING_HANDS)
+            and allowed(enriched_data['bowling_hand'], VALID_BOWLING_HANDS)
+            and allowed(enriched_data['bowling_style'], valid_styles)
+            and allowed(enriched_data['player_role'], VALID_PLAYER_ROLES)):
+        return False
+
+    date_of_birth = enriched_data['date_of_birth']
+    if date_of_birth not in (None, 'N/A'):
+        try:
+            datetime.strptime(str(date_of_birth), '%Y-%m-%d')
+        except ValueError:
+            return False
+    return True
+
+
+def plan_enrichment_batches(players: list[dict], token_budget: int = config.AI_ENRICHMENT_BATCH_TOKEN_BUDGET,
+                            max_batch_size: int = config.AI_ENRICHMENT_MAX_BATCH_SIZE) -> list[list[dict]]:
+    """
+    Greedily packs players into batches whose estimated prompt + answer size stays within `token_budget`.
+    Every batch holds at least one player, even if that player alone exceeds the budget.
+    """
+    fixed_tokens = ai_utils.estimate_tokens(build_batch_enrichment_prompt([]))
+    batches, current_batch, current_tokens = [], [], fixed_tokens
+    for player in players:
+        player_tokens = (ai_utils.estimate_tokens(json.dumps(_player_context(player), default=str))
+                         + BATCH_OUTPUT_TOKENS_PER_PLAYER)
+        if current_batch and (current_tokens + player_tokens > token_budget or len(current_batch) >= max_batch_size):
+            batches.append(current_batch)
+            current_batch, current_tokens = [], fixed_tokens
+        current_batch.append(player)
+        current_tokens += player_tokens
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def get_batch_details_from_ai(players: list[dict], model, limiter: ai_utils.RateLimiter | None = None) -> dict:
+    """
+    Queries the AI for a batch of players and returns {identifier: enriched_data} for the players whose
+    answers passed validation. Players that are missing or invalid in the response are simply left out.
+    """
+    response_text = None
+    cache = llm_cache.get_response_cache()
+    try:
+        prompt = build_batch_enrichment_prompt(players)
+        response_text, from_cache = ai_utils.generate_text(
+            model, prompt,
+            cache=cache,
+            limiter=limiter,
+            tokens=ai_utils.estimate_tokens(prompt) + BATCH_OUTPUT_TOKENS_PER_PLAYER * len(players),
+            max_retries=config.AI_MAX_RETRIES
+        )
+
+        json_text = response_text.strip().removeprefix("```json").removesuffix("```").strip()
+        enriched_list = json.loads(json_text)
+        if not isinstance(enriched_list, list):
+            raise TypeError("AI did not return a JSON array as expected.")
+    except json.JSONDecodeError:
+        logger.error(f"AI returned malformed JSON for a batch of {len(players)} players: {response_text}")
+        return {}
+    except Exception as e:
+        logger.error(f"API call failed for a batch of {len(players)} players: {e}")
+        return {}
+
+    requested_ids = {p['identifier'] for p in players}
+    valid_results = {}
+    for enriched_data in enriched_list:
+        identifier = enriched_data.get('identifier') if isinstance(enriched_data, dict) else None
+        if identifier not in requested_ids:
+            continue
+        if validate_enrichment(enriched_data):
+            valid_results[identifier] = enriched_data
+        else:
+            logger.warning(f"Discarding invalid AI answer for player {identifier}: {enriched_data}")
+
+    # Only replay a batch answer that was complete; partial answers get re-asked in a new batch anyway
+    if cache and not from_cache and len(valid_results) == len(requested_ids):
+        cache.put(llm_cache.model_name_of(model), prompt, response_text)
+    return valid_results
+
+
+def enrich_players_in_batches(players: list[dict], model, limiter: ai_utils.RateLimiter | None = None,
+                              max_workers: int = config.AI_MAX_CONCURRENCY,
+                              token_budget: int = config.AI_ENRICHMENT_BATCH_TOKEN_BUDGET,
+                              max_attempts: int = config.AI_ENRICHMENT_BATCH_MAX_ATTEMPTS):
+    """
+    Batched counterpart of enrich_players_concurrently. Batches run concurrently; after each round only the
+    players that were missing or invalid are re-packed into new batches and retried, up to `max_attempts` rounds.
+    Yields (player_dict, enriched_data) tuples; enriched_data is None for players that never succeeded.
+    """
+    pending = list(players)
+    for attempt in range(1, max_attempts + 1):
+        if not pending:
+            return
+        batches = plan_enrichment_batches(pending, token_budget)
+        logger.info(f"Enrichment round {attempt}/{max_attempts}: {len(pending)} players in {len(batches)} batches.")
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ai-enrich") as executor:
+            futures = {executor.submit(get_batch_details_from_ai, batch, model, limiter): batch for batch in batches}
+            for future in as_completed(futures):
+                results = future.result()
+                for player in futures[future]:
+                    enriched_data = results.get(player['identifier'])
+                    if enriched_data:
+                        yield player, enriched_data
+                    else:
+                        failed.append(player)
+        pending = failed
+
+    for player in pending:
+        yield player, None
+
+
+# --- Applying results to the Players table ---
+
+def _parse_date_of_birth(value):
+    """'N/A' or malformed dates from the AI become NULL instead of failing the whole merge."""
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+
+def apply_enrichment_results(cursor, results: list[tuple[str, dict]]):
+    """
+    Stages (identifier, enriched_data) pairs into a temp table and merges them into Players with a single
+    UPDATE ... FROM, then runs the follow-up normalisation for just those identifiers.
+    """
+    if not results:
         return
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-    logger.info("Gemini API configured for enrichment.")
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_player_enrichment (
+            identifier TEXT PRIMARY KEY,
+            batting_hand TEXT,
+            bowling_hand TEXT,
+            bowling_style TEXT,
+            date_of_birth DATE,
+            country TEXT,
+            player_role TEXT,
+            full_name TEXT
+        ) ON COMMIT DELETE ROWS;
+    """)
+    cursor.execute("TRUNCATE tmp_player_enrichment;")
+
+    # Later answers for the same player win, same as the old one-UPDATE-per-player loop
+    rows_by_identifier = {}
+    for identifier, enriched_data in results:
+        row = {field: enriched_data.get(field) for field in ENRICHMENT_FIELDS}
+        row['date_of_birth'] = _parse_date_of_birth(row['date_of_birth'])
+        rows_by_identifier[identifier] = tuple([identifier] + [row[field] for field in ENRICHMENT_FIELDS])
+    extras.execute_values(cursor, f"""
+        INSERT INTO tmp_player_enrichment (identifier, {", ".join(ENRICHMENT_FIELDS)}) VALUES %s;
+    """, list(rows_by_identifier.values()))
+
+    cursor.execute("""
+        UPDATE Players p SET
+            batting_hand = COALESCE(s.batting_hand, p.batting_hand),
+            bowling_hand = COALESCE(s.bowling_hand, p.bowling_hand),
+            bowling_style = COALESCE(s.bowling_style, p.bowling_style),
+            date_of_birth = COALESCE(s.date_of_birth, p.date_of_birth),
+            country = COALESCE(s.country, p.country),
+            player_role = COALESCE(s.player_role, p.player_role),
+            full_name = COALESCE(s.full_name, p.full_name)
+        FROM tmp_player_enrichment s
+        WHERE p.identifier = s.identifier;
+    """)
+    logger.info(f"Merged AI enrichment results for {cursor.rowcount} players.")
+
+    normalise_enriched_players(cursor, list(rows_by_identifier))
+
+
+def normalise_enriched_players(cursor, identifiers: list[str]):
+    """Post-enrichment clean-up (bowling_style, first_last_name, N/A reset), scoped to the given identifiers."""
+    params = {'ids': identifiers}
+
+    # AI is not reliable sometimes, so fixing any discrepancies if present in the bowling_style
+    cursor.execute("""
+    UPDATE Players
+        SET bowling_style = CASE
+            WHEN bowling_style in ('RF', 'RAF') THEN 'RF/RAF'
+            WHEN bowling_style in ('RFM', 'RAFM') THEN 'RFM/RAFM'
+            WHEN bowling_style in ('RMF', 'RAMF') THEN 'RMF/RAMF'
+            WHEN bowling_style in ('RM', 'RAM') THEN 'RM/RAM'
+            WHEN bowling_style in ('RMS', 'RAMS') THEN 'RMS/RAMS'
+            WHEN bowling_style in ('RSM', 'RASM') THEN 'RSM/RASM'
+            WHEN bowling_style in ('RS', 'RAS') THEN 'RS/RAS'
+            WHEN bowling_style in ('LF', 'LAF') THEN 'LF/LAF'
+            WHEN bowling_style in ('LFM', 'LAFM') THEN 'LFM/LAFM'
+            WHEN bowling_style in ('LMF', 'LAMF') THEN 'LMF/LAMF'
+            WHEN bowling_style in ('LM', 'LAM') THEN 'LM/LAM'
+            WHEN bowling_style in ('LMS', 'LAMS') THEN 'LMS/LAMS'
+            WHEN bowling_style in ('LSM', 'LASM') THEN 'LSM/LASM'
+            WHEN bowling_style in ('LS', 'LAS') THEN 'LS/LAS'
+            ELSE bowling_style
+        END
+    WHERE identifier = ANY(%(ids)s);
+    """, params)
+
+    # Update first_lastname logic
+    cursor.execute("""
+    UPDATE Players
+        SET first_last_name = fn.formatted_name
+        FROM (
+        -- This subquery calculates the correct formatted name for the touched players only
+        WITH NameParts AS (
+            SELECT
+                identifier,
+                full_name,
+                string_to_array(full_name, ' ') AS words
+            FROM Players
+            WHERE identifier = ANY(%(ids)s)
+        )
+        SELECT
+            identifier,
+            CASE
+                WHEN array_length(words, 1) <= 2 THEN full_name -- If 2 words or less, use the original full name
+                WHEN lower(words[array_length(words, 1) - 1]) IN ('de', 'du', 'al', 'ul', 'van der')
+                    THEN words[1] || ' ' || words[array_length(words, 1) - 1] || ' ' || words[array_length(words, 1)]
+                    -- If the word before the last is 'de' or 'al' or 'ul', include it
+                ELSE words[1] || ' ' || words[array_length(words, 1)] -- Otherwise, just use the first and last words
+            END AS formatted_name
+        FROM NameParts
+    ) AS fn
+    WHERE Players.identifier = fn.identifier
+        AND Players.first_last_name IS DISTINCT FROM fn.formatted_name;
+    """, params)
+
+    # Mark any invalid/un-updated rows to be rechecked during next run
+    cursor.execute("""
+    UPDATE Players
+        SET
+            batting_hand = NULL,
+            bowling_hand = NULL,
+            player_role = NULL,
+            date_of_birth = NULL,
+            country = NULL,
+            bowling_style = NULL,
+            full_name = NULL
+    WHERE identifier = ANY(%(ids)s)
+        AND batting_hand = 'N/A' AND bowling_hand = 'N/A' AND player_role = 'N/A' AND country = 'N/A' AND bowling_style = 'N/A' AND full_name IS NULL;
+    """, params)
+
+
+def run_ai_enrichment(model=None, limit: int | None = None, batch_mode: bool | None = None):
+    """
+    Queues players missing data and drains the queue, using AI to enrich their records.
+    `limit` caps the players processed by this run (defaults to AI_ENRICHMENT_PLAYER_LIMIT, 0 = no cap).
+    A pre-built `model` (e.g. llm_client.StubGenerativeModel) can be passed in; otherwise the LLM_PROVIDER client is used.
+    With `batch_mode` several players are packed into each prompt (defaults to AI_ENRICHMENT_BATCH_MODE).
+    """
+    if model is None:
+        try:
+            model = llm_client.get_client('enrichment')
+        except RuntimeError as e:
+            logger.error(f"ERROR: {e}")
+            return
+        logger.info(f"LLM client configured for enrichment ({model.provider}/{model.model_name}).")
+
+    limit = limit if limit is not None else config.AI_ENRICHMENT_PLAYER_LIMIT
+    batch_mode = batch_mode if batch_mode is not None else config.AI_ENRICHMENT_BATCH_MODE
+    limiter = ai_utils.RateLimiter(config.AI_REQUESTS_PER_MINUTE, config.AI_TOKENS_PER_MINUTE)
 
     conn = None
     try:
         conn = db_utils.get_db_connection()
         cursor = conn.cursor(cursor_factory=extras.DictCursor)
 
-        # Find players from the DB who need enrichment
-        query = """
-            WITH RankedMatches AS (
-                -- First, join all the tables together and rank each player's matches by date
-                SELECT
-                    mp.player_identifier,
-                    m.match_date,
-                    m.season_year,
-                    m.match_number,
-                    v.venue_name,
-                    v.city,
-                    v.country,
-                    concat(t1.team_name, ' v/s ', t2.team_name) as match_description,
-                    ROW_NUMBER() OVER(PARTITION BY mp.player_identifier ORDER BY m.match_date DESC, m.match_id DESC) as rn
-                FROM MatchPlayers mp
-                JOIN Matches m ON mp.match_id = m.match_id
-                JOIN venues v on m.venue_id = v.venue_id
-                JOIN teams t1 on m.team1_id = t1.team_id
-                JOIN teams t2 on m.team2_id = t2.team_id
-                )
-                -- Now, select from your players table and join to the ranked matches
-            SELECT
-                p.identifier,
-                p.name,
-                p.unique_name,
-                rm.country, -- Added country from your original query's intent
-                rm.match_date as last_match_date,
-                rm.season_year as last_season_year,
-                rm.match_number as last_match_number,
-                rm.venue_name as last_venue_name,
-                rm.city as last_city,
-                rm.match_description as last_match_played
-            FROM
-                players p
-            JOIN RankedMatches rm ON p.identifier = rm.player_identifier
-            WHERE
-                -- This is the key: only select the #1 ranked match for each player
-                rm.rn = 1
-                -- This condition still finds players who are missing the data we want to enrich
-                AND (
-                    p.batting_hand IS NULL OR 
-                    p.bowling_hand IS NULL OR 
-                    p.player_role IS NULL OR 
-                    p.bowling_style IS NULL OR 
-                    p.date_of_birth IS NULL OR 
-                    p.country IS NULL OR
-                    p.full_name IS NULL
-                )
-            LIMIT 100;
-        """
-        cursor.execute(query)
-        players_to_enrich = cursor.fetchall()
-
-        total_players = len(players_to_enrich)
-        if total_players == 0:
-            logger.info("No players found requiring AI enrichment.")
-            return
+        # Queue every player who currently needs enrichment; the queue remembers attempts across runs
+        cursor.execute(ENRICHMENT_CANDIDATES_QUERY, {'ids': None})
+        newly_queued = enrichment_queue.enqueue_jobs(
+            cursor, enrichment_queue.PLAYER_JOB, [row['identifier'] for row in cursor.fetchall()])
+        conn.commit()
+        logger.info(f"Queued {newly_queued} new player enrichment jobs.")
+
+        # Drain the queue in claimed chunks. Other processes running this same loop claim different players.
+        # API calls run on worker threads; all DB writes stay on this thread and connection
+        locked_by = enrichment_queue.worker_id()
+        processed = 0
+        while not limit or processed < limit:
+            claim_size = min(config.AI_QUEUE_CLAIM_SIZE, limit - processed) if limit else config.AI_QUEUE_CLAIM_SIZE
+            claimed_ids = enrichment_queue.claim_jobs(conn, enrichment_queue.PLAYER_JOB, claim_size, locked_by)
+            if not claimed_ids:
+                break
 
-        logger.info(f"Found {total_players} players to enrich with AI...")
-
-        for i, player_row in enumerate(players_to_enrich):
-            player_dict = dict(player_row)
-            logger.info(
-                f"Processing player {i + 1}/{total_players}: {player_dict.get('name')} ({player_dict.get('identifier')})")
-
-            enriched_data = get_player_details_from_ai(player_dict)
-            #print(enriched_data)
-
-            if enriched_data:
-                # Update the player record in the database
-                update_query = """
-                    UPDATE Players SET
-                        batting_hand = COALESCE(%(batting_hand)s, batting_hand),
-                        bowling_hand = COALESCE(%(bowling_hand)s, bowling_hand),
-                        bowling_style = COALESCE(%(bowling_style)s, bowling_style),
-                        date_of_birth = COALESCE(%(date_of_birth)s, date_of_birth),
-                        country = COALESCE(%(country)s, country),
-                        player_role = COALESCE(%(player_role)s, player_role),
-                        full_name = COALESCE(%(full_name)s, full_name)
-                    WHERE identifier = %(id)s;
-                """
-                cursor.execute(update_query, {
-                    'batting_hand': enriched_data.get('batting_hand'),
-                    'bowling_hand': enriched_data.get('bowling_hand'),
-                    'bowling_style': enriched_data.get('bowling_style'),
-                    'date_of_birth': enriched_data.get('date_of_birth'),
-                    'country': enriched_data.get('country'),
-                    'player_role': enriched_data.get('player_role'),
-                    'full_name': enriched_data.get('full_name'),
-                    'id': player_dict['identifier'],
-                })
-                logger.info(f"Successfully updated player: {player_dict.get('name')}")
+            cursor.execute(ENRICHMENT_CANDIDATES_QUERY, {'ids': claimed_ids})
+            player_dicts = [dict(player_row) for player_row in cursor.fetchall()]
+            # Claimed players that are no longer candidates were filled in some other way
+            candidate_ids = {p['identifier'] for p in player_dicts}
+            enrichment_queue.complete_jobs(cursor, enrichment_queue.PLAYER_JOB,
+                                           [i for i in claimed_ids if i not in candidate_ids])
+
+            logger.info(f"Claimed {len(player_dicts)} players to enrich with AI "
+                        f"({config.AI_MAX_CONCURRENCY} workers, {config.AI_REQUESTS_PER_MINUTE} RPM)...")
+            if batch_mode:
+                completed = enrich_players_in_batches(player_dicts, model, limiter)
             else:
-                logger.warning(f"Failed to get or parse AI data for player: {player_dict.get('name')}")
-
-            # Must add a delay to respect API rate limits
-            time.sleep(5)  # 1 request every 2 seconds = 30 requests/minute
-
-        # AI is not reliable sometimes, so fixing any discrepancies if present in the bowling_style
-        cursor.execute("""
-        UPDATE Players
-            SET bowling_style = CASE
-                WHEN bowling_style in ('RF', 'RAF') THEN 'RF/RAF'
-                WHEN bowling_style in ('RFM', 'RAFM') THEN 'RFM/RAMF'
-                WHEN bowling_style in ('RMF', 'RAMF') THEN 'RMF/RAMF'
-                WHEN bowling_style in ('RM', 'RAM') THEN 'RM/RAM'
-                WHEN bowling_style in ('RMS', 'RAMS') THEN 'RMS/RAMS'
-                WHEN bowling_style in ('RSM', 'RASM') THEN 'RSM/RASM'
-                WHEN bowling_style in ('RS', 'RAS') THEN 'RS/RAS'
-                WHEN bowling_style in ('LF', 'LAF') THEN 'LF/LAF'
-                WHEN bowling_style in ('LFM', 'LAFM') THEN 'LFM/LAMF'
-                WHEN bowling_style in ('LMF', 'LAMF') THEN 'LMF/LAMF'
-                WHEN bowling_style in ('LM', 'LAM') THEN 'LM/LAM'
-                WHEN bowling_style in ('LMS', 'LAMS') THEN 'LMS/LAMS'
-                WHEN bowling_style in ('LSM', 'LASM') THEN 'LSM/LASM'
-                WHEN bowling_style in ('LS', 'LAS') THEN 'LS/LAS'
-                ELSE bowling_style
-            END
-        """)
-
-        # Update first_lastname logic
-        cursor.execute("""
-        UPDATE Players
-            SET first_last_name = fn.formatted_name
-            FROM (
-            -- This subquery calculates the correct formatted name for every player
-            WITH NameParts AS (
-                SELECT
-                    identifier,
-                    full_name,
-                    string_to_array(full_name, ' ') AS words
-                FROM Players
-            )
-            SELECT
-                identifier,
-                CASE
-                    WHEN array_length(words, 1) <= 2 THEN full_name -- If 2 words or less, use the original full name
-                    WHEN lower(words[array_length(words, 1) - 1]) IN ('de', 'du', 'al', 'ul', 'van der')
-                        THEN words[1] || ' ' || words[array_length(words, 1) - 1] || ' ' || words[array_length(words, 1)]
-                        -- If the word before the last is 'de' or 'al' or 'ul', include it
-                    ELSE words[1] || ' ' || words[array_length(words, 1)] -- Otherwise, just use the first and last words
-                END AS formatted_name
-            FROM NameParts
-        ) AS fn
-        WHERE Players.identifier = fn.identifier;
-        """)
-
-        # Mark any invalid/un-updated rows to be rechecked during next run
-        cursor.execute("""
-        UPDATE Players
-            SET
-                batting_hand = NULL,
-                bowling_hand = NULL,
-                player_role = NULL,
-                date_of_birth = NULL,
-                country = NULL,
-                bowling_style = NULL,
-                full_name = NULL
-        WHERE batting_hand = 'N/A' AND bowling_hand = 'N/A' AND player_role = 'N/A' AND country = 'N/A' AND bowling_style = 'N/A' AND full_name IS NULL;
-        """)
+                completed = enrich_players_concurrently(player_dicts, model, limiter)
+
+            results, failed_ids = [], []
+            for player_dict, enriched_data in completed:
+                processed += 1
+                logger.info(
+                    f"Processed player {processed}: {player_dict.get('name')} ({player_dict.get('identifier')})")
+                if enriched_data:
+                    results.append((player_dict['identifier'], enriched_data))
+                else:
+                    failed_ids.append(player_dict['identifier'])
+                    logger.warning(f"Failed to get or parse AI data for player: {player_dict.get('name')}")
+
+            apply_enrichment_results(cursor, results)
+            enrichment_queue.complete_jobs(cursor, enrichment_queue.PLAYER_JOB, [r[0] for r in results])
+            enrichment_queue.fail_jobs(cursor, enrichment_queue.PLAYER_JOB, failed_ids,
+                                       "AI returned no valid data for the player (see ETL logs).")
+            conn.commit()
+
+        if processed == 0:
+            logger.info("No players found requiring AI enrichment.")
+        enrichment_queue.log_queue_summary(cursor, enrichment_queue.PLAYER_JOB)
         conn.commit()
         logger.info("AI enrichment process finished successfully.")
 
+        cache = llm_cache.get_response_cache()
+        if cache:
+            cache.log_stats()
+        llm_client.usage_stats.log_summary()
+
     except (Exception, psycopg2.Error) as error:
         logger.error("A critical error occurred during the AI enrichment process.", exc_info=True)
         if conn:
@@ -269,4 +544,6 @@ def run_ai_enrichment():
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    run_ai_enrichment()
\ No newline at end of file
+    # Players is visible to the SQL agent, so this bumps the load generation its caches use
+    with etl_runs.recorded_run('player enrichment'):
+        run_ai_enrichment()
@@ -0,0 +1,110 @@
+# src/etl/etl_runs.py
+"""
+Load generations. Every run of the ETL pipeline, or of a standalone step that rewrites agent-visible tables,
+gets a row in etl_runs. When it finishes (completed or aborted part-way) it takes the next number from
+etl_runs_generation_seq, and the highest of those is the current generation. Numbering runs as they finish
+rather than as they start means a long run still moves the generation on even if a shorter one that started
+after it has already finished. Anything cached from query results is tagged with the generation it was
+computed under and is stale once the generation moves on.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from src import config
+from src import db_utils
+
+logger = logging.getLogger(__name__)
+
+CURRENT_GENERATION_QUERY = "SELECT COALESCE(MAX(generation), 0) FROM etl_runs;"
+
+
+def start_run() -> int:
+    conn = None
+    try:
+        conn = db_utils.get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO etl_runs (status) VALUES ('running') RETURNING run_id;")
+            run_id = cursor.fetchone()[0]
+        conn.commit()
+        return run_id
+    finally:
+        if conn:
+            conn.close()
+
+
+def finish_run(run_id: int, status: str) -> int:
+    """Marks the run finished and gives it the next generation, which becomes the current one. Returns it."""
+    conn = None
+    try:
+        conn = db_utils.get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE etl_runs SET status = %s, finished_at = now(), generation = nextval('etl_runs_generation_seq')
+                WHERE run_id = %s RETURNING generation;
+            """, (status, run_id))
+            generation = cursor.fetchone()[0]
+        conn.commit()
+        return generation
+    finally:
+        if conn:
+            conn.close()
+
+
+@contextmanager
+def recorded_run(step_name: str):
+    """
+    Records the wrapped step as an ETL run, for steps that rewrite agent-visible tables outside the full pipeline.
+    The run is marked 'aborted' if the step raises. Failing to record it is logged and does not stop the step.
+    """
+    run_id = None
+    try:
+        run_id = start_run()
+        logger.info(f"Recorded ETL run {run_id} for {step_name}.")
+    except Exception as e:
+        logger.error(f"Could not record the ETL run for {step_name} in etl_runs: {e}", exc_info=True)
+
+    status = 'aborted'
+    try:
+        yield
+        status = 'completed'
+    finally:
+        if run_id is not None:
+            try:
+                generation = finish_run(run_id, status)
+                logger.info(f"ETL run {run_id} finished; load generation is now {generation}.")
+            except Exception as e:
+                logger.error(f"Could not mark ETL run {run_id} as finished: {e}", exc_info=True)
+
+
+def current_generation() -> int:
+    with db_utils.pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(CURRENT_GENERATION_QUERY)
+            return cursor.fetchone()[0]
+
+
+_generation: Optional[int] = None
+_generation_checked_at = 0.0
+_generation_lock = threading.Lock()
+
+
+def cached_generation(check_interval_seconds: int = config.ETL_GENERATION_CHECK_SECONDS) -> Optional[int]:
+    """
+    The current generation, re-read from the database at most every `check_interval_seconds`.
+    Returns None if it cannot be read, in which case callers should not serve anything from cache.
+    """
+    global _generation, _generation_checked_at
+    with _generation_lock:
+        if _generation is None or time.monotonic() - _generation_checked_at >= check_interval_seconds:
+            try:
+                generation = current_generation()
+            except Exception as e:
+                logger.warning(f"Could not read the ETL load generation: {e}")
+                return None
+            if _generation is not None and generation != _generation:
+                logger.info(f"ETL load generation moved from {_generation} to {generation}.")
+            _generation, _generation_checked_at = generation, time.monotonic()
+        return _generation
@@ -7,6 +7,7 @@ from src.etl import etl_01_people_master
 from src.etl import etl_02_dimensions_from_json
 from src.etl import etl_03_matches_and_related
 from src.etl import etl_04_innings_deliveries_etc
+from src.etl import etl_runs
 from src import db_utils
 from src import config
 
@@ -42,6 +43,29 @@ def run_full_etl_pipeline():
     logger = logging.getLogger(__name__)
     logger.info("Starting Full ETL Pipeline...")
 
+    # Every run is recorded in etl_runs; finishing it bumps the load generation the SQL agent caches are tagged with
+    run_id = None
+    completed = False
+    try:
+        run_id = etl_runs.start_run()
+        logger.info(f"Recorded ETL run {run_id}.")
+    except Exception as e:
+        logger.error(f"Could not record the ETL run in etl_runs: {e}", exc_info=True)
+
+    try:
+        completed = run_etl_steps(logger)
+    finally:
+        if run_id is not None:
+            try:
+                generation = etl_runs.finish_run(run_id, 'completed' if completed else 'aborted')
+                logger.info(f"ETL run {run_id} finished; load generation is now {generation}.")
+            except Exception as e:
+                logger.error(f"Could not mark ETL run {run_id} as finished: {e}", exc_info=True)
+
+
+def run_etl_steps(logger) -> bool:
+    """Runs every pipeline step. Returns False if a critical step failed and the pipeline was aborted."""
+
     # Step 0: Load raw JSON data into stg_match_data table
     logger.info("\n--- Step 0: Staging Raw JSON Data ---")
     try:
@@ -68,12 +92,12 @@ def run_full_etl_pipeline():
         team_id_cache, venue_id_cache = etl_02_dimensions_from_json.populate_teams_and_venues()
         if not team_id_cache or not venue_id_cache:  # Check if caches were populated
             logger.critical("Critical Error: Team or Venue caches not populated by Step 2. Aborting further ETL steps.")
-            return
+            return False
         logger.info("Step 2 completed successfully.")
     except Exception as e:
         logger.error(f"Error in Step 2 (Populating Teams/Venues): {e}", exc_info=True)
         logger.critical("Aborting pipeline due to critical error in Step 2.")
-        return
+        return False
 
     # Step 2.5: Populate a comprehensive player name -> identifier cache
     logger.info("\n--- Step 2.5: Populating Player Name to Identifier Cache ---")
@@ -100,7 +124,7 @@ def run_full_etl_pipeline():
     except Exception as e:
         logger.error(f"Error populating player name cache: {e}", exc_info=True)
         logger.critical("Aborting pipeline due to critical error in Player Cache population.")
-        return
+        return False
     finally:
         if conn_cache:
             conn_cache.close()
@@ -126,6 +150,7 @@ def run_full_etl_pipeline():
         # return
 
     logger.info("\nFull ETL Pipeline Completed Successfully!")
+    return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+# llm_cache.py
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+
+def model_name_of(model) -> str:
+    """Best-effort model name for cache keys (genai models expose `model_name`, e.g. 'models/gemini-2.5-flash')."""
+    return getattr(model, 'model_name', None) or type(model).__name__
+
+
+def _config_to_dict(generation_config) -> dict:
+    if generation_config is None:
+        return {}
+    if isinstance(generation_config, dict):
+        return generation_config
+    # genai.types.GenerationConfig is a dataclass; keep only the fields that were set
+    try:
+        return {k: v for k, v in vars(generation_config).items() if v is not None and not k.startswith('_')}
+    except TypeError:
+        return {'repr': repr(generation_config)}
+
+
+class LLMResponseCache:
+    """
+    Persistent, content-addressed cache of LLM response texts stored in a local SQLite file.
+    Entries are keyed by sha256(model name + prompt + generation config), compressed with zlib,
+    expire after `ttl_seconds` and are evicted least-recently-used once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, path: str = config.LLM_CACHE_PATH, ttl_seconds: int = config.LLM_CACHE_TTL_SECONDS,
+                 max_bytes: int = config.LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model_name TEXT,
+                response BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_lru ON llm_responses (last_accessed_at)")
+        self._conn.commit()
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config=None) -> str:
+        key_material = json.dumps({
+            'model': model_name,
+            'prompt_sha256': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'generation_config': _config_to_dict(generation_config),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+    def get(self, model_name: str, prompt: str, generation_config=None) -> Optional[str]:
+        """Returns the cached response text, or None on a miss / expired entry."""
+        cache_key = self.make_key(model_name, prompt, generation_config)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_responses SET last_accessed_at = ? WHERE cache_key = ?", (now, cache_key))
+            self._conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, model_name: str, prompt: str, response_text: str, generation_config=None):
+        """Stores a response. Only call this for responses that parsed and validated successfully."""
+        cache_key = self.make_key(model_name, prompt, generation_config)
+        compressed = zlib.compress(response_text.encode('utf-8'), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO llm_responses (cache_key, model_name, response, size_bytes, created_at, last_accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    response = excluded.response, size_bytes = excluded.size_bytes,
+                    created_at = excluded.created_at, last_accessed_at = excluded.last_accessed_at
+            """, (cache_key, model_name, compressed, len(compressed), now, now))
+            self._evict_if_needed()
+            self._conn.commit()
+
+    def _evict_if_needed(self):
+        """Drops least-recently-used entries until the store is back under 90% of max_bytes."""
+        if not self.max_bytes:
+            return
+        total_bytes = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        target_bytes = int(self.max_bytes * 0.9)
+        evicted = 0
+        for cache_key, size_bytes in self._conn.execute(
+                "SELECT cache_key, size_bytes FROM llm_responses ORDER BY last_accessed_at ASC").fetchall():
+            if total_bytes <= target_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+            total_bytes -= size_bytes
+            evicted += 1
+        logger.info(f"LLM response cache over {self.max_bytes} bytes, evicted {evicted} entries.")
+
+    def purge_expired(self):
+        if not self.ttl_seconds:
+            return
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?",
+                                         (time.time() - self.ttl_seconds,)).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired entries from the LLM response cache.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': total_bytes,
+        }
+
+    def log_stats(self, label: str = "LLM response cache"):
+        s = self.stats()
+        logger.info(f"{label}: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%} hit rate), "
+                    f"{s['entries']} entries, {s['size_bytes'] / 1024 / 1024:.1f} MB on disk.")
+
+
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Returns the process-wide response cache, or None if caching is disabled in config."""
+    global _cache_instance
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            _cache_instance = LLMResponseCache()
+        return _cache_instance
@@ -0,0 +1,444 @@
+# llm_client.py
+"""
+Shared LLM client layer. Every AI-dependent path asks this module for a client by *role*
+('enrichment', 'timings', 'sql', 'summary') instead of constructing a provider model directly.
+
+    LLM_PROVIDER=gemini  -> google.generativeai models (or ChatGoogleGenerativeAI for LangChain chains)
+    LLM_PROVIDER=stub    -> deterministic local backend: replays recorded responses, otherwise
+                            synthesises schema-valid answers, so everything runs with no network.
+
+All clients record requests, errors, latency and token counts per (provider, role, model), and write
+one record per call to the structured AI call log (src/ai_call_log.py).
+"""
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional
+
+from src import config
+from src import ai_call_log
+from src.ai_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('enrichment', 'timings', 'sql', 'summary')
+
+
+def model_for_role(role: str) -> str:
+    models = {
+        'enrichment': config.LLM_MODEL_ENRICHMENT,
+        'timings': config.LLM_MODEL_TIMINGS,
+        'sql': config.LLM_MODEL_SQL,
+        'summary': config.LLM_MODEL_SUMMARY,
+    }
+    if role not in models:
+        raise ValueError(f"Unknown LLM role '{role}'. Expected one of {ROLES}.")
+    return models[role]
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+# --- Request / latency / token accounting ---
+
+class LLMUsageStats:
+    """Thread-safe counters of LLM calls, keyed by (provider, role, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple, dict] = {}
+
+    def record(self, provider: str, role: str, model: str, latency_seconds: float,
+               prompt_tokens: int, completion_tokens: int, error: bool = False):
+        with self._lock:
+            s = self._stats.setdefault((provider, role, model), {
+                'requests': 0, 'errors': 0, 'latency_seconds': 0.0, 'max_latency_seconds': 0.0,
+                'prompt_tokens': 0, 'completion_tokens': 0,
+            })
+            s['requests'] += 1
+            s['errors'] += int(error)
+            s['latency_seconds'] += latency_seconds
+            s['max_latency_seconds'] = max(s['max_latency_seconds'], latency_seconds)
+            s['prompt_tokens'] += prompt_tokens
+            s['completion_tokens'] += completion_tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: dict(s) for key, s in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def log_summary(self):
+        for (provider, role, model), s in sorted(self.snapshot().items()):
+            mean_latency = s['latency_seconds'] / s['requests'] if s['requests'] else 0.0
+            logger.info(f"LLM usage [{provider}/{role}/{model}]: {s['requests']} requests ({s['errors']} errors), "
+                        f"mean latency {mean_latency:.2f}s (max {s['max_latency_seconds']:.2f}s), "
+                        f"{s['prompt_tokens']} prompt / {s['completion_tokens']} completion tokens.")
+
+
+usage_stats = LLMUsageStats()
+
+
+def _usage_tokens(response, prompt: str, text: str) -> tuple[int, int]:
+    """Token counts from the provider's usage metadata when present, otherwise the ~4 chars/token estimate."""
+    usage = getattr(response, 'usage_metadata', None)
+    if isinstance(usage, dict):  # LangChain AIMessage
+        prompt_tokens, completion_tokens = usage.get('input_tokens'), usage.get('output_tokens')
+    else:  # google.generativeai response
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        completion_tokens = getattr(usage, 'candidates_token_count', None)
+    return prompt_tokens or estimate_tokens(prompt), completion_tokens or estimate_tokens(text)
+
+
+# Called with (prompt_tokens, completion_tokens) after every call, e.g. to attribute tokens to a traced request
+_token_callbacks: list[Callable[[int, int], None]] = []
+
+
+def add_token_callback(callback: Callable[[int, int], None]):
+    if callback not in _token_callbacks:
+        _token_callbacks.append(callback)
+
+
+def _record_call(provider: str, role: str, model: str, prompt: str, start: float, *, response=None,
+                 text: Optional[str] = None, error: Optional[Exception] = None, streamed: bool = False,
+                 record_text: bool = False):
+    """Accounts for one finished call: usage counters, the structured AI call log and optional recording."""
+    latency = time.perf_counter() - start
+    if error is not None:
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(text or "")
+    else:
+        prompt_tokens, completion_tokens = _usage_tokens(response, prompt, text)
+    usage_stats.record(provider, role, model, latency, prompt_tokens, completion_tokens, error=error is not None)
+    for callback in _token_callbacks:
+        try:
+            callback(prompt_tokens, completion_tokens)
+        except Exception as e:
+            logger.warning(f"Token callback {callback!r} failed: {e}")
+    ai_call_log.log_call(
+        provider=provider, role=role, model=model, prompt_sha256=prompt_hash(prompt), latency_seconds=latency,
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+        outcome='error' if error is not None else 'ok',
+        error=f"{type(error).__name__}: {error}" if error is not None else None,
+        streamed=streamed, prompt=prompt, response=text
+    )
+    if record_text and error is None:
+        record_response(role, model, prompt, text)
+
+
+# --- Recorded responses ---
+
+_recordings_lock = threading.Lock()
+
+
+def record_response(role: str, model: str, prompt: str, response_text: str,
+                    path: str = config.LLM_RECORDINGS_PATH):
+    """Appends a live response to the JSONL recordings file that the stub backend replays."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _recordings_lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'prompt_sha256': prompt_hash(prompt), 'role': role, 'model': model,
+                            'response': response_text}) + "\n")
+
+
+def load_recordings(path: str = config.LLM_RECORDINGS_PATH) -> dict[str, str]:
+    """Returns {prompt_sha256: response_text} from a recordings file; the last recording of a prompt wins."""
+    recordings = {}
+    if not path or not os.path.exists(path):
+        return recordings
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recordings[entry['prompt_sha256']] = entry['response']
+    return recordings
+
+
+# --- Local stub backend ---
+
+class StubQuotaError(Exception):
+    """Raised by StubGenerativeModel to simulate a 429 response."""
+    code = 429
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+STUB_STREAM_CHUNK_CHARS = 256
+
+
+class StubGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel that simulates network latency and 429 quota errors.
+    `response_fn` receives the prompt and returns the response text; with stream=True it comes back in chunks.
+    """
+
+    def __init__(self, response_fn: Callable[[str], str], latency_seconds: float = 0.5,
+                 latency_jitter: float = 0.2, quota_error_rate: float = 0.0, seed: Optional[int] = None,
+                 model_name: str = "stub"):
+        self.response_fn = response_fn
+        self.model_name = model_name
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.quota_error_rate = quota_error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.quota_errors = 0
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            latency = max(0.0, self._random.uniform(self.latency_seconds - self.latency_jitter,
+                                                    self.latency_seconds + self.latency_jitter))
+            fail = self._random.random() < self.quota_error_rate
+            if fail:
+                self.quota_errors += 1
+        time.sleep(latency)
+        if fail:
+            raise StubQuotaError("429 Resource has been exhausted (e.g. check quota).")
+        text = self.response_fn(prompt)
+        if stream:
+            return [StubResponse(text[i:i + STUB_STREAM_CHUNK_CHARS])
+                    for i in range(0, len(text), STUB_STREAM_CHUNK_CHARS)]
+        return StubResponse(text)
+
+
+_STUB_PLAYER_ANSWER = {
+    "batting_hand": "Right-hand bat",
+    "bowling_hand": "Right-arm",
+    "bowling_style": "OB",
+    "date_of_birth": "1990-01-01",
+    "country": "India",
+    "player_role": "All-rounder",
+    "full_name": "Stub Player",
+}
+
+
+def stub_player_response(prompt: str) -> str:
+    """Returns a schema-valid player enrichment JSON response."""
+    return "```json\n" + json.dumps(_STUB_PLAYER_ANSWER) + "\n```"
+
+
+def stub_player_batch_response(prompt: str) -> str:
+    """Returns a schema-valid JSON array answering every "identifier" found in a batched enrichment prompt."""
+    identifiers = re.findall(r'"identifier":\s*"([^"]+)"', prompt)
+    return "```json\n" + json.dumps([{"identifier": i, **_STUB_PLAYER_ANSWER} for i in identifiers]) + "\n```"
+
+
+def stub_enrichment_response(prompt: str) -> str:
+    if re.search(r'"identifier":\s*"', prompt):
+        return stub_player_batch_response(prompt)
+    return stub_player_response(prompt)
+
+
+def _stub_innings(inning_id, start_hour: int) -> dict:
+    return {
+        "inning_id": inning_id,
+        "total_duration_minutes": 95,
+        "playing_duration_minutes": 90,
+        "actual_starttime_utc": f"{start_hour:02d}:00:00",
+        "actual_endtime_utc": f"{start_hour + 1:02d}:35:00",
+        "scheduled_starttime_utc": f"{start_hour:02d}:00:00",
+        "delays": [],
+    }
+
+
+def stub_timings_response(prompt: str) -> str:
+    """Returns a schema-valid timings JSON array for every match in the prompt's "Match Details JSON Array"."""
+    start = prompt.find('[')
+    matches = []
+    try:
+        matches, _ = json.JSONDecoder().raw_decode(prompt[start:])
+    except ValueError:
+        pass
+    answer = [{
+        "match_id": m.get('match_id'),
+        "season_year": m.get('season_year'),
+        "match_date_played": m.get('match_date_played'),
+        "venue_name": m.get('venue_name'),
+        "team1": m.get('team1'),
+        "team2": m.get('team2'),
+        "innings_1": _stub_innings(m.get('inning_1_id'), 14),
+        "innings_2": _stub_innings(m.get('inning_2_id'), 16),
+    } for m in matches if isinstance(m, dict)]
+    return "```json\n" + json.dumps(answer) + "\n```"
+
+
+def stub_sql_response(prompt: str) -> str:
+    return "```sql\nSELECT season_year, COUNT(*) AS matches_played FROM matches GROUP BY season_year ORDER BY season_year LIMIT 10;\n```"
+
+
+def stub_summary_response(prompt: str) -> str:
+    return "This is a stub summary of the query results."
+
+
+STUB_SYNTHESISERS: dict[str, Callable[[str], str]] = {
+    'enrichment': stub_enrichment_response,
+    'timings': stub_timings_response,
+    'sql': stub_sql_response,
+    'summary': stub_summary_response,
+}
+
+
+def stub_responder(role: str, recordings: Optional[dict[str, str]] = None) -> Callable[[str], str]:
+    """Replays a recorded response for the exact prompt if there is one, otherwise synthesises one for `role`."""
+    synthesise = STUB_SYNTHESISERS[role]
+    recordings = recordings or {}
+
+    def respond(prompt: str) -> str:
+        return recordings.get(prompt_hash(prompt)) or synthesise(prompt)
+    return respond
+
+
+# --- Provider-neutral client ---
+
+class LLMClient:
+    """
+    Wraps a provider model exposing generate_content(prompt, ...) and accounts for every call.
+    Duck-type compatible with genai.GenerativeModel, so ai_utils.generate_text and the response cache accept it.
+    """
+
+    def __init__(self, model, role: str, provider: str, record_responses: bool = False):
+        self.model = model
+        self.role = role
+        self.provider = provider
+        self.record_responses = record_responses
+        # genai reports 'models/gemini-2.5-flash'; keeping that name keeps existing cache keys valid
+        self.model_name = getattr(model, 'model_name', None) or model_for_role(role)
+
+    def generate_content(self, prompt: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            _record_call(self.provider, self.role, self.model_name, prompt, start, error=e,
+                         streamed=bool(kwargs.get('stream')))
+            raise
+        if kwargs.get('stream'):
+            return self._accounted_stream(response, prompt, start)
+        _record_call(self.provider, self.role, self.model_name, prompt, start, response=response,
+                     text=response.text, record_text=self.record_responses)
+        return response
+
+    def _accounted_stream(self, response, prompt: str, start: float):
+        """Passes streamed chunks through and records the call once the stream is exhausted."""
+        texts, last_chunk = [], None
+        try:
+            for chunk in response:
+                last_chunk = chunk
+                try:
+                    texts.append(chunk.text)
+                except ValueError:
+                    pass
+                yield chunk
+        except Exception as e:
+            _record_call(self.provider, self.role, self.model_name, prompt, start, text="".join(texts), error=e,
+                         streamed=True)
+            raise
+        _record_call(self.provider, self.role, self.model_name, prompt, start, response=last_chunk,
+                     text="".join(texts), streamed=True, record_text=self.record_responses)
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self.generate_content(prompt, **kwargs).text
+
+
+_configure_lock = threading.Lock()
+_gemini_configured = False
+
+
+def _configure_gemini():
+    global _gemini_configured
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+    with _configure_lock:
+        if not _gemini_configured:
+            load_dotenv()
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise RuntimeError("GOOGLE_API_KEY not found. Please set it in your .env file.")
+            genai.configure(api_key=api_key)
+            _gemini_configured = True
+            logger.info("Gemini API configured successfully.")
+    return genai
+
+
+def _stub_model(role: str, model_name: str) -> StubGenerativeModel:
+    return StubGenerativeModel(
+        stub_responder(role, load_recordings()),
+        latency_seconds=config.LLM_STUB_LATENCY_SECONDS,
+        latency_jitter=config.LLM_STUB_LATENCY_SECONDS / 2,
+        quota_error_rate=config.LLM_STUB_QUOTA_ERROR_RATE,
+        seed=config.LLM_STUB_SEED,
+        model_name=f"stub/{model_name}"
+    )
+
+
+def get_client(role: str, provider: Optional[str] = None) -> LLMClient:
+    """
+    Returns an LLMClient for `role` on the configured provider (LLM_PROVIDER unless given).
+    Raises RuntimeError when the provider cannot be configured (e.g. no API key).
+    """
+    provider = (provider or config.LLM_PROVIDER).lower()
+    model_name = model_for_role(role)
+    if provider == 'stub':
+        return LLMClient(_stub_model(role, model_name), role, provider)
+    if provider == 'gemini':
+        genai = _configure_gemini()
+        return LLMClient(genai.GenerativeModel(model_name), role, provider,
+                         record_responses=config.LLM_RECORD_RESPONSES)
+    raise RuntimeError(f"Unsupported LLM_PROVIDER '{provider}'. Expected 'gemini' or 'stub'.")
+
+
+def get_chat_model(role: str, provider: Optional[str] = None):
+    """
+    Returns a LangChain Runnable mapping a prompt to the response text, with the same accounting as get_client.
+    On Gemini it wraps ChatGoogleGenerativeAI (temperature 0); on the stub it wraps the stub backend.
+    Supports .bind(stop=[...]) as used by create_sql_query_chain.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    provider = (provider or config.LLM_PROVIDER).lower()
+    if provider != 'gemini':
+        client = get_client(role, provider)
+
+        def invoke_stub(prompt_value, **kwargs) -> str:
+            return client.generate_text(_prompt_to_text(prompt_value))
+        return RunnableLambda(invoke_stub)
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    _configure_gemini()
+    model_name = model_for_role(role)
+    chat_model = ChatGoogleGenerativeAI(model=model_name, temperature=0)
+
+    def invoke_gemini(prompt_value, stop: Optional[list[str]] = None, **kwargs) -> str:
+        prompt = _prompt_to_text(prompt_value)
+        start = time.perf_counter()
+        try:
+            message = chat_model.invoke(prompt_value, stop=stop)
+        except Exception as e:
+            _record_call(provider, role, model_name, prompt, start, error=e)
+            raise
+        text = message.content if isinstance(message.content, str) else str(message.content)
+        _record_call(provider, role, model_name, prompt, start, response=message, text=text,
+                     record_text=config.LLM_RECORD_RESPONSES)
+        return text
+    return RunnableLambda(invoke_gemini)
+
+
+def _prompt_to_text(prompt_value) -> str:
+    if isinstance(prompt_value, str):
+        return prompt_value
+    if hasattr(prompt_value, 'to_string'):
+        return prompt_value.to_string()
+    return str(prompt_value)
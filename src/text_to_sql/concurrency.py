@@ -0,0 +1,70 @@
+# src/text_to_sql/concurrency.py
+"""
+Process-wide concurrency limits for the SQL agent, kept separate for LLM calls and database queries so a
+burst of questions cannot exhaust the model quota and the connection pool at the same time. Callers
+wrap each call in `with llm_slot():` / `with db_slot():`; time spent waiting for a slot is recorded.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimit:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self):
+        start = time.perf_counter()
+        if not self._semaphore.acquire(blocking=False):
+            self._semaphore.acquire()
+            with self._lock:
+                self.waited += 1
+                self.wait_seconds += time.perf_counter() - start
+        with self._lock:
+            self.active += 1
+            self.acquired += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'wait_seconds': self.wait_seconds,
+            }
+
+
+llm_limit = ConcurrencyLimit('llm', config.SQL_AGENT_MAX_LLM_CALLS)
+db_limit = ConcurrencyLimit('db', config.SQL_AGENT_MAX_DB_QUERIES)
+
+
+def llm_slot():
+    return llm_limit.slot()
+
+
+def db_slot():
+    return db_limit.slot()
+
+
+def stats() -> dict[str, dict]:
+    return {'llm': llm_limit.stats(), 'db': db_limit.stats()}
@@ -0,0 +1,133 @@
+# src/text_to_sql/dimension_index.py
+"""
+In-memory lookup of players, teams, venues and seasons by the names users type, for the template fast path.
+
+Every name variant (first_last_name, full_name, name and unique_name for players; the full name, common
+abbreviations like CSK and RCB for teams; the name with and without the city or a trailing 'Stadium' for
+venues) is mapped to its id; a venue name maps to every venue_id recorded under it. A variant shared by
+two different entities is dropped, so a lookup that succeeds is unambiguous. The index is loaded with four small queries and rebuilt when the ETL load
+generation changes.
+"""
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Optional
+
+from src import db_utils
+from src.etl import etl_runs
+from src.text_to_sql.question_cache import normalise_question
+
+logger = logging.getLogger(__name__)
+
+PLAYER, TEAM, VENUE, SEASON = 'player', 'team', 'venue', 'season'
+
+# Abbreviations fans use; applied only to team names present in the database
+TEAM_ABBREVIATIONS = {
+    'csk': 'Chennai Super Kings', 'mi': 'Mumbai Indians', 'rcb': 'Royal Challengers Bangalore',
+    'rcb bengaluru': 'Royal Challengers Bengaluru', 'kkr': 'Kolkata Knight Riders', 'srh': 'Sunrisers Hyderabad',
+    'rr': 'Rajasthan Royals', 'dc': 'Delhi Capitals', 'dd': 'Delhi Daredevils', 'pbks': 'Punjab Kings',
+    'kxip': 'Kings XI Punjab', 'lsg': 'Lucknow Super Giants', 'gt': 'Gujarat Titans',
+}
+_VENUE_SUFFIX = re.compile(r'\s+(?:international\s+)?(?:cricket\s+)?stadium$')
+# Longest name (in words) the matcher will try
+MAX_NAME_WORDS = 6
+
+
+class DimensionIndex:
+    """alias -> (kind, id, display name), built from the dimension rows. Venue ids are tuples of venue_ids."""
+
+    def __init__(self, players: list[tuple], teams: list[tuple], venues: list[tuple], seasons: list[int]):
+        candidates: dict[str, set[tuple]] = defaultdict(set)
+        for identifier, *names in players:
+            display = names[0] or next((n for n in names if n), identifier)
+            for name in names:
+                if name:
+                    candidates[normalise_question(name)].add((PLAYER, identifier, display))
+        team_ids = {}
+        for team_id, team_name in teams:
+            team_ids[team_name.lower()] = (team_id, team_name)
+            candidates[normalise_question(team_name)].add((TEAM, team_id, team_name))
+        for abbreviation, team_name in TEAM_ABBREVIATIONS.items():
+            if team_name.lower() in team_ids:
+                team_id, display = team_ids[team_name.lower()]
+                candidates[abbreviation].add((TEAM, team_id, display))
+        # The same ground often appears under several names ('Wankhede Stadium', 'Wankhede Stadium, Mumbai'),
+        # so a venue alias resolves to every venue_id it names
+        venue_ids: dict[str, set[int]] = defaultdict(set)
+        venue_names: dict[str, str] = {}
+        for venue_id, venue_name, city in venues:
+            short = normalise_question(venue_name.split(',')[0])
+            for alias in {normalise_question(venue_name), short, _VENUE_SUFFIX.sub('', short)}:
+                venue_ids[alias].add(venue_id)
+                venue_names.setdefault(alias, venue_name.split(',')[0])
+        for alias, ids in venue_ids.items():
+            candidates[alias].add((VENUE, tuple(sorted(ids)), venue_names[alias]))
+
+        self.aliases = {alias: next(iter(entities)) for alias, entities in candidates.items()
+                        if alias and len(entities) == 1}
+        self.ambiguous = {alias for alias, entities in candidates.items() if len(entities) > 1}
+        # Every word of every name, ambiguous or not, e.g. for callers that must never treat one as a typo
+        self.alias_words = frozenset(word for alias in candidates for word in alias.split())
+        self.seasons = set(seasons)
+
+    def find_entities(self, normalised_question: str) -> list[tuple[int, int, tuple]]:
+        """
+        Non-overlapping (start_word, end_word, (kind, id, display)) matches, longest names first. Four-digit
+        years of known seasons are matched as seasons.
+        """
+        words = normalised_question.split()
+        taken = [False] * len(words)
+        found = []
+        for length in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - length + 1):
+                if any(taken[start:start + length]):
+                    continue
+                alias = " ".join(words[start:start + length])
+                entity = self.aliases.get(alias)
+                if entity is None and length == 1 and alias.isdigit() and int(alias) in self.seasons:
+                    entity = (SEASON, int(alias), alias)
+                if entity is not None:
+                    found.append((start, start + length, entity))
+                    taken[start:start + length] = [True] * length
+        return sorted(found)
+
+
+def load_dimension_index() -> DimensionIndex:
+    with db_utils.pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT identifier, first_last_name, full_name, name, unique_name FROM players;")
+            players = cursor.fetchall()
+            cursor.execute("SELECT team_id, team_name FROM teams;")
+            teams = cursor.fetchall()
+            cursor.execute("SELECT venue_id, venue_name, city FROM venues;")
+            venues = cursor.fetchall()
+            cursor.execute("SELECT DISTINCT season_year FROM matches;")
+            seasons = [row[0] for row in cursor.fetchall()]
+    return DimensionIndex(players, teams, venues, seasons)
+
+
+_dimension_index: Optional[DimensionIndex] = None
+_dimension_generation: Optional[int] = None
+_dimension_index_lock = threading.Lock()
+
+
+def get_dimension_index() -> Optional[DimensionIndex]:
+    """The process-wide index for the current ETL load generation, or None if the database is unavailable."""
+    global _dimension_index, _dimension_generation
+    with _dimension_index_lock:
+        generation = etl_runs.cached_generation()
+        if generation is None:
+            return None
+        if _dimension_index is None or generation != _dimension_generation:
+            start = time.perf_counter()
+            try:
+                _dimension_index = load_dimension_index()
+            except Exception as e:
+                logger.warning(f"Could not load the dimension index: {e}")
+                return None
+            _dimension_generation = generation
+            logger.info(f"Loaded dimension index ({len(_dimension_index.aliases)} names, "
+                        f"{len(_dimension_index.seasons)} seasons) in {(time.perf_counter() - start) * 1000:.0f} ms.")
+        return _dimension_index
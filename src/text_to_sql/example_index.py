@@ -0,0 +1,185 @@
+# src/text_to_sql/example_index.py
+"""
+Relevance-ranked few-shot example selection for the SQL agent.
+
+The few-shot YAML is loaded and indexed once per process with BM25 over each example's name, question
+and the tables its SQL references. Per question only the top-k examples that fit the token budget are
+pasted into the prompt, instead of every example.
+"""
+import re
+import math
+import logging
+import pathlib
+import threading
+from collections import Counter
+from typing import Optional
+
+import yaml
+
+from src import config
+from src.ai_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+EXAMPLES_PATH = pathlib.Path(__file__).resolve().parent / "prompts" / "few_shot_examples.yaml"
+
+_STOPWORDS = {
+    'a', 'an', 'the', 'in', 'of', 'for', 'and', 'or', 'to', 'by', 'with', 'at', 'on', 'is', 'are', 'was', 'were',
+    'has', 'have', 'had', 'who', 'what', 'which', 'how', 'many', 'much', 'me', 'give', 'show', 'list', 'find',
+    'ipl', 'their', 'his', 'all', 'each', 'from', 'be', 'it', 'that', 'this', 'as', 'do', 'does', 'did',
+}
+_TABLE_REFERENCE = re.compile(r'\b(?:from|join)\s+([a-z_][a-z0-9_]*)', re.IGNORECASE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens without stopwords; plural endings are stripped so 'sixes' matches 'six'."""
+    tokens = []
+    for word in re.findall(r'[a-z0-9]+', (text or "").lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('es'):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith('s'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def referenced_tables(sql: str) -> list[str]:
+    return sorted({name.lower() for name in _TABLE_REFERENCE.findall(sql or "")})
+
+
+# Pseudo-term linking questions that name a player to examples showing the get_player_id_by_name pattern
+PLAYER_LOOKUP_TERM = "__player_lookup__"
+# Overlapping, so a pair starting with a question word ("Did Virat") does not hide the name after it
+_PLAYER_NAME = re.compile(r'(?=\b([A-Z][a-z]+)\s+([A-Z][a-z]+)\b)')
+# Capitalised only because they open the question, so they cannot start a name
+_QUESTION_OPENERS = _STOPWORDS | {
+    'when', 'where', 'why', 'whose', 'whom', 'can', 'could', 'would', 'will', 'tell', 'compare', 'name', 'top',
+    'most', 'best', 'total', 'average', 'number', 'count', 'please', 'get', 'rank', 'versus', 'between',
+}
+# Capitalised words that make a name a team, venue or competition rather than a player
+_NOT_PLAYER_WORDS = {
+    'stadium', 'ground', 'park', 'oval', 'gardens', 'premier', 'league', 'super', 'kings', 'indians', 'royals',
+    'capitals', 'titans', 'giants', 'supergiant', 'supergiants', 'challengers', 'sunrisers', 'riders', 'knight',
+    'daredevils', 'chargers', 'warriors', 'lions', 'tuskers', 'mumbai', 'chennai', 'delhi', 'kolkata', 'punjab',
+    'rajasthan', 'gujarat', 'lucknow', 'hyderabad', 'bangalore', 'bengaluru', 'deccan', 'pune', 'kochi',
+}
+
+
+def question_terms(question: str) -> list[str]:
+    terms = tokenize(question)
+    # Two consecutive capitalised words are most likely a player's name, unless the first is a question word
+    # ("Which Player") or either belongs to a team, venue or competition name
+    for match in _PLAYER_NAME.finditer(question or ""):
+        words = [word.lower() for word in match.groups()]
+        if words[0] in _QUESTION_OPENERS or any(word in _NOT_PLAYER_WORDS for word in words):
+            continue
+        terms.append(PLAYER_LOOKUP_TERM)
+        break
+    return terms
+
+
+def example_terms(example: dict) -> list[str]:
+    terms = tokenize(f"{example.get('name', '')} {example['question']} {' '.join(referenced_tables(example['sql']))}")
+    if 'get_player_id_by_name' in example['sql']:
+        terms.append(PLAYER_LOOKUP_TERM)
+    return terms
+
+
+def format_example(example: dict) -> str:
+    return f"""
+### Example
+Question: "{example['question']}"
+SQL Query:
+{example['sql']}
+### End Example"""
+
+
+def format_examples(examples: list[dict]) -> str:
+    return "\n\n".join(format_example(ex) for ex in examples)
+
+
+class ExampleIndex:
+    """BM25 (k1=1.5, b=0.75) index over the few-shot examples' names, questions and referenced tables."""
+
+    def __init__(self, examples: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.examples = examples
+        self.k1 = k1
+        self.b = b
+        self.documents = [Counter(example_terms(ex)) for ex in examples]
+        self.formatted = [format_example(ex) for ex in examples]
+        self.token_counts = [estimate_tokens(text) for text in self.formatted]
+
+        self.lengths = [sum(doc.values()) for doc in self.documents]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for doc in self.documents for term in doc)
+        n = len(self.documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, question: str) -> list[float]:
+        query_terms = question_terms(question)
+        scores = []
+        for doc, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+                    score += self.idf[term] * tf * (self.k1 + 1) / norm
+            scores.append(score)
+        return scores
+
+    def select(self, question: str, k: int = config.SQL_EXAMPLES_TOP_K,
+               token_budget: int = config.SQL_EXAMPLES_TOKEN_BUDGET) -> list[dict]:
+        """
+        The k highest-scoring examples whose formatted text fits within `token_budget`, best first.
+        If nothing matches at all, the best-scoring (first) example is still returned so the prompt keeps a pattern.
+        """
+        scores = self.scores(question)
+        ranked = sorted(range(len(self.examples)), key=lambda i: scores[i], reverse=True)
+        selected, used_tokens = [], 0
+        for i in ranked:
+            if len(selected) >= k:
+                break
+            if scores[i] <= 0 and selected:
+                break
+            if used_tokens + self.token_counts[i] > token_budget and selected:
+                continue
+            selected.append(i)
+            used_tokens += self.token_counts[i]
+        return [self.examples[i] for i in selected]
+
+    def format_selected(self, question: str, k: int = config.SQL_EXAMPLES_TOP_K,
+                        token_budget: int = config.SQL_EXAMPLES_TOKEN_BUDGET) -> str:
+        return format_examples(self.select(question, k, token_budget))
+
+    def format_all(self) -> str:
+        return "\n\n".join(self.formatted)
+
+
+def load_examples(path: pathlib.Path = EXAMPLES_PATH) -> list[dict]:
+    try:
+        with open(path, 'r') as file:
+            return yaml.safe_load(file) or []
+    except FileNotFoundError:
+        logger.warning(f"Few-shot examples file not found at '{path}'.")
+        return []
+    except yaml.YAMLError as e:
+        logger.error(f"Could not parse YAML file: {e}")
+        return []
+
+
+_example_index: Optional[ExampleIndex] = None
+_example_index_lock = threading.Lock()
+
+
+def get_example_index() -> ExampleIndex:
+    """Returns the process-wide example index, loading and indexing the YAML on first use."""
+    global _example_index
+    with _example_index_lock:
+        if _example_index is None:
+            _example_index = ExampleIndex(load_examples())
+            logger.info(f"Indexed {len(_example_index.examples)} few-shot examples "
+                        f"({sum(_example_index.token_counts)} tokens in total).")
+        return _example_index
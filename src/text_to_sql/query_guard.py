@@ -0,0 +1,148 @@
+# src/text_to_sql/query_guard.py
+"""
+Cost guard for generated SQL. Before a query runs, EXPLAIN (FORMAT JSON) gives the planner's estimated
+total cost and row count, which are compared with SQL_MAX_PLAN_COST / SQL_MAX_PLAN_ROWS. The plan is also
+checked for the two patterns that pin a core for minutes: a join with no join condition between two large
+inputs, and get_player_id_by_name evaluated per row in a filter (the prompt asks for a MATERIALIZED CTE).
+
+Verdicts are cached per canonicalised SQL for the current ETL load generation, so a repeated query is
+only planned once. The rejection reasons are phrased so they can be fed back to the model for a rewrite.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src import config
+from src import db_utils
+from src.etl import etl_runs
+from src.text_to_sql import concurrency
+from src.text_to_sql.sql_normalise import canonicalise_sql
+
+logger = logging.getLogger(__name__)
+
+# A nested loop without a join condition is only a problem when both sides are big
+CARTESIAN_MIN_ROWS = 1000
+PLAN_CACHE_MAX_ENTRIES = 512
+
+
+class PlanVerdict:
+    __slots__ = ('total_cost', 'plan_rows', 'problems')
+
+    def __init__(self, total_cost: float, plan_rows: float, problems: list[str]):
+        self.total_cost = total_cost
+        self.plan_rows = plan_rows
+        self.problems = problems
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def feedback(self) -> str:
+        return " ".join(self.problems)
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _walk(child)
+
+
+def assess_plan(plan: dict, max_cost: float = config.SQL_MAX_PLAN_COST,
+                max_rows: float = config.SQL_MAX_PLAN_ROWS) -> PlanVerdict:
+    """Checks the root plan node of an EXPLAIN (FORMAT JSON) result against the budgets."""
+    total_cost = plan.get('Total Cost', 0.0)
+    plan_rows = plan.get('Plan Rows', 0.0)
+    problems = []
+    if max_cost and total_cost > max_cost:
+        problems.append(f"The estimated query cost is {total_cost:,.0f}, over the budget of {max_cost:,.0f}; "
+                        f"filter earlier, aggregate before joining and avoid scanning deliveries more than once.")
+    if max_rows and plan_rows > max_rows:
+        problems.append(f"The query is estimated to return {plan_rows:,.0f} rows, over the budget of "
+                        f"{max_rows:,.0f}; aggregate the data and apply a LIMIT.")
+    for node in _walk(plan):
+        children = node.get('Plans', [])
+        if (node.get('Node Type') == 'Nested Loop' and 'Join Filter' not in node and len(children) == 2
+                and all(child.get('Plan Rows', 0) >= CARTESIAN_MIN_ROWS for child in children)
+                and not any('Index Cond' in n or 'Recheck Cond' in n for n in _walk(children[1]))):
+            problems.append("The plan contains a cartesian join (a JOIN without a join condition between two large "
+                            "tables); make sure every JOIN has an ON condition on its key columns.")
+            break
+    for node in _walk(plan):
+        if 'get_player_id_by_name' in node.get('Filter', ''):
+            problems.append(f"get_player_id_by_name is evaluated for every row of {node.get('Relation Name', 'a table')}; "
+                            f"compute the player_id once in a MATERIALIZED CTE and join or filter on it.")
+            break
+    return PlanVerdict(total_cost, plan_rows, problems)
+
+
+def explain(sql: str, timeout_ms: int = config.SQL_EXPLAIN_TIMEOUT_MS) -> dict:
+    with concurrency.db_slot(), db_utils.pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s;", (timeout_ms,))
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql.rstrip().rstrip(';')}")
+            result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]['Plan']
+
+
+class QueryGuard:
+    """EXPLAIN-based budget check with a per-generation LRU cache of verdicts keyed by canonical SQL."""
+
+    def __init__(self, max_cost: float = config.SQL_MAX_PLAN_COST, max_rows: float = config.SQL_MAX_PLAN_ROWS,
+                 explain_fn=explain, generation_fn=etl_runs.cached_generation):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.explain_fn = explain_fn
+        self.generation_fn = generation_fn
+        self.plan_cache_hits = 0
+        self.plans = 0
+
+        self._lock = threading.Lock()
+        self._verdicts: OrderedDict[str, PlanVerdict] = OrderedDict()
+        self._generation: Optional[int] = None
+
+    def check(self, sql: str) -> PlanVerdict:
+        """
+        Plans the query (or reuses the cached verdict) and returns the verdict. EXPLAIN failing, e.g. on a
+        syntax error, raises, just as executing the query would.
+        """
+        key = canonicalise_sql(sql)
+        with self._lock:
+            generation = self.generation_fn()
+            if generation != self._generation:
+                self._verdicts.clear()
+                self._generation = generation
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                self.plan_cache_hits += 1
+                return verdict
+
+        verdict = assess_plan(self.explain_fn(sql), self.max_cost, self.max_rows)
+        logger.info(f"Query plan: estimated cost {verdict.total_cost:,.0f}, {verdict.plan_rows:,.0f} rows"
+                    f"{'' if verdict.ok else ' - REJECTED: ' + verdict.feedback()}")
+        with self._lock:
+            self.plans += 1
+            if generation is not None:
+                self._verdicts[key] = verdict
+                while len(self._verdicts) > PLAN_CACHE_MAX_ENTRIES:
+                    self._verdicts.popitem(last=False)
+        return verdict
+
+
+_query_guard: Optional[QueryGuard] = None
+_query_guard_lock = threading.Lock()
+
+
+def get_query_guard() -> Optional[QueryGuard]:
+    """Returns the process-wide guard, or None if it is disabled in config."""
+    global _query_guard
+    if not config.SQL_COST_GUARD_ENABLED:
+        return None
+    with _query_guard_lock:
+        if _query_guard is None:
+            _query_guard = QueryGuard()
+        return _query_guard
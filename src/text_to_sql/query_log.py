@@ -0,0 +1,337 @@
+# src/text_to_sql/query_log.py
+"""
+Per-question tracing for the SQL agent, persisted to the query_log table (sql/DDL/020_create_query_log_table.sql).
+
+Every question answered by run_advanced_langchain gets a Trace with one span per stage (generate, clean,
+safety, execute, summarise, ...). LLM calls made while a span is open add their token counts to it (see
+llm_client token callbacks), and a failure records its exception class. Finished traces are queued and written
+by a background thread in batches of QUERY_LOG_BATCH_SIZE, or every QUERY_LOG_FLUSH_SECONDS, so answering a
+question never waits on the insert. If the database is unreachable the batch is dropped and counted.
+
+    python -m src.text_to_sql.query_log                 # p50/p95 per stage and the slowest SQL shapes, last 7 days
+    python -m src.text_to_sql.query_log --days 1 --top 20
+"""
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+from psycopg2 import extras
+
+from src import config
+from src import db_utils
+from src import llm_client
+from src.text_to_sql.sql_normalise import canonicalise_sql, sql_hash
+
+logger = logging.getLogger(__name__)
+
+# Answer paths, as stored in query_log.answer_path
+PATH_REFINEMENT = 'refinement'
+PATH_QUESTION_CACHE = 'question_cache'
+PATH_TEMPLATE = 'template'
+PATH_LLM = 'llm'
+
+# Longest canonical SQL kept in query_log.sql_text
+MAX_SQL_TEXT = 4000
+
+_current_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('query_trace', default=None)
+
+
+class Trace:
+    """The stages of answering one question. Spans run one after another on the thread answering it."""
+
+    def __init__(self, question: str):
+        self.trace_id = uuid.uuid4().hex
+        self.question = question
+        self.path = PATH_LLM
+        self.sql: Optional[str] = None
+        self.row_count: Optional[int] = None
+        self.success = False
+        self.error_class: Optional[str] = None
+        self.first_content_seconds: Optional[float] = None
+        self.spans: list[dict] = []
+        self._active: Optional[dict] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str):
+        span = {'name': name, 'ms': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0, 'error': None}
+        outer, self._active = self._active, span
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span['error'] = type(e).__name__
+            raise
+        finally:
+            span['ms'] = round((time.perf_counter() - start) * 1000, 2)
+            self._active = outer
+            self.spans.append(span)
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int):
+        if self._active is not None:
+            self._active['prompt_tokens'] += prompt_tokens
+            self._active['completion_tokens'] += completion_tokens
+
+    def fail(self, error_class: str):
+        """Records why the question failed; the first failure wins, later ones are usually its consequences."""
+        if self.error_class is None:
+            self.error_class = error_class
+
+    def mark_first_content(self):
+        if self.first_content_seconds is None:
+            self.first_content_seconds = time.perf_counter() - self._start
+
+    def record(self) -> dict:
+        """The finished trace as a query_log row."""
+        total_ms = (time.perf_counter() - self._start) * 1000
+        canonical = canonicalise_sql(self.sql) if self.sql else None
+        return {
+            'trace_id': self.trace_id,
+            'question': self.question[:1000],
+            'answer_path': self.path,
+            'sql_hash': sql_hash(self.sql) if self.sql else None,
+            'sql_text': canonical[:MAX_SQL_TEXT] if canonical else None,
+            'row_count': self.row_count,
+            'success': self.success,
+            'error_class': None if self.success else (self.error_class or 'Unknown'),
+            'total_ms': round(total_ms, 2),
+            'first_content_ms': round(self.first_content_seconds * 1000, 2) if self.first_content_seconds is not None else None,
+            'prompt_tokens': sum(span['prompt_tokens'] for span in self.spans),
+            'completion_tokens': sum(span['completion_tokens'] for span in self.spans),
+            'spans': self.spans,
+        }
+
+
+@contextmanager
+def traced(question: str):
+    """Makes a new Trace the current one for the duration of the block and queues it for writing afterwards."""
+    trace = Trace(question)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # A streaming answer abandoned by its consumer is closed from another context
+            pass
+        writer = get_query_log_writer()
+        if writer is not None:
+            writer.write(trace.record())
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """A span of the current trace, or nothing if no question is being traced (e.g. during warm-up)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name) as active:
+        yield active
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_tokens(prompt_tokens, completion_tokens)
+
+
+# LLM calls made while a question is traced add their tokens to its open span
+llm_client.add_token_callback(record_tokens)
+
+
+def record_error(error_class: str):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fail(error_class)
+
+
+# --- Batched persistence ---
+INSERT_SQL = """
+    INSERT INTO query_log (trace_id, question, answer_path, sql_hash, sql_text, row_count, success, error_class,
+                           total_ms, first_content_ms, prompt_tokens, completion_tokens, spans)
+    VALUES %s;
+"""
+COLUMNS = ('trace_id', 'question', 'answer_path', 'sql_hash', 'sql_text', 'row_count', 'success', 'error_class',
+           'total_ms', 'first_content_ms', 'prompt_tokens', 'completion_tokens', 'spans')
+
+
+class QueryLogWriter:
+    """Background-thread writer that inserts finished traces into query_log in batches."""
+
+    def __init__(self, batch_size: int = config.QUERY_LOG_BATCH_SIZE,
+                 flush_seconds: float = config.QUERY_LOG_FLUSH_SECONDS):
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        """Queues a record without blocking; if the writer has fallen far behind the record is dropped."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = ...
+            if record is None:
+                self._flush(batch)
+                return
+            if record is not ...:
+                batch.append(record)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _flush(self, batch: list[dict]):
+        if not batch:
+            return
+        try:
+            with db_utils.pooled_connection() as conn:
+                with conn.cursor() as cursor:
+                    extras.execute_values(cursor, INSERT_SQL, [
+                        tuple(json.dumps(r[c]) if c == 'spans' else r[c] for c in COLUMNS) for r in batch])
+                conn.commit()
+            self.written += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning(f"Could not write {len(batch)} query log records ({self.dropped} dropped so far): {e}")
+
+    def stats(self) -> dict:
+        return {'written': self.written, 'dropped': self.dropped, 'queued': self._queue.qsize()}
+
+
+_writer: Optional[QueryLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_query_log_writer() -> Optional[QueryLogWriter]:
+    """Returns the process-wide query log writer, or None if it is disabled in config."""
+    global _writer
+    if not config.QUERY_LOG_ENABLED:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = QueryLogWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+# --- Report ---
+STAGE_PERCENTILES_SQL = """
+    SELECT stage, COUNT(*), percentile_cont(0.5) WITHIN GROUP (ORDER BY ms), percentile_cont(0.95) WITHIN GROUP (ORDER BY ms),
+           SUM(prompt_tokens), SUM(completion_tokens)
+    FROM (
+        SELECT s->>'name' AS stage, (s->>'ms')::float AS ms, (s->>'prompt_tokens')::int AS prompt_tokens,
+               (s->>'completion_tokens')::int AS completion_tokens
+        FROM query_log, jsonb_array_elements(spans) AS s
+        WHERE logged_at >= now() - make_interval(days => %(days)s)
+        UNION ALL
+        SELECT 'total', total_ms, prompt_tokens, completion_tokens
+        FROM query_log
+        WHERE logged_at >= now() - make_interval(days => %(days)s)
+    ) AS stages
+    GROUP BY stage
+    ORDER BY percentile_cont(0.95) WITHIN GROUP (ORDER BY ms) DESC;
+"""
+PATHS_SQL = """
+    SELECT answer_path, COUNT(*), COUNT(*) FILTER (WHERE NOT success), percentile_cont(0.5) WITHIN GROUP (ORDER BY total_ms),
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY total_ms)
+    FROM query_log
+    WHERE logged_at >= now() - make_interval(days => %(days)s)
+    GROUP BY answer_path
+    ORDER BY COUNT(*) DESC;
+"""
+SLOWEST_SHAPES_SQL = """
+    SELECT l.sql_hash, COUNT(*), percentile_cont(0.5) WITHIN GROUP (ORDER BY e.ms), MAX(e.ms), MAX(l.row_count),
+           COUNT(*) FILTER (WHERE l.error_class IS NOT NULL), MIN(l.sql_text)
+    FROM query_log AS l
+    CROSS JOIN LATERAL (
+        SELECT SUM((s->>'ms')::float) AS ms FROM jsonb_array_elements(l.spans) AS s WHERE s->>'name' = 'execute'
+    ) AS e
+    WHERE l.logged_at >= now() - make_interval(days => %(days)s) AND l.sql_hash IS NOT NULL AND e.ms IS NOT NULL
+    GROUP BY l.sql_hash
+    ORDER BY MAX(e.ms) DESC
+    LIMIT %(top)s;
+"""
+ERRORS_SQL = """
+    SELECT error_class, COUNT(*)
+    FROM query_log
+    WHERE logged_at >= now() - make_interval(days => %(days)s) AND error_class IS NOT NULL
+    GROUP BY error_class
+    ORDER BY COUNT(*) DESC;
+"""
+
+
+def print_report(days: int = 7, top: int = 10):
+    params = {'days': days, 'top': top}
+    with db_utils.pooled_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(STAGE_PERCENTILES_SQL, params)
+        stages = cursor.fetchall()
+        cursor.execute(PATHS_SQL, params)
+        paths = cursor.fetchall()
+        cursor.execute(SLOWEST_SHAPES_SQL, params)
+        shapes = cursor.fetchall()
+        cursor.execute(ERRORS_SQL, params)
+        errors = cursor.fetchall()
+
+    print(f"\n--- SQL Agent Query Log (last {days} days) ---")
+    if not stages:
+        print("No questions logged.")
+        return
+    print(f"{'stage':<14} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'tokens in/out':>16}")
+    for stage, count, p50, p95, prompt_tokens, completion_tokens in stages:
+        print(f"{stage:<14} {count:>7} {p50:>10.1f} {p95:>10.1f} {f'{prompt_tokens}/{completion_tokens}':>16}")
+
+    print(f"\n{'answer path':<16} {'count':>7} {'failed':>7} {'p50 ms':>10} {'p95 ms':>10}")
+    for path, count, failed, p50, p95 in paths:
+        print(f"{path:<16} {count:>7} {failed:>7} {p50:>10.1f} {p95:>10.1f}")
+
+    print("\nSlowest SQL shapes by execution time:")
+    for shape_hash, count, p50, worst, rows, failed, sql_text in shapes:
+        print(f"  {shape_hash}  {count:>4}x  p50 {p50:>9.1f} ms  max {worst:>9.1f} ms  rows {rows if rows is not None else '-':>6}"
+              f"{f'  {failed} failed' if failed else ''}")
+        print(f"      {(sql_text or '')[:160]}")
+
+    if errors:
+        print("\nErrors: " + ", ".join(f"{error_class} {count}" for error_class, count in errors))
+    print("----------------------------------------------\n")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Report SQL agent latency per stage and the slowest SQL shapes.")
+    parser.add_argument("--days", type=int, default=7, help="How many days of the log to report on")
+    parser.add_argument("--top", type=int, default=10, help="How many SQL shapes to list")
+    args = parser.parse_args()
+
+    print_report(args.days, args.top)
@@ -0,0 +1,260 @@
+# src/text_to_sql/question_cache.py
+"""
+Answers to previously asked questions, so repeats skip SQL generation, execution and summarisation.
+
+Entries are keyed by a normalised form of the question and stored in a local SQLite file together with the
+generated SQL, the result rows and headers and the summary. Every entry is tagged with the ETL load
+generation it was computed under (see src/etl/etl_runs.py); once a new pipeline run finishes, older entries
+are never served and are purged. A near-identical phrasing is also a hit: the same meaningful words in the
+same order, ignoring articles and similar filler, with small typos tolerated. A typo is only tolerated in a
+known question word such as "wickets" or "economy"; every number ("IPL 2023" must never answer "IPL 2024"),
+every word of a player, team or venue name in the dimension index and every unknown word has to match exactly
+("rohit sharma" is not "mohit sharma"), and different known words never match ("batters" is not "bowlers").
+"""
+import os
+import re
+import time
+import zlib
+import pickle
+import sqlite3
+import difflib
+import logging
+import threading
+import unicodedata
+from typing import Optional
+
+from src import config
+from src.etl import etl_runs
+
+logger = logging.getLogger(__name__)
+
+# Politeness and framing that does not change what is being asked
+_FILLER = re.compile(
+    r'^(?:please\s+)?(?:(?:can|could|would)\s+you\s+)?(?:please\s+)?(?:tell\s+me|show\s+me|give\s+me|find\s+me|i\s+want\s+to\s+know)?\s*'
+)
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+# Words whose presence or absence never changes the answer
+_IGNORABLE_WORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'ipl', 'is', 'are', 'was', 'were', 'has', 'have', 'had', 'do',
+    'does', 'did', 'please', 'me', 'all', 'ever', 'history', 'overall', 'so', 'far', 'till', 'date', 'now',
+}
+# Shortest word a typo is tolerated in; shorter words must match exactly
+_MIN_TYPO_WORD_LENGTH = 5
+# Words a question is phrased in. Only these are recognised under a typo; any other word may be a name
+QUESTION_VOCABULARY = frozenset({
+    'runs', 'wickets', 'economy', 'average', 'averages', 'strike', 'rates', 'boundaries', 'sixes', 'fours',
+    'centuries', 'hundreds', 'fifties', 'ducks', 'maidens', 'dismissals', 'catches', 'stumpings', 'extras',
+    'wides', 'noballs', 'deliveries', 'balls', 'overs', 'innings', 'matches', 'match', 'games', 'season',
+    'seasons', 'venue', 'venues', 'stadium', 'ground', 'grounds', 'team', 'teams', 'player', 'players',
+    'batter', 'batters', 'batsman', 'batsmen', 'bowler', 'bowlers', 'bowling', 'batting', 'fielder',
+    'fielders', 'captain', 'captains', 'wicketkeeper', 'keeper', 'umpire', 'umpires', 'tosses', 'winner',
+    'winners', 'losses', 'victory', 'victories', 'margin', 'chasing', 'defending', 'powerplay', 'death',
+    'middle', 'final', 'finals', 'playoff', 'playoffs', 'qualifier', 'eliminator', 'highest', 'lowest',
+    'least', 'worst', 'fastest', 'slowest', 'maximum', 'minimum', 'total', 'number', 'count', 'score',
+    'scored', 'scores', 'scorer', 'scorers', 'takers', 'partnership', 'partnerships', 'against', 'between',
+    'versus', 'which', 'where', 'whose', 'every', 'compare', 'career', 'record', 'records', 'statistics',
+    'performance', 'individual', 'conceded', 'taken', 'played', 'debut', 'nationality', 'country', 'style',
+    'right', 'handed', 'spinner', 'spinners', 'pacer', 'pacers', 'delay', 'delays', 'duration', 'timings',
+    'first', 'second', 'third', 'fourth', 'latest', 'recent', 'since', 'before', 'after', 'during',
+    'without', 'ranked', 'ranking', 'orange', 'purple', 'award', 'awards',
+})
+
+
+def normalise_question(question: str) -> str:
+    """Lower-cased, accent-free, punctuation-free and whitespace-collapsed, with leading filler removed."""
+    text = unicodedata.normalize('NFKD', question or "").encode('ascii', 'ignore').decode('ascii').lower()
+    text = text.replace("'s ", " ").replace("’s ", " ")
+    text = re.sub(r'(?<=\d)-(?=\d)', ' to ', text)
+    text = re.sub(r'[^a-z0-9.]+', ' ', text).replace(' . ', ' ').strip(' .')
+    text = re.sub(r'\s+', ' ', text)
+    return _FILLER.sub('', text).strip()
+
+
+def question_numbers(normalised: str) -> tuple[str, ...]:
+    return tuple(_NUMBER.findall(normalised))
+
+
+def content_words(normalised: str) -> list[str]:
+    return [word for word in normalised.split() if word not in _IGNORABLE_WORDS]
+
+
+def is_near_match(words: list[str], other_words: list[str], typo_ratio: float,
+                  name_words: frozenset[str] = frozenset()) -> bool:
+    """
+    True if both questions have the same content words in the same order, allowing a small typo of a
+    QUESTION_VOCABULARY word in longer words that are not in `name_words`. Order matters: "runs for Mumbai
+    against Chennai" is not "runs against Mumbai for Chennai".
+    """
+    if len(words) != len(other_words):
+        return False
+    for word, other in zip(words, other_words):
+        if word == other:
+            continue
+        # Exactly one side may be a known word: the other is then its misspelling, not a different word or name
+        if ((word in QUESTION_VOCABULARY) == (other in QUESTION_VOCABULARY)
+                or min(len(word), len(other)) < _MIN_TYPO_WORD_LENGTH or _NUMBER.search(word) or _NUMBER.search(other)
+                or word in name_words or other in name_words
+                or difflib.SequenceMatcher(None, word, other).ratio() < typo_ratio):
+            return False
+    return True
+
+
+def dimension_name_words() -> frozenset[str]:
+    """Every word of a player, team or venue name in the dimension index; empty if it cannot be loaded."""
+    from src.text_to_sql import dimension_index  # dimension_index imports this module
+    index = dimension_index.get_dimension_index()
+    return index.alias_words if index is not None else frozenset()
+
+
+class QuestionCache:
+    """
+    SQLite-backed answer cache. The normalised questions of the current generation are also held in memory
+    with their content words, so the fuzzy fallback never scans the database. `name_words_fn` returns the
+    words that must never be matched under a typo (see dimension_name_words).
+    """
+
+    def __init__(self, path: str = config.QUESTION_CACHE_PATH,
+                 fuzzy_threshold: float = config.QUESTION_CACHE_FUZZY_THRESHOLD,
+                 max_entries: int = config.QUESTION_CACHE_MAX_ENTRIES,
+                 generation_fn=etl_runs.cached_generation, name_words_fn=dimension_name_words):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_entries = max_entries
+        self.generation_fn = generation_fn
+        self.name_words_fn = name_words_fn
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_answers (
+                question_key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                generated_sql TEXT,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.commit()
+        self._generation: Optional[int] = None
+        # question_key -> (numbers, content words)
+        self._keys: dict[str, tuple[tuple[str, ...], list[str]]] = {}
+
+    def _sync_generation(self) -> Optional[int]:
+        """Drops entries from older generations when the generation changes. Must hold the lock."""
+        generation = self.generation_fn()
+        if generation is None or generation == self._generation:
+            return generation
+        deleted = self._conn.execute("DELETE FROM question_answers WHERE generation <> ?", (generation,)).rowcount
+        self._conn.commit()
+        if deleted:
+            logger.info(f"Question cache: dropped {deleted} answers from before ETL generation {generation}.")
+        self._generation = generation
+        self._keys = {key: (question_numbers(key), content_words(key))
+                      for (key,) in self._conn.execute("SELECT question_key FROM question_answers")}
+        return generation
+
+    def _closest_key(self, key: str, names: frozenset[str]) -> Optional[str]:
+        numbers, words = question_numbers(key), content_words(key)
+        for candidate, (candidate_numbers, candidate_words) in self._keys.items():
+            if candidate_numbers == numbers and is_near_match(words, candidate_words, self.fuzzy_threshold, names):
+                return candidate
+        return None
+
+    def get(self, question: str) -> Optional[dict]:
+        """
+        Returns {'question', 'sql', 'results', 'headers', 'summary', 'matched_question'} for an exact or
+        near-identical question from the current generation, or None.
+        """
+        key = normalise_question(question)
+        names = self.name_words_fn()
+        with self._lock:
+            generation = self._sync_generation()
+            if generation is None:
+                self.misses += 1
+                return None
+            matched_key = key if key in self._keys else self._closest_key(key, names)
+            if matched_key is None:
+                self.misses += 1
+                return None
+            row = self._conn.execute(
+                "SELECT question, generated_sql, payload FROM question_answers WHERE question_key = ?", (matched_key,)
+            ).fetchone()
+            if row is None:
+                self._keys.pop(matched_key, None)
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE question_answers SET last_accessed_at = ?, hit_count = hit_count + 1 WHERE question_key = ?",
+                (time.time(), matched_key))
+            self._conn.commit()
+            self.hits += 1
+            if matched_key != key:
+                self.fuzzy_hits += 1
+        answer = pickle.loads(zlib.decompress(row[2]))
+        answer.update({'question': row[0], 'sql': row[1], 'matched_question': matched_key})
+        return answer
+
+    def put(self, question: str, sql: str, results: list, headers: list, summary: str):
+        """Stores a successful answer under the current generation. Nothing is stored if the generation is unknown."""
+        key = normalise_question(question)
+        payload = zlib.compress(pickle.dumps({'results': list(results), 'headers': list(headers), 'summary': summary}), 6)
+        now = time.time()
+        with self._lock:
+            generation = self._sync_generation()
+            if generation is None:
+                return
+            self._conn.execute("""
+                INSERT INTO question_answers (question_key, question, generation, generated_sql, payload,
+                                              created_at, last_accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (question_key) DO UPDATE SET
+                    question = excluded.question, generation = excluded.generation,
+                    generated_sql = excluded.generated_sql, payload = excluded.payload,
+                    created_at = excluded.created_at, last_accessed_at = excluded.last_accessed_at
+            """, (key, question, generation, sql, payload, now, now))
+            self._keys[key] = (question_numbers(key), content_words(key))
+            self._evict_if_needed()
+            self._conn.commit()
+
+    def _evict_if_needed(self):
+        if not self.max_entries or len(self._keys) <= self.max_entries:
+            return
+        excess = len(self._keys) - self.max_entries
+        for (key,) in self._conn.execute(
+                "SELECT question_key FROM question_answers ORDER BY last_accessed_at ASC LIMIT ?", (excess,)).fetchall():
+            self._conn.execute("DELETE FROM question_answers WHERE question_key = ?", (key,))
+            self._keys.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'fuzzy_hits': self.fuzzy_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._keys),
+            'generation': self._generation,
+        }
+
+
+_question_cache: Optional[QuestionCache] = None
+_question_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> Optional[QuestionCache]:
+    """Returns the process-wide question cache, or None if it is disabled in config."""
+    global _question_cache
+    if not config.QUESTION_CACHE_ENABLED:
+        return None
+    with _question_cache_lock:
+        if _question_cache is None:
+            _question_cache = QuestionCache()
+        return _question_cache
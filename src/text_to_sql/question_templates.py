@@ -0,0 +1,185 @@
+# src/text_to_sql/question_templates.py
+"""
+Template fast path: common question shapes are answered with parameterised SQL instead of a generated query.
+
+The question is reduced to a shape (see prompts/question_templates.yaml) by resolving player, team, venue and
+season names against the in-memory dimension index. A template is used only when one of its patterns matches
+the whole shape and every placeholder in its SQL has a value, so anything unusual in the question falls back
+to the LLM. Matching takes well under a millisecond once the index is loaded.
+"""
+import re
+import time
+import logging
+import pathlib
+import threading
+from typing import Optional
+
+import yaml
+
+from src import config
+from src.text_to_sql import dimension_index
+from src.text_to_sql.dimension_index import PLAYER, VENUE
+from src.text_to_sql.example_index import load_examples
+from src.text_to_sql.question_cache import normalise_question, content_words
+from src.text_to_sql.sql_normalise import strip_sql_comments
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = pathlib.Path(__file__).resolve().parent / "prompts" / "question_templates.yaml"
+
+_PLACEHOLDER = re.compile(r'\{([a-z_][a-z0-9_]*)\}')
+_SEASON_WORDS = re.compile(r'(?:season )?<season>(?: season)?')
+
+
+def render_value(kind: str, value) -> str:
+    """SQL literal for a slot value. Only ids from the dimension index and integers ever reach the SQL."""
+    if kind == PLAYER:
+        return "'" + str(value).replace("'", "''") + "'"
+    if kind == VENUE:
+        return "(" + ", ".join(str(int(v)) for v in value) + ")"
+    return str(int(value))
+
+
+class QuestionTemplate:
+    __slots__ = ('name', 'sql', 'patterns', 'defaults')
+
+    def __init__(self, name: str, sql: str, patterns: list[str], defaults: Optional[dict] = None):
+        self.name = name
+        self.sql = strip_sql_comments(sql)
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.defaults = dict(defaults or {})
+
+    def placeholders(self) -> set[str]:
+        return set(_PLACEHOLDER.findall(self.sql))
+
+    def render(self, slots: dict[str, tuple[str, object]]) -> Optional[str]:
+        """The SQL with every placeholder filled, or None if one has no value or a slot would go unused."""
+        if not slots.keys() <= self.placeholders():
+            return None
+        values = {name: render_value(kind, value) for name, (kind, value) in slots.items()}
+        for name, default in self.defaults.items():
+            values.setdefault(name, render_value('n', default))
+        if not self.placeholders() <= values.keys():
+            return None
+        return _PLACEHOLDER.sub(lambda m: values[m.group(1)], self.sql)
+
+
+class TemplateMatch:
+    __slots__ = ('template', 'sql', 'slots', 'shape', 'seconds')
+
+    def __init__(self, template: str, sql: str, slots: dict, shape: str, seconds: float):
+        self.template = template
+        self.sql = sql
+        self.slots = slots
+        self.shape = shape
+        self.seconds = seconds
+
+
+def question_shape(question: str, index: dimension_index.DimensionIndex) -> tuple[str, dict[str, tuple[str, object]]]:
+    """
+    The question's shape and its slots, {placeholder: (kind, value)}. The second player or team named is
+    'player2' / 'team2', and so on.
+    """
+    words = normalise_question(question).split()
+    entities = {start: (end, entity) for start, end, entity in index.find_entities(" ".join(words))}
+    slots: dict[str, tuple[str, object]] = {}
+    counts: dict[str, int] = {}
+    tokens = []
+    position = 0
+    while position < len(words):
+        if position in entities:
+            end, (kind, value, _) = entities[position]
+            position = end
+        elif words[position].isdigit():
+            kind, value = 'n', int(words[position])
+            position += 1
+        else:
+            tokens.append(words[position])
+            position += 1
+            continue
+        counts[kind] = counts.get(kind, 0) + 1
+        slots[kind if counts[kind] == 1 else f"{kind}{counts[kind]}"] = (kind, value)
+        tokens.append(f"<{kind}>")
+    shape = _SEASON_WORDS.sub('<season>', " ".join(content_words(" ".join(tokens))))
+    return shape, slots
+
+
+def load_templates(path: pathlib.Path = TEMPLATES_PATH, examples: Optional[list[dict]] = None) -> list[QuestionTemplate]:
+    """
+    Reads the template file. A seeded template whose replacements no longer apply to its example's SQL is
+    skipped with a warning rather than used with stale literals.
+    """
+    try:
+        with open(path, 'r') as file:
+            entries = yaml.safe_load(file) or []
+    except FileNotFoundError:
+        logger.warning(f"Question templates file not found at '{path}'.")
+        return []
+    except yaml.YAMLError as e:
+        logger.error(f"Could not parse YAML file: {e}")
+        return []
+
+    seeds = {example.get('name'): example.get('sql', '') for example in (examples if examples is not None else load_examples())}
+    templates = []
+    for entry in entries:
+        name = entry.get('name')
+        sql = entry.get('sql')
+        if entry.get('seed'):
+            sql = seeds.get(entry['seed'])
+            if sql is None:
+                logger.warning(f"Template '{name}': few-shot example '{entry['seed']}' not found, skipping.")
+                continue
+            missing = [literal for literal in entry.get('replace', {}) if literal not in sql]
+            if missing:
+                logger.warning(f"Template '{name}': {missing} not found in the SQL of '{entry['seed']}', skipping.")
+                continue
+            for literal, placeholder in entry.get('replace', {}).items():
+                sql = sql.replace(literal, placeholder)
+        if not sql or not entry.get('patterns'):
+            logger.warning(f"Template '{name}' has no SQL or no patterns, skipping.")
+            continue
+        templates.append(QuestionTemplate(name, sql, entry['patterns'], entry.get('defaults')))
+    return templates
+
+
+class TemplateMatcher:
+    def __init__(self, templates: list[QuestionTemplate], index_fn=dimension_index.get_dimension_index):
+        self.templates = templates
+        self.index_fn = index_fn
+        self.matches = 0
+        self.misses = 0
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        """The rendered SQL of the first template matching the question's shape, or None."""
+        start = time.perf_counter()
+        index = self.index_fn()
+        if index is None or not self.templates:
+            return None
+        shape, slots = question_shape(question, index)
+        for template in self.templates:
+            if not any(pattern.fullmatch(shape) for pattern in template.patterns):
+                continue
+            sql = template.render(slots)
+            if sql is None:
+                continue
+            self.matches += 1
+            return TemplateMatch(template.name, sql, slots, shape, time.perf_counter() - start)
+        self.misses += 1
+        logger.debug(f"No question template for shape '{shape}'.")
+        return None
+
+
+_template_matcher: Optional[TemplateMatcher] = None
+_template_matcher_lock = threading.Lock()
+
+
+def get_template_matcher() -> Optional[TemplateMatcher]:
+    """Returns the process-wide matcher, or None if the template fast path is disabled in config."""
+    global _template_matcher
+    if not config.SQL_TEMPLATES_ENABLED:
+        return None
+    with _template_matcher_lock:
+        if _template_matcher is None:
+            _template_matcher = TemplateMatcher(load_templates())
+            logger.info(f"Loaded {len(_template_matcher.templates)} question templates.")
+        return _template_matcher
@@ -0,0 +1,160 @@
+# src/text_to_sql/result_cache.py
+"""
+In-process cache of query results, keyed by canonicalised SQL (see sql_normalise.canonicalise_sql).
+
+Different questions often produce the same SQL up to whitespace, comments or alias names; those now hit
+Postgres once per ETL load generation. Results are stored column by column (one tuple per column), which
+is smaller than a list of row tuples, and evicted least-recently-used once there are more than
+`max_entries` or they take more than `max_bytes`.
+"""
+import sys
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src import config
+from src.etl import etl_runs
+from src.text_to_sql.sql_normalise import canonicalise_sql
+
+logger = logging.getLogger(__name__)
+
+
+def _columnar_size(headers: list, columns: list[tuple]) -> int:
+    """Approximate memory held by an entry: the column tuples and every distinct value object in them."""
+    size = sys.getsizeof(headers) + sum(sys.getsizeof(h) for h in headers)
+    for column in columns:
+        size += sys.getsizeof(column)
+        seen = set()
+        for value in column:
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+    return size
+
+
+class CachedResult:
+    __slots__ = ('headers', 'columns', 'row_count', 'message', 'size_bytes', 'execution_seconds', 'hits')
+
+    def __init__(self, rows: list, headers: list, message: str, execution_seconds: float):
+        self.headers = list(headers)
+        self.columns = [tuple(column) for column in zip(*rows)] if rows else [() for _ in headers]
+        self.row_count = len(rows)
+        self.message = message
+        self.size_bytes = _columnar_size(self.headers, self.columns)
+        self.execution_seconds = execution_seconds
+        self.hits = 0
+
+    def rows(self) -> list[tuple]:
+        return list(zip(*self.columns)) if self.row_count else []
+
+
+class ResultCache:
+    """LRU + memory-bounded result cache, cleared whenever the ETL load generation changes."""
+
+    def __init__(self, max_entries: int = config.RESULT_CACHE_MAX_ENTRIES,
+                 max_bytes: int = config.RESULT_CACHE_MAX_BYTES,
+                 generation_fn=etl_runs.cached_generation):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation_fn = generation_fn
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self.seconds_saved = 0.0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._total_bytes = 0
+        self._generation: Optional[int] = None
+
+    def _sync_generation(self) -> Optional[int]:
+        """Must hold the lock."""
+        generation = self.generation_fn()
+        if generation is not None and generation != self._generation:
+            if self._entries:
+                logger.info(f"Result cache: dropped {len(self._entries)} results from before ETL generation {generation}.")
+            self._entries.clear()
+            self._total_bytes = 0
+            self._generation = generation
+        return generation
+
+    def get(self, sql: str) -> Optional[tuple[list, list, str]]:
+        """Returns (rows, headers, message) for a query already run under the current generation, or None."""
+        key = canonicalise_sql(sql)
+        with self._lock:
+            if self._sync_generation() is None:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            self.bytes_saved += entry.size_bytes
+            self.seconds_saved += entry.execution_seconds
+        return entry.rows(), list(entry.headers), entry.message
+
+    def put(self, sql: str, rows: list, headers: list, message: str = "", execution_seconds: float = 0.0):
+        entry = CachedResult(rows, headers, message, execution_seconds)
+        if self.max_bytes and entry.size_bytes > self.max_bytes:
+            logger.info(f"Result of {entry.row_count} rows ({entry.size_bytes} bytes) is too large to cache.")
+            return
+        key = canonicalise_sql(sql)
+        with self._lock:
+            if self._sync_generation() is None:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size_bytes
+            self._entries[key] = entry
+            self._total_bytes += entry.size_bytes
+            while self._entries and ((self.max_entries and len(self._entries) > self.max_entries)
+                                     or (self.max_bytes and self._total_bytes > self.max_bytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'evictions': self.evictions,
+                'bytes_saved': self.bytes_saved,
+                'seconds_saved': self.seconds_saved,
+                'generation': self._generation,
+            }
+
+    def log_stats(self, label: str = "SQL result cache"):
+        s = self.stats()
+        logger.info(f"{label}: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%} hit rate), "
+                    f"{s['entries']} entries ({s['size_bytes'] / 1024 / 1024:.1f} MB), {s['evictions']} evictions, "
+                    f"{s['bytes_saved'] / 1024 / 1024:.1f} MB and {s['seconds_saved']:.1f}s of query time saved.")
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Returns the process-wide result cache, or None if it is disabled in config."""
+    global _result_cache
+    if not config.RESULT_CACHE_ENABLED:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
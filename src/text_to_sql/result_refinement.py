@@ -0,0 +1,458 @@
+# src/text_to_sql/result_refinement.py
+"""
+Follow-up questions answered from the previous result instead of the database.
+
+The last successful result of each session (Streamlit session or HTTP client) is kept in memory and, when a
+follow-up needs it, loaded into an in-process SQLite table called previous_result. A rule-based classifier
+recognises follow-ups that only refine that result:
+
+    sort     "sort by strike rate", "order them by runs ascending"
+    top N    "only the top 5", "bottom 3 by economy"
+    filter   "only those with strike rate above 150", "runs at least 500"
+    match    "now only show left-handers", "exclude Mumbai Indians"
+    count    "how many are there", "what is the average strike rate", "sum of runs across them"
+
+A follow-up is only handled here when every column or value it names can be found in the previous result,
+so "sort by strike rate" over a result without a strike rate column still goes to the LLM. Refinements take
+a few milliseconds and their result becomes the session's new previous result, so they can be chained.
+"""
+import re
+import time
+import logging
+import sqlite3
+import datetime
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Optional
+
+from src import config
+from src.text_to_sql.result_summary import column_label, format_value, is_number, summarise_locally
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "previous_result"
+SQL_HEADER = f"-- Refinement of the previous result (in-process SQLite table {TABLE_NAME})"
+
+# Openers that mark a follow-up without changing what it asks for
+_LEAD_IN = re.compile(r'^(?:(?:and|ok|okay|now|then|also|please|can you|could you|just|so)\s+)*')
+# Words in a filter phrase that name the rows rather than restrict them
+_ROW_WORDS = {
+    'the', 'those', 'these', 'ones', 'one', 'rows', 'row', 'results', 'result', 'entries', 'players', 'player',
+    'teams', 'team', 'who', 'which', 'that', 'are', 'is', 'were', 'was', 'from', 'for', 'of', 'in', 'by', 'with',
+    'show', 'list', 'keep', 'include', 'them', 'only', 'me', 'please',
+}
+# Common shorthand for column names
+COLUMN_ALIASES = {'sr': 'strike rate', 'avg': 'average', 'econ': 'economy', 'eco': 'economy', 'wkts': 'wickets'}
+_SORT_DIRECTIONS = {
+    'asc': 'ASC', 'ascending': 'ASC', 'in ascending order': 'ASC', 'lowest first': 'ASC', 'low to high': 'ASC',
+    'smallest first': 'ASC',
+    'desc': 'DESC', 'descending': 'DESC', 'in descending order': 'DESC', 'highest first': 'DESC',
+    'high to low': 'DESC', 'largest first': 'DESC',
+}
+_COMPARISONS = {
+    '>=': '>=', 'at least': '>=', 'or more': '>=', 'and above': '>=',
+    '<=': '<=', 'at most': '<=', 'or less': '<=', 'or fewer': '<=', 'and below': '<=', 'no more than': '<=',
+    '>': '>', 'above': '>', 'over': '>', 'more than': '>', 'greater than': '>', 'higher than': '>',
+    '<': '<', 'below': '<', 'under': '<', 'less than': '<', 'fewer than': '<', 'lower than': '<',
+    '=': '=', 'equal to': '=', 'equals': '=', 'exactly': '=', 'of exactly': '=',
+}
+_AGGREGATES = {
+    'total': 'SUM', 'sum': 'SUM', 'combined': 'SUM', 'average': 'AVG', 'mean': 'AVG',
+    'max': 'MAX', 'maximum': 'MAX', 'highest': 'MAX', 'min': 'MIN', 'minimum': 'MIN', 'lowest': 'MIN',
+}
+
+
+def _alternation(words) -> str:
+    # Longest first, so 'at least' is tried before 'at'
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_COUNT = re.compile(r'^(?:how many (?:are there|of them|rows|results|are left|is that)|count (?:them|the rows|the results))$')
+# Only explicit aggregate phrasing: "show the total runs" asks to see that column, not to add it up
+_AGGREGATE_OVER_ROWS = r' (?:of|across|for) (?:them|these|those|all|all of them)'
+_AGGREGATE = (
+    re.compile(rf'^(?:what is|what s|whats|what|calculate|compute) (?:the )?(?P<fn>{_alternation(_AGGREGATES)}) '
+               rf'(?:of )?(?P<col>.+?)(?:{_AGGREGATE_OVER_ROWS})?$'),
+    re.compile(rf'^(?:show |give me )?(?:the )?(?P<fn>{_alternation(_AGGREGATES)}) of (?P<col>.+?)'
+               rf'(?:{_AGGREGATE_OVER_ROWS})?$'),
+    re.compile(rf'^(?:show |give me )?(?:the )?(?P<fn>{_alternation(_AGGREGATES)}) (?P<col>.+?){_AGGREGATE_OVER_ROWS}$'),
+)
+_SORT = re.compile(
+    r'^(?:show |list )?(?:sort|sorted|order|ordered|rank|ranked|arrange|re sort|resort)'
+    r'(?: (?:it|them|this|these|those|that|the results?|the list|the table))? by (?P<col>.+?)'
+    rf'(?: (?P<dir>{_alternation(_SORT_DIRECTIONS)}))?$')
+_TOP_N = re.compile(
+    r'^(?:(?:only|show|just|give|list|keep)\s+)*(?:me )?(?:the )?(?P<end>top|first|bottom|last) (?P<n>\d+)'
+    r'(?: (?:rows|results|ones|of them|entries|players|teams))?(?: by (?P<col>.+?))?(?: only)?$')
+_NUMBER = r'(?P<value>-?\d+(?:\.\d+)?)'
+# Comparisons that follow the number: '500 runs or more'
+_TRAILING_COMPARISONS = ('or more', 'or less', 'or fewer', 'and above', 'and below')
+_FILTERS = (
+    re.compile(rf'^(?P<col>.+?) (?:is |are |was |of )?(?P<op>{_alternation(_COMPARISONS)}) {_NUMBER}$'),
+    re.compile(rf'^(?P<col>.+?) (?:of )?{_NUMBER} (?P<op>{_alternation(_TRAILING_COMPARISONS)})$'),
+    re.compile(rf'^{_NUMBER} (?P<col>.+?) (?P<op>{_alternation(_TRAILING_COMPARISONS)})$'),
+)
+_FILTER_LEAD = re.compile(
+    r'^(?:(?:only|just|show|list|keep|filter|filtered|limit|restrict|to|for|those|ones|rows|players|teams|the|'
+    r'me|them|it|with|where|whose|having|who have|that have|who has|which have)\s+)*')
+_MATCH = re.compile(
+    r'^(?:(?:only|just)(?: (?:show|keep|list|include|want|give me))?|(?:show|keep|list|include) only|'
+    r'(?:filter|limit|restrict)(?: (?:it|them|this|the results?))?(?: (?:to|for|on|by))?) (?P<phrase>.+)$')
+_EXCLUDE = re.compile(r'^(?:exclude|excluding|without|remove|drop|except|hide|leave out|filter out) (?P<phrase>.+)$')
+
+
+def normalise_follow_up(question: str) -> str:
+    """Lower-cased, with '-', '_' and punctuation (other than comparison signs and decimals) turned into spaces."""
+    text = (question or "").lower().replace("'s ", " ").replace("’s ", " ")
+    text = re.sub(r'[^a-z0-9.<>=]+', ' ', text)
+    text = re.sub(r'\s*(>=|<=|>|<|=)\s*', r' \1 ', text)
+    text = re.sub(r'\s+', ' ', text).strip(' .')
+    return _LEAD_IN.sub('', text).strip()
+
+
+def _words(text: str) -> list[str]:
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).split()
+
+
+def _word_matches(word: str, other: str) -> bool:
+    """Same word or one a prefix of the other ('handers' / 'hand', 'batters' / 'bat'), for words of 3+ letters."""
+    if word == other:
+        return True
+    shorter, longer = sorted((word, other), key=len)
+    return len(shorter) >= 3 and longer.startswith(shorter)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def quote_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if is_number(value):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sqlite_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class PreviousResult:
+    """One session's last result. The SQLite table is only built the first time a follow-up needs it."""
+
+    def __init__(self, question: str, sql: str, rows: list, headers: list):
+        self.question = question
+        self.sql = sql
+        self.rows = [tuple(row) for row in rows]
+        self.headers = list(headers)
+        self.created_at = time.time()
+        self._numeric: Optional[set[int]] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def columns(self) -> list[str]:
+        """The headers as SQLite column names; duplicated names get a numeric suffix."""
+        seen: dict[str, int] = {}
+        columns = []
+        for header in self.headers:
+            name = str(header) or "column"
+            seen[name] = seen.get(name, 0) + 1
+            columns.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+        return columns
+
+    def numeric_columns(self) -> set[int]:
+        if self._numeric is None:
+            self._numeric = {i for i in range(len(self.headers))
+                             if any(is_number(row[i]) for row in self.rows)
+                             and all(row[i] is None or is_number(row[i]) for row in self.rows)}
+        return self._numeric
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            columns = self.columns()
+            numeric = self.numeric_columns()
+            definitions = ", ".join(f"{quote_identifier(name)} {'NUMERIC' if i in numeric else 'TEXT'}"
+                                    for i, name in enumerate(columns))
+            conn.execute(f"CREATE TABLE {TABLE_NAME} ({definitions})")
+            conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES ({', '.join('?' * len(columns))})",
+                             ([_sqlite_value(v) for v in row] for row in self.rows))
+            self._conn = conn
+        return self._conn
+
+    def query(self, sql: str) -> tuple[list, list]:
+        """Runs SQL over the previous_result table and returns (rows, headers)."""
+        with self._lock:
+            cursor = self._connection().execute(sql)
+            return cursor.fetchall(), [desc[0] for desc in cursor.description]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class Refinement:
+    __slots__ = ('kind', 'sql', 'description')
+
+    def __init__(self, kind: str, sql: str, description: str):
+        self.kind = kind
+        self.sql = sql
+        self.description = description
+
+
+def resolve_column(phrase: str, previous: PreviousResult, numeric_only: bool = False) -> Optional[int]:
+    """The index of the single column the phrase names, or None if it names none or several."""
+    candidates = sorted(previous.numeric_columns()) if numeric_only else range(len(previous.headers))
+    labels = {i: _words(column_label(previous.headers[i])) for i in candidates}
+    phrase = phrase.strip()
+    for name in dict.fromkeys((phrase, COLUMN_ALIASES.get(phrase, phrase))):
+        words = [w for w in _words(name) if w not in ('the', 'their', 'its', 'his')]
+        if not words:
+            continue
+        exact = [i for i, label in labels.items() if label == words]
+        if exact:
+            return exact[0] if len(exact) == 1 else None
+        # Every word of the phrase matches a word of the header, e.g. 'strike rate' -> 'batting_strike_rate'
+        partial = [i for i, label in labels.items()
+                   if all(any(_word_matches(w, l) for l in label) for w in words)]
+        if partial:
+            return partial[0] if len(partial) == 1 else None
+    return None
+
+
+def _sort_default(previous: PreviousResult, index: int) -> str:
+    # Cricket numbers are almost always wanted highest first; names alphabetically
+    return 'DESC' if index in previous.numeric_columns() else 'ASC'
+
+
+def _select(previous: PreviousResult, where: str = "", order: str = "", limit: Optional[int] = None) -> str:
+    sql = f"SELECT * FROM {TABLE_NAME}"
+    if where:
+        sql += f"\nWHERE {where}"
+    # rowid keeps the previous result's own order for ties and unsorted results
+    sql += f"\nORDER BY {order + ', ' if order else ''}rowid"
+    if limit is not None:
+        sql += f"\nLIMIT {int(limit)}"
+    return f"{SQL_HEADER}\n{sql};"
+
+
+def _matching_values(phrase: str, previous: PreviousResult) -> Optional[tuple[int, list]]:
+    """The text column and its distinct values that the phrase describes, e.g. 'left handers' -> 'Left-hand bat'."""
+    words = [w for w in _words(phrase) if w not in _ROW_WORDS]
+    if not words:
+        return None
+    numeric = previous.numeric_columns()
+    for i in range(len(previous.headers)):
+        if i in numeric:
+            continue
+        values = list(dict.fromkeys(row[i] for row in previous.rows if row[i] is not None))
+        matches = [value for value in values
+                   if all(any(_word_matches(w, v) for v in _words(value)) for w in words)]
+        if matches:
+            return i, matches
+    return None
+
+
+def classify_follow_up(question: str, previous: PreviousResult) -> Optional[Refinement]:
+    """The refinement a follow-up asks for, or None if it needs a new query against the database."""
+    text = normalise_follow_up(question)
+    if not text or not previous.rows:
+        return None
+    columns = previous.columns()
+    total = len(previous.rows)
+
+    if _COUNT.match(text):
+        return Refinement('count', f"{SQL_HEADER}\nSELECT COUNT(*) AS count FROM {TABLE_NAME};",
+                          f"Counted the {total} rows of the previous result")
+
+    match = next(filter(None, (pattern.match(text) for pattern in _AGGREGATE)), None)
+    if match:
+        index = resolve_column(match.group('col'), previous, numeric_only=True)
+        if index is not None:
+            fn = _AGGREGATES[match.group('fn')]
+            alias = columns[index]
+            if not column_label(alias).startswith(match.group('fn')):
+                alias = f"{match.group('fn')}_{alias}".replace(' ', '_')
+            return Refinement('aggregate',
+                              f"{SQL_HEADER}\nSELECT {fn}({quote_identifier(columns[index])}) AS {quote_identifier(alias)} "
+                              f"FROM {TABLE_NAME};",
+                              f"Computed the {match.group('fn')} {column_label(previous.headers[index])} over the "
+                              f"{total} rows of the previous result")
+
+    match = _SORT.match(text)
+    if match:
+        index = resolve_column(match.group('col'), previous)
+        if index is not None:
+            direction = _SORT_DIRECTIONS.get(match.group('dir') or '', _sort_default(previous, index))
+            return Refinement('sort', _select(previous, order=f"{quote_identifier(columns[index])} {direction}"),
+                              f"Sorted the previous {total} rows by {column_label(previous.headers[index])}, "
+                              + (('highest first' if direction == 'DESC' else 'lowest first')
+                                 if index in previous.numeric_columns() else
+                                 ('A to Z' if direction == 'ASC' else 'Z to A')))
+
+    match = _TOP_N.match(text)
+    if match:
+        n = int(match.group('n'))
+        from_bottom = match.group('end') in ('bottom', 'last')
+        if match.group('col'):
+            index = resolve_column(match.group('col'), previous)
+            if index is None:
+                return None
+            direction = _sort_default(previous, index)
+            if from_bottom:
+                direction = 'ASC' if direction == 'DESC' else 'DESC'
+            return Refinement('top_n', _select(previous, order=f"{quote_identifier(columns[index])} {direction}", limit=n),
+                              f"Kept the {match.group('end')} {n} of the previous {total} rows by "
+                              f"{column_label(previous.headers[index])}")
+        if from_bottom:
+            sql = (f"{SQL_HEADER}\nSELECT * FROM (SELECT rowid AS _position, * FROM {TABLE_NAME} ORDER BY rowid DESC "
+                   f"LIMIT {n}) ORDER BY _position;")
+            return Refinement('top_n', sql, f"Kept the last {n} of the previous {total} rows")
+        return Refinement('top_n', _select(previous, limit=n), f"Kept the first {n} of the previous {total} rows")
+
+    condition = _FILTER_LEAD.sub('', text)
+    match = next(filter(None, (pattern.match(condition) for pattern in _FILTERS)), None)
+    if match:
+        index = resolve_column(match.group('col'), previous, numeric_only=True)
+        if index is not None:
+            operator = _COMPARISONS[match.group('op')]
+            value = match.group('value')
+            where = f"{quote_identifier(columns[index])} {operator} {value}"
+            return Refinement('filter', _select(previous, where=where),
+                              f"Kept the rows of the previous result where {column_label(previous.headers[index])} "
+                              f"{operator} {value}")
+
+    for pattern, negate in ((_MATCH, False), (_EXCLUDE, True)):
+        match = pattern.match(text)
+        if not match:
+            continue
+        found = _matching_values(match.group('phrase'), previous)
+        if found is None:
+            return None
+        index, values = found
+        column = quote_identifier(columns[index])
+        where = f"{column} {'NOT IN' if negate else 'IN'} ({', '.join(quote_literal(v) for v in values)})"
+        if negate:
+            # NOT IN is never true for NULL, and a row with no value is not one the user asked to remove
+            where = f"({where} OR {column} IS NULL)"
+        listed = ", ".join(format_value(v) for v in values[:3]) + (" ..." if len(values) > 3 else "")
+        return Refinement('exclude' if negate else 'match', _select(previous, where=where),
+                          f"{'Removed' if negate else 'Kept'} the rows of the previous result whose "
+                          f"{column_label(previous.headers[index])} is {listed}")
+    return None
+
+
+def refinement_answer(refinement: Refinement, rows: list, headers: list, total: int) -> str:
+    """A short answer sentence for a refined result; the table shows the rows themselves."""
+    if not rows:
+        return f"{refinement.description}: no rows are left."
+    local = summarise_locally(rows, headers) if config.SUMMARY_RULES_ENABLED else None
+    if refinement.kind in ('count', 'aggregate'):
+        return local or f"{refinement.description}."
+    text = f"{refinement.description}."
+    if refinement.kind in ('filter', 'match', 'exclude'):
+        text = f"{refinement.description} ({len(rows)} of {total} rows)."
+    return f"{text} {local}" if local else text
+
+
+class SessionResults:
+    """The last result of each session, least recently used evicted first."""
+
+    def __init__(self, max_sessions: int = config.RESULT_REFINEMENT_MAX_SESSIONS,
+                 max_rows: int = config.RESULT_REFINEMENT_MAX_ROWS):
+        self.max_sessions = max(1, max_sessions)
+        self.max_rows = max_rows
+        self._results: OrderedDict[str, PreviousResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self.refined = 0
+        self.passed_through = 0
+
+    def get(self, session_id: str) -> Optional[PreviousResult]:
+        with self._lock:
+            previous = self._results.get(session_id)
+            if previous is not None:
+                self._results.move_to_end(session_id)
+            return previous
+
+    def put(self, session_id: str, question: str, sql: str, rows: list, headers: list):
+        """
+        Keeps a result as the session's previous result. An empty result leaves the previous one in place, so a
+        filter that matched nothing can be retried; one over max_rows is not kept.
+        """
+        if not rows:
+            return
+        if len(rows) > self.max_rows:
+            self.drop(session_id)
+            return
+        evicted = []
+        with self._lock:
+            replaced = self._results.pop(session_id, None)
+            if replaced is not None:
+                evicted.append(replaced)
+            self._results[session_id] = PreviousResult(question, sql, rows, headers)
+            while len(self._results) > self.max_sessions:
+                evicted.append(self._results.popitem(last=False)[1])
+        for previous in evicted:
+            previous.close()
+
+    def drop(self, session_id: str):
+        with self._lock:
+            previous = self._results.pop(session_id, None)
+        if previous is not None:
+            previous.close()
+
+    def refine(self, session_id: str, question: str) -> Optional[tuple[Refinement, list, list, str]]:
+        """
+        Answers a follow-up from the session's previous result: (refinement, rows, headers, answer), or None
+        if there is no previous result or the question is not a refinement of it.
+        """
+        previous = self.get(session_id)
+        if previous is None:
+            return None
+        start = time.perf_counter()
+        refinement = classify_follow_up(question, previous)
+        if refinement is None:
+            self.passed_through += 1
+            return None
+        try:
+            rows, headers = previous.query(refinement.sql)
+        except sqlite3.Error as e:
+            logger.warning(f"Refinement '{refinement.kind}' of the previous result failed, using the full pipeline: {e}")
+            self.passed_through += 1
+            return None
+        if headers and headers[0] == '_position':
+            rows, headers = [row[1:] for row in rows], headers[1:]
+        self.refined += 1
+        logger.info(f"Answered follow-up as a '{refinement.kind}' of the previous result ({len(previous.rows)} -> "
+                    f"{len(rows)} rows) in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return refinement, rows, headers, refinement_answer(refinement, rows, headers, len(previous.rows))
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions = len(self._results)
+        return {'sessions': sessions, 'refined': self.refined, 'passed_through': self.passed_through}
+
+
+_session_results: Optional[SessionResults] = None
+_session_results_lock = threading.Lock()
+
+
+def get_session_results() -> Optional[SessionResults]:
+    """Returns the process-wide store of previous results, or None if refinement is disabled in config."""
+    global _session_results
+    if not config.RESULT_REFINEMENT_ENABLED:
+        return None
+    with _session_results_lock:
+        if _session_results is None:
+            _session_results = SessionResults()
+        return _session_results
@@ -0,0 +1,191 @@
+# src/text_to_sql/result_summary.py
+"""
+Rule-based answers for results that do not need a model to describe them: a single value, a single row, or
+a short ranking (a label column plus numbers, ordered by the first numeric column). Anything wider, such as
+several label columns, an unordered list or a season-by-season table, returns None and goes to the LLM
+summariser.
+
+For the LLM path, encode_results renders the result compactly: the header once, '|'-separated rows with
+numbers rounded, and for long results only the first rows plus min/max/mean of every numeric column.
+
+Summary latency is recorded per path ('rules' or 'llm') so the two distributions can be compared.
+"""
+import math
+import logging
+import datetime
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Optional
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+# How many rows a ranked answer names explicitly
+RANKED_NAMED_ROWS = 3
+# Most columns a single-row answer lists
+SINGLE_ROW_MAX_COLUMNS = 8
+LATENCY_SAMPLES = 1000
+# Numeric columns that identify or date a row rather than measure it, so they never rank a result
+KEY_COLUMN_SUFFIXES = ('year', 'season', '_id', 'date')
+ENCODING_DELIMITER = "|"
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def format_value(value) -> str:
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, int):
+        return f"{value:,}" if abs(value) >= 10000 else str(value)
+    if isinstance(value, (float, Decimal)):
+        number = float(value)
+        if math.isnan(number):
+            return "none"
+        if number.is_integer():
+            return format_value(int(number))
+        return f"{number:,.2f}".rstrip('0').rstrip('.')
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def column_label(header: str) -> str:
+    """'sixes_per_inning' -> 'sixes per inning'."""
+    return str(header).replace('_', ' ').strip().lower()
+
+
+def _numeric_columns(rows: list, headers: list) -> list[int]:
+    return [i for i in range(len(headers))
+            if all(row[i] is None or is_number(row[i]) for row in rows) and any(is_number(row[i]) for row in rows)]
+
+
+def is_key_column(header: str) -> bool:
+    name = str(header).strip().lower()
+    return name == 'id' or name.endswith(KEY_COLUMN_SUFFIXES)
+
+
+def _is_ordered(values: list) -> bool:
+    values = [float(v) for v in values if v is not None]
+    return (len(values) > 1 and (all(a >= b for a, b in zip(values, values[1:]))
+                                 or all(a <= b for a, b in zip(values, values[1:]))))
+
+
+def summarise_scalar(rows: list, headers: list) -> Optional[str]:
+    if len(rows) != 1 or len(headers) != 1:
+        return None
+    return f"{column_label(headers[0]).capitalize()}: {format_value(rows[0][0])}."
+
+
+def summarise_single_row(rows: list, headers: list) -> Optional[str]:
+    if len(rows) != 1:
+        return None
+    row = rows[0]
+    numeric = _numeric_columns(rows, headers)
+    if not numeric or len(headers) > SINGLE_ROW_MAX_COLUMNS + 1:
+        return None
+    # The first text column names what the row is about; every other column is listed as a figure
+    label = next((i for i in range(len(headers)) if i not in numeric), None)
+    figures = ", ".join(f"{column_label(headers[i])} {format_value(row[i])}" for i in range(len(headers)) if i != label)
+    if label is not None:
+        return f"{format_value(row[label])}: {figures}."
+    return f"{figures[0].upper()}{figures[1:]}."
+
+
+def summarise_ranking(rows: list, headers: list, max_rows: int) -> Optional[str]:
+    if not 1 < len(rows) <= max_rows:
+        return None
+    numeric = _numeric_columns(rows, headers)
+    keys = [i for i in numeric if is_key_column(headers[i])]
+    # A season or id that changes from row to row makes this a per-season (or per-match) table, not a ranking
+    if any(len({row[i] for row in rows}) > 1 for i in keys):
+        return None
+    numeric = [i for i in numeric if i not in keys]
+    labels = [i for i in range(len(headers)) if i not in numeric and i not in keys]
+    if len(labels) != 1 or not numeric:
+        return None
+    measure = next((i for i in numeric if _is_ordered([row[i] for row in rows])), None)
+    # The ranking has to be by the first numeric column, otherwise we cannot tell what the order means
+    if measure != numeric[0]:
+        return None
+    label, unit = labels[0], column_label(headers[measure])
+    leader = rows[0]
+    text = f"{format_value(leader[label])} leads with {format_value(leader[measure])} {unit}"
+    others = [f"{format_value(row[label])} ({format_value(row[measure])})" for row in rows[1:RANKED_NAMED_ROWS]]
+    if others:
+        text += ", followed by " + (" and ".join(others) if len(others) <= 2 else
+                                    ", ".join(others[:-1]) + " and " + others[-1])
+    if len(rows) > RANKED_NAMED_ROWS:
+        text += f". All {len(rows)} are listed in the table"
+    return text + "."
+
+
+def summarise_locally(rows: list, headers: list, max_rows: int = config.SUMMARY_RULES_MAX_ROWS) -> Optional[str]:
+    """The answer sentence for a scalar, single-row or small ranked result, or None if the LLM should write it."""
+    if not rows or not headers or any(len(row) != len(headers) for row in rows):
+        return None
+    return (summarise_scalar(rows, headers) or summarise_single_row(rows, headers)
+            or summarise_ranking(rows, headers, max_rows))
+
+
+# --- Compact encoding for the LLM summariser ---
+def compact_value(value) -> str:
+    """Like format_value, but without thousands separators and with the delimiter kept out of text."""
+    if value is None:
+        return ""
+    if is_number(value):
+        return format_value(value).replace(",", "")
+    return format_value(value).replace(ENCODING_DELIMITER, "/").replace("\n", " ")
+
+
+def encode_results(rows: list, headers: list, top_k: int = config.SUMMARY_PROMPT_TOP_K) -> str:
+    """
+    The header once and one delimited line per row. Results longer than `top_k` rows keep the first `top_k`
+    (the query's own order, so a ranking keeps its leaders) followed by per-column statistics over all rows.
+    """
+    lines = [ENCODING_DELIMITER.join(str(h) for h in headers)]
+    shown = rows if len(rows) <= top_k else rows[:top_k]
+    lines.extend(ENCODING_DELIMITER.join(compact_value(v) for v in row) for row in shown)
+    if len(rows) > len(shown):
+        lines.append(f"({len(rows) - len(shown)} more rows; statistics over all {len(rows)} rows:)")
+        for i in _numeric_columns(rows, headers):
+            values = [float(row[i]) for row in rows if row[i] is not None]
+            lines.append(f"{headers[i]}: min {compact_value(min(values))}, max {compact_value(max(values))}, "
+                         f"mean {compact_value(sum(values) / len(values))}")
+    return "\n".join(lines)
+
+
+# --- Latency per summary path ---
+_latencies: dict[str, deque] = {}
+_latencies_lock = threading.Lock()
+
+
+def record_latency(path: str, seconds: float):
+    with _latencies_lock:
+        _latencies.setdefault(path, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def latency_stats() -> dict[str, dict]:
+    """{path: {'count', 'mean_ms', 'p50_ms', 'p95_ms'}} over the most recent summaries."""
+    with _latencies_lock:
+        samples = {path: sorted(values) for path, values in _latencies.items() if values}
+    return {path: {'count': len(values),
+                   'mean_ms': sum(values) / len(values) * 1000,
+                   'p50_ms': _percentile(values, 0.5) * 1000,
+                   'p95_ms': _percentile(values, 0.95) * 1000}
+            for path, values in samples.items()}
+
+
+def log_latency_stats():
+    for path, s in latency_stats().items():
+        logger.info(f"Summary latency ({path}): {s['count']} summaries, mean {s['mean_ms']:.1f} ms, "
+                    f"p50 {s['p50_ms']:.1f} ms, p95 {s['p95_ms']:.1f} ms.")
@@ -0,0 +1,174 @@
+# src/text_to_sql/schema_cache.py
+"""
+Schema text for the SQL agent, reflected once and cached in memory and on disk.
+
+Reflecting the schema with SQLDatabase.from_uri(...).get_table_info() opens a new SQLAlchemy engine,
+inspects every table and samples rows from each, which used to happen on every question. The result is
+now keyed by a fingerprint of the sql/DDL files plus a catalog version (a hash of the live column
+definitions), so it is rebuilt only when the schema actually changes.
+"""
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+import pathlib
+import threading
+from typing import Callable, Optional
+
+from src import config
+from src import db_utils
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+DDL_DIRECTORY = PROJECT_ROOT / "sql" / "DDL"
+
+# Internal/ETL tables the agent should never see
+AGENT_IGNORED_TABLES = ['people', 'stg_match_data', 'officials', 'player_last_appearance', 'enrichment_jobs', 'etl_runs',
+                        'query_log']
+
+# Changes whenever a table or column in the public schema is added, dropped, renamed or retyped
+CATALOG_VERSION_QUERY = """
+SELECT md5(COALESCE(string_agg(c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod),
+                               ',' ORDER BY c.relname, a.attnum), ''))
+FROM pg_catalog.pg_attribute a
+JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'm', 'p') AND a.attnum > 0 AND NOT a.attisdropped;
+"""
+
+
+def ddl_fingerprint(ddl_directory: pathlib.Path = DDL_DIRECTORY) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(ddl_directory, "*.sql"))):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def catalog_version() -> str:
+    conn = None
+    try:
+        conn = db_utils.get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute(CATALOG_VERSION_QUERY)
+            return cursor.fetchone()[0]
+    finally:
+        if conn:
+            conn.close()
+
+
+def reflect_table_info(ignore_tables: list[str]) -> dict[str, str]:
+    """Reflects the schema through LangChain once and returns {table_name: CREATE TABLE text + sample rows}."""
+    from langchain_community.utilities import SQLDatabase
+
+    db = SQLDatabase.from_uri(db_utils.get_sqlalchemy_uri(), ignore_tables=ignore_tables)
+    return {table: db.get_table_info(table_names=[table]) for table in sorted(db.get_usable_table_names())}
+
+
+class SchemaCache:
+    """
+    Per-table schema info, held in memory and persisted under `cache_dir` as <fingerprint>.json.
+    The fingerprint is re-checked at most every `check_interval_seconds`; between checks a lookup is just
+    a dictionary access.
+    """
+
+    def __init__(self, ignore_tables: list[str] = AGENT_IGNORED_TABLES,
+                 cache_dir: str = config.SCHEMA_CACHE_DIR,
+                 check_interval_seconds: int = config.SCHEMA_CACHE_CHECK_SECONDS,
+                 reflect_fn: Callable[[list[str]], dict[str, str]] = reflect_table_info,
+                 version_fn: Callable[[], str] = catalog_version):
+        self.ignore_tables = list(ignore_tables)
+        self.cache_dir = cache_dir
+        self.check_interval_seconds = check_interval_seconds
+        self.reflect_fn = reflect_fn
+        self.version_fn = version_fn
+
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._table_info: Optional[dict[str, str]] = None
+        self._schema_text: Optional[str] = None
+        self._checked_at = 0.0
+
+    def fingerprint(self) -> str:
+        key_material = json.dumps({
+            'ddl': ddl_fingerprint(),
+            'catalog': self.version_fn(),
+            'ignore_tables': sorted(self.ignore_tables),
+        }, sort_keys=True)
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()[:32]
+
+    def get_table_info(self) -> dict[str, str]:
+        with self._lock:
+            if self._table_info is None or time.monotonic() - self._checked_at >= self.check_interval_seconds:
+                self._refresh()
+            return self._table_info
+
+    def get_schema_text(self) -> str:
+        """The full schema text, in the same format as SQLDatabase.get_table_info()."""
+        with self._lock:
+            if self._table_info is None or time.monotonic() - self._checked_at >= self.check_interval_seconds:
+                self._refresh()
+            return self._schema_text
+
+    def invalidate(self):
+        with self._lock:
+            self._table_info, self._schema_text, self._fingerprint = None, None, None
+
+    def _refresh(self):
+        start = time.perf_counter()
+        fingerprint = self.fingerprint()
+        self._checked_at = time.monotonic()
+        if fingerprint == self._fingerprint:
+            return
+
+        path = os.path.join(self.cache_dir, f"{fingerprint}.json")
+        table_info = self._load(path)
+        source = "disk cache"
+        if table_info is None:
+            table_info = self.reflect_fn(self.ignore_tables)
+            self._save(path, table_info)
+            source = "database reflection"
+
+        self._fingerprint = fingerprint
+        self._table_info = table_info
+        self._schema_text = "\n\n".join(table_info[table] for table in sorted(table_info))
+        logger.info(f"Loaded schema for {len(table_info)} tables from {source} "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms (fingerprint {fingerprint[:12]}).")
+
+    @staticmethod
+    def _load(path: str) -> Optional[dict[str, str]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['table_info']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable schema cache file {path}: {e}")
+            return None
+
+    def _save(self, path: str, table_info: dict[str, str]):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created_at': time.time(), 'table_info': table_info}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write schema cache file {path}: {e}")
+
+
+_schema_cache: Optional[SchemaCache] = None
+_schema_cache_lock = threading.Lock()
+
+
+def get_schema_cache() -> SchemaCache:
+    """Returns the process-wide schema cache for the SQL agent."""
+    global _schema_cache
+    with _schema_cache_lock:
+        if _schema_cache is None:
+            _schema_cache = SchemaCache()
+        return _schema_cache
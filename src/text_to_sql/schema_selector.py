@@ -0,0 +1,236 @@
+# src/text_to_sql/schema_selector.py
+"""
+Per-question schema pruning for the SQL agent.
+
+A keyword index over every table (name, columns, DDL comments and a few cricket synonyms) and the foreign-key
+graph are built once from the sql/DDL files. For each question the best-matching tables are picked and then
+joined up along the shortest foreign-key paths, so the prompt carries only those tables plus the ones needed
+to join them, instead of the whole schema.
+"""
+import os
+import re
+import glob
+import math
+import logging
+import pathlib
+import threading
+from collections import Counter, deque
+from typing import Optional
+
+from src import config
+from src.text_to_sql.example_index import PLAYER_LOOKUP_TERM, question_terms, tokenize
+from src.text_to_sql.schema_cache import DDL_DIRECTORY, get_schema_cache
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLE = re.compile(r'CREATE TABLE (?:IF NOT EXISTS )?(?:public\.)?(\w+)\s*\((.*?)\n\)', re.IGNORECASE | re.DOTALL)
+_FOREIGN_KEY = re.compile(r'FOREIGN KEY \((\w+)\)\s+REFERENCES (?:public\.)?(\w+) \((\w+)\)', re.IGNORECASE)
+_TABLE_COMMENT = re.compile(r"COMMENT ON TABLE (?:public\.)?(\w+)\s+IS '((?:[^']|'')*)'", re.IGNORECASE)
+_COLUMN_COMMENT = re.compile(r"COMMENT ON COLUMN (?:public\.)?(\w+)\.(\w+)\s+IS '((?:[^']|'')*)'", re.IGNORECASE)
+_COLUMN_LINE = re.compile(r'^\s*"?(\w+)"?\s+[a-z]', re.IGNORECASE)
+_YEAR = re.compile(r'\b(19|20)\d{2}\b')
+
+# Words users say that do not appear in the DDL of the table that answers them
+TABLE_SYNONYMS = {
+    'deliveries': "ball balls over overs six four boundary boundaries strike rate economy dot score scored runs "
+                  "century centuries fifty batter batsman batting bowler bowling extras wide noball death",
+    'wickets': "wicket dismissal dismissed out bowled caught lbw stumped hat trick",
+    'wicketfielders': "catch catches fielder fielding stumping keeper",
+    'matches': "season year toss win won wins result final playoff margin match",
+    'venues': "venue stadium ground city",
+    'teams': "team teams franchise side against",
+    'players': "player players batter batsman bowler name age born nationality hand style",
+    'innings': "chase chasing target defend super inning first second",
+    'powerplays': "powerplay",
+    'matchofficialsassignment': "umpire referee official",
+    'playerofmatchawards': "player of the match award potm",
+    'replacements': "substitute impact replacement",
+    'inningsdelays': "delay delays rain interruption",
+    'inningstimings': "start time timing duration finish",
+    'matchplayers': "squad lineup appearance appearances playing xi",
+}
+
+# Weight of a keyword by where it came from
+TABLE_NAME_WEIGHT = 3.0
+SYNONYM_WEIGHT = 2.0
+COLUMN_WEIGHT = 1.0
+COMMENT_WEIGHT = 0.25
+# The best table has to score at least this before the schema is pruned. Below it the match rests on a word
+# or two, too little to be sure which facts are needed (e.g. "head to head" only matching innings), so the
+# full schema is used instead
+CONFIDENT_SCORE = 10.0
+
+
+def parse_ddl(ddl_directory: pathlib.Path = DDL_DIRECTORY) -> tuple[dict[str, dict], list[tuple[str, str, str, str]]]:
+    """
+    Reads the DDL files into {table: {'columns': [...], 'comment': str, 'column_comments': {col: str}}} and
+    a list of foreign keys as (table, column, referenced_table, referenced_column).
+    """
+    tables, foreign_keys = {}, []
+    for path in sorted(glob.glob(os.path.join(ddl_directory, "*.sql"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        for name, body in _CREATE_TABLE.findall(ddl):
+            table = name.lower()
+            columns = []
+            for line in body.splitlines():
+                match = _COLUMN_LINE.match(line)
+                if match and match.group(1).upper() not in ('CONSTRAINT', 'PRIMARY', 'FOREIGN', 'UNIQUE', 'CHECK'):
+                    columns.append(match.group(1).lower())
+            tables[table] = {'columns': columns, 'comment': "", 'column_comments': {}}
+            for column, ref_table, ref_column in _FOREIGN_KEY.findall(body):
+                foreign_keys.append((table, column.lower(), ref_table.lower(), ref_column.lower()))
+        for name, comment in _TABLE_COMMENT.findall(ddl):
+            if name.lower() in tables:
+                tables[name.lower()]['comment'] = comment.replace("''", "'")
+        for name, column, comment in _COLUMN_COMMENT.findall(ddl):
+            if name.lower() in tables:
+                tables[name.lower()]['column_comments'][column.lower()] = comment.replace("''", "'")
+    return tables, foreign_keys
+
+
+class SchemaSelector:
+    """Keyword index and foreign-key graph over the DDL tables; picks the tables relevant to a question."""
+
+    def __init__(self, tables: dict[str, dict], foreign_keys: list[tuple[str, str, str, str]]):
+        self.tables = tables
+        self.foreign_keys = foreign_keys
+        self.graph: dict[str, set[str]] = {table: set() for table in tables}
+        for table, _, ref_table, _ in foreign_keys:
+            if table in self.graph and ref_table in self.graph and table != ref_table:
+                self.graph[table].add(ref_table)
+                self.graph[ref_table].add(table)
+        # Dimension tables (players, teams, venues) reference nothing; joining two facts through one is never meant
+        self.dimensions = {table for table in tables if not any(fk[0] == table for fk in foreign_keys)}
+
+        self.keywords: dict[str, Counter] = {}
+        self.names: dict[str, set[str]] = {}
+        for table, info in tables.items():
+            weights = Counter()
+            names = set(tokenize(table.replace('_', ' ') + " " + TABLE_SYNONYMS.get(table, "")))
+            if table == 'players':
+                names.add(PLAYER_LOOKUP_TERM)
+            for term in tokenize(table.replace('_', ' ')):
+                weights[term] += TABLE_NAME_WEIGHT
+            for term in names:
+                weights[term] = max(weights[term], SYNONYM_WEIGHT)
+            for term in tokenize(" ".join(info['columns'])):
+                weights[term] += COLUMN_WEIGHT
+            for term in set(tokenize(info['comment'] + " " + " ".join(info['column_comments'].values()))):
+                weights[term] += COMMENT_WEIGHT
+            self.keywords[table] = weights
+            self.names[table] = names
+
+        n = len(tables)
+        document_frequency = Counter(term for weights in self.keywords.values() for term in weights)
+        self.idf = {term: math.log(1 + n / df) for term, df in document_frequency.items()}
+
+    @staticmethod
+    def terms(question: str) -> set[str]:
+        terms = set(question_terms(question))
+        if _YEAR.search(question):
+            terms.add('season')
+        return terms
+
+    def scores(self, question: str, tables: Optional[set[str]] = None) -> dict[str, float]:
+        terms = self.terms(question)
+        candidates = tables if tables is not None else self.tables.keys()
+        return {
+            table: sum(self.keywords[table].get(term, 0.0) * self.idf.get(term, 0.0) for term in terms)
+            for table in candidates if table in self.keywords
+        }
+
+    def join_path(self, start: str, targets: set[str], allowed: set[str]) -> list[str]:
+        """
+        Shortest foreign-key path (breadth first) from `start` to the nearest table in `targets`. Dimension tables
+        can end a path but never sit in the middle of one.
+        """
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            table = queue.popleft()
+            if table in targets:
+                path = []
+                while table is not None:
+                    path.append(table)
+                    table = previous[table]
+                return path[::-1]
+            if table != start and table in self.dimensions:
+                continue
+            for neighbour in sorted(self.graph.get(table, ())):
+                if neighbour in allowed and neighbour not in previous:
+                    previous[neighbour] = table
+                    queue.append(neighbour)
+        return []
+
+    def select(self, question: str, available_tables: set[str],
+               max_tables: int = config.SQL_SCHEMA_MAX_TABLES) -> list[str]:
+        """
+        The tables to show for `question`: every table scoring at least a third of the best score (up to
+        `max_tables`) plus any dimension table the question names outright (so ids can be shown as names),
+        connected through the foreign-key tables needed to join them, plus every dimension table those tables
+        reference. Returns [] when nothing matches with confidence, meaning the caller should fall back to the
+        full schema.
+        """
+        scores = self.scores(question, available_tables)
+        ranked = sorted((t for t, s in scores.items() if s > 0), key=lambda t: scores[t], reverse=True)
+        if not ranked or scores[ranked[0]] < CONFIDENT_SCORE:
+            return []
+        threshold = scores[ranked[0]] / 3
+        seeds = [t for t in ranked if scores[t] >= threshold][:max_tables]
+        terms = self.terms(question)
+        seeds += [t for t in ranked if t in self.dimensions and t not in seeds and self.names[t] & terms]
+
+        selected = {seeds[0]}
+        for seed in seeds[1:]:
+            if seed in selected:
+                continue
+            path = self.join_path(seed, selected, available_tables)
+            selected.update(path or [seed])
+        # Facts only carry ids; the players, teams and venues they point at are needed to answer with names
+        selected.update(ref_table for table, _, ref_table, _ in self.foreign_keys
+                        if table in selected and ref_table in self.dimensions and ref_table in available_tables)
+        return sorted(selected)
+
+    def join_hints(self, tables: list[str]) -> list[str]:
+        included = set(tables)
+        return [f"{table}.{column} -> {ref_table}.{ref_column}"
+                for table, column, ref_table, ref_column in self.foreign_keys
+                if table in included and ref_table in included]
+
+
+_schema_selector: Optional[SchemaSelector] = None
+_schema_selector_lock = threading.Lock()
+
+
+def get_schema_selector() -> SchemaSelector:
+    """Returns the process-wide selector, parsing the DDL files on first use."""
+    global _schema_selector
+    with _schema_selector_lock:
+        if _schema_selector is None:
+            _schema_selector = SchemaSelector(*parse_ddl())
+            logger.info(f"Indexed {len(_schema_selector.tables)} tables and "
+                        f"{len(_schema_selector.foreign_keys)} foreign keys from the DDL files.")
+        return _schema_selector
+
+
+def select_schema_text(question: str, table_info: Optional[dict[str, str]] = None) -> tuple[str, list[str]]:
+    """
+    Schema text for the prompt, limited to the tables relevant to `question`, and the tables chosen.
+    `table_info` defaults to the cached reflection, so ignored tables never come back through a join path.
+    Falls back to every table when pruning is disabled or nothing in the question matches.
+    """
+    if table_info is None:
+        table_info = get_schema_cache().get_table_info()
+    tables = []
+    if config.SQL_SCHEMA_PRUNING_ENABLED:
+        selector = get_schema_selector()
+        tables = selector.select(question, set(table_info))
+    if not tables:
+        return "\n\n".join(table_info[table] for table in sorted(table_info)), sorted(table_info)
+
+    schema_text = "\n\n".join(table_info[table] for table in tables)
+    hints = selector.join_hints(tables)
+    if hints:
+        schema_text += "\n\n/* Join paths:\n" + "\n".join(hints) + "\n*/"
+    return schema_text, tables
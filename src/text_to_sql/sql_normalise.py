@@ -0,0 +1,106 @@
+# src/text_to_sql/sql_normalise.py
+"""
+Canonical forms of generated SQL, so that trivially different queries share cache entries.
+
+canonicalise_sql drops comments, collapses whitespace, lower-cases everything outside string literals and
+quoted identifiers, drops a trailing semicolon and renames table aliases to t1, t2, ... in order of
+appearance, both where they are defined and in alias.column references. Column aliases are kept, even one
+that shares its name with a table alias, since they name the result columns.
+"""
+import re
+import hashlib
+
+_TOKEN = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>(?:[eE])?'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*")
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<space>\s+)
+  | (?P<symbol>::|<=|>=|<>|!=|\|\||.)
+""", re.VERBOSE | re.DOTALL)
+
+# Words that can follow a table name without being its alias
+_NOT_ALIASES = {
+    'on', 'using', 'where', 'group', 'order', 'limit', 'offset', 'having', 'join', 'inner', 'left', 'right',
+    'full', 'cross', 'natural', 'union', 'intersect', 'except', 'window', 'lateral', 'fetch', 'for', 'as',
+    'select', 'from', 'and', 'or', 'not', 'when', 'then', 'else', 'end', 'returning', 'tablesample', 'with',
+}
+
+
+def tokenize_sql(sql: str) -> list[tuple[str, str]]:
+    """(kind, text) tokens without whitespace and comments; words are lower-cased."""
+    tokens = []
+    for match in _TOKEN.finditer(sql or ""):
+        kind = match.lastgroup
+        if kind in ('comment', 'space'):
+            continue
+        text = match.group()
+        tokens.append((kind, text.lower() if kind == 'word' else text))
+    return tokens
+
+
+def strip_sql_comments(sql: str) -> str:
+    """The SQL with its comments removed and everything else, including string literals, left untouched."""
+    text = "".join(m.group() for m in _TOKEN.finditer(sql or "") if m.lastgroup != 'comment')
+    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip()).strip()
+
+
+def _table_aliases(tokens: list[tuple[str, str]]) -> tuple[dict[str, str], set[int], set[int]]:
+    """
+    Maps each table alias introduced by FROM/JOIN (or a comma in a FROM list) to t1, t2, ... and returns
+    the positions where the aliases are defined and of the optional AS keywords in front of them, which are
+    dropped.
+    """
+    aliases, definitions, optional_as = {}, set(), set()
+    for i, (kind, text) in enumerate(tokens):
+        if not (kind == 'word' and text in ('from', 'join') or (kind == 'symbol' and text == ',')):
+            continue
+        j = i + 1
+        # table name, possibly schema-qualified
+        if j >= len(tokens) or tokens[j][0] not in ('word', 'quoted'):
+            continue
+        j += 1
+        while j + 1 < len(tokens) and tokens[j] == ('symbol', '.') and tokens[j + 1][0] in ('word', 'quoted'):
+            j += 2
+        as_position = None
+        if j < len(tokens) and tokens[j] == ('word', 'as'):
+            as_position = j
+            j += 1
+        if j < len(tokens) and tokens[j][0] == 'word' and tokens[j][1] not in _NOT_ALIASES:
+            # A comma only starts a table reference if the alias is used qualified (t.col) somewhere
+            alias = tokens[j][1]
+            if text == ',' and not any(tokens[k] == ('word', alias) and tokens[k + 1] == ('symbol', '.')
+                                       for k in range(len(tokens) - 1)):
+                continue
+            aliases.setdefault(alias, f"t{len(aliases) + 1}")
+            definitions.add(j)
+            if as_position is not None:
+                optional_as.add(as_position)
+    return aliases, definitions, optional_as
+
+
+def canonicalise_sql(sql: str) -> str:
+    tokens = tokenize_sql(sql)
+    while tokens and tokens[-1] == ('symbol', ';'):
+        tokens.pop()
+    aliases, definitions, optional_as = _table_aliases(tokens)
+    out: list[str] = []
+    for i, (kind, text) in enumerate(tokens):
+        if i in optional_as:
+            continue
+        # Only the alias definition itself and alias.column references; a column alias of the same name is kept
+        if kind == 'word' and text in aliases:
+            qualified = i + 1 < len(tokens) and tokens[i + 1] == ('symbol', '.')
+            if qualified or i in definitions:
+                text = aliases[text]
+        # Single spaces between tokens, none around dots, after '(' or before ',' and ')'
+        if out and not (text in ('.', ',', ')') and kind == 'symbol') and out[-1] not in ('.', '('):
+            out.append(" ")
+        out.append(text)
+    return "".join(out)
+
+
+def sql_hash(sql: str) -> str:
+    """Short stable hash of the canonical SQL."""
+    return hashlib.sha256(canonicalise_sql(sql).encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,73 @@
+# tests/test_ai_call_log.py
+import glob
+import os
+
+import pytest
+
+from src import ai_call_log
+from src import config
+
+
+def make_log(tmp_path, **kwargs):
+    options = dict(log_dir=str(tmp_path), segment_bytes=1024 * 1024, rotate_seconds=3600, max_segments=10)
+    options.update(kwargs)
+    return ai_call_log.AICallLog(**options)
+
+
+def segments(tmp_path):
+    return sorted(glob.glob(os.path.join(str(tmp_path), f"{ai_call_log.SEGMENT_PREFIX}*.jsonl.gz")))
+
+
+def test_records_are_readable_after_close(tmp_path):
+    log = make_log(tmp_path)
+    for i in range(3):
+        log.write({'role': 'sql', 'n': i})
+    log.close()
+    assert [r['n'] for r in ai_call_log.read_call_log(str(tmp_path))] == [0, 1, 2]
+
+
+def test_segments_rotate_by_size_and_old_ones_are_pruned(tmp_path):
+    log = make_log(tmp_path, segment_bytes=200, max_segments=2)
+    for i in range(20):
+        log.write({'role': 'sql', 'padding': "x" * 80, 'n': i})
+    log.close()
+
+    assert len(segments(tmp_path)) == 2
+    kept = [r['n'] for r in ai_call_log.read_call_log(str(tmp_path))]
+    assert kept == sorted(kept) and kept[-1] == 19
+
+
+def test_truncated_segments_are_read_up_to_the_last_complete_line(tmp_path):
+    log = make_log(tmp_path / "full")
+    for i in range(5000):
+        log.write({'n': i})
+    log.close()
+    with open(segments(tmp_path / "full")[0], 'rb') as f:
+        data = f.read()
+    os.makedirs(tmp_path / "crashed")
+    with open(os.path.join(str(tmp_path / "crashed"), f"{ai_call_log.SEGMENT_PREFIX}0.jsonl.gz"), 'wb') as f:
+        f.write(data[:len(data) // 2])
+
+    recovered = [r['n'] for r in ai_call_log.read_call_log(str(tmp_path / "crashed"))]
+    assert recovered and recovered == list(range(len(recovered)))
+
+
+@pytest.mark.parametrize("include_text", [False, True])
+def test_log_call_keeps_texts_only_when_configured(tmp_path, monkeypatch, include_text):
+    log = make_log(tmp_path)
+    monkeypatch.setattr(config, 'AI_CALL_LOG_INCLUDE_TEXT', include_text)
+    monkeypatch.setattr(ai_call_log, 'get_call_log', lambda: log)
+
+    ai_call_log.log_call(provider='stub', role='sql', model='m', prompt_sha256='abc', latency_seconds=0.25,
+                         prompt_tokens=10, completion_tokens=5, outcome='error', error="x" * 1000,
+                         prompt="the prompt", response="the answer")
+    log.close()
+
+    [record] = ai_call_log.read_call_log(str(tmp_path))
+    assert record['latency_ms'] == 250.0 and len(record['error']) == 500
+    assert ('prompt' in record) is include_text
+
+
+def test_disabled_log_is_never_created(monkeypatch):
+    monkeypatch.setattr(config, 'AI_CALL_LOG_ENABLED', False)
+    assert ai_call_log.get_call_log() is None
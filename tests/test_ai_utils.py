@@ -0,0 +1,146 @@
+# tests/test_ai_utils.py
+import pytest
+
+from src import ai_utils
+
+
+class FakeClock:
+    """Replaces the time module in ai_utils: sleeping just moves the clock on."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ai_utils, 'time', clock)
+    return clock
+
+
+def test_requests_within_the_budget_do_not_wait(clock):
+    limiter = ai_utils.RateLimiter(requests_per_minute=3)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+
+def test_request_over_the_budget_waits_for_a_refill(clock):
+    limiter = ai_utils.RateLimiter(requests_per_minute=60)
+    for _ in range(60):
+        limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_token_budget_is_enforced(clock):
+    limiter = ai_utils.RateLimiter(requests_per_minute=100, tokens_per_minute=600)
+    limiter.acquire(tokens=500)
+    limiter.acquire(tokens=200)
+    # 100 tokens short at 10 tokens per second
+    assert sum(clock.sleeps) == pytest.approx(10.0)
+
+
+def test_request_larger_than_the_token_budget_still_goes_through(clock):
+    limiter = ai_utils.RateLimiter(requests_per_minute=100, tokens_per_minute=600)
+    limiter.acquire(tokens=10_000)
+    assert clock.sleeps == []
+
+
+def test_rate_limiter_rejects_a_zero_budget():
+    with pytest.raises(ValueError):
+        ai_utils.RateLimiter(requests_per_minute=0)
+
+
+def test_quota_errors_are_retried_with_backoff(clock, monkeypatch):
+    monkeypatch.setattr(ai_utils.random, 'uniform', lambda low, high: high)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise QuotaError("429 Resource has been exhausted")
+        return "ok"
+    assert ai_utils.call_with_backoff(flaky, max_retries=5, base_delay=1.0) == "ok"
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_quota_errors_give_up_after_max_retries(clock):
+    def always_exhausted():
+        raise QuotaError("quota exceeded")
+    with pytest.raises(QuotaError):
+        ai_utils.call_with_backoff(always_exhausted, max_retries=2)
+    assert len(clock.sleeps) == 2
+
+
+def test_other_errors_are_not_retried(clock):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad prompt")
+    with pytest.raises(ValueError):
+        ai_utils.call_with_backoff(broken, max_retries=5)
+    assert calls == [1] and clock.sleeps == []
+
+
+def test_each_attempt_goes_through_the_limiter(clock):
+    acquired = []
+
+    class CountingLimiter:
+        def acquire(self, tokens=0):
+            acquired.append(tokens)
+    attempts = iter([QuotaError("429"), None])
+
+    def once_exhausted():
+        error = next(attempts)
+        if error:
+            raise error
+        return "ok"
+    ai_utils.call_with_backoff(once_exhausted, limiter=CountingLimiter(), tokens=42)
+    assert acquired == [42, 42]
+
+
+def split_into_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_json_array_elements_arrive_as_they_complete(size):
+    text = '```json\n[{"match_id": 1, "note": "a ] in text"}, {"match_id": 2}]\n```'
+    assert list(ai_utils.iter_json_array(split_into_chunks(text, size))) == [
+        {"match_id": 1, "note": "a ] in text"}, {"match_id": 2}]
+
+
+def test_truncated_stream_yields_the_complete_elements(caplog):
+    text = '[{"match_id": 1}, {"match_id": 2}, {"match_id": 3, "innings_1_st'
+    assert list(ai_utils.iter_json_array(split_into_chunks(text, 5))) == [{"match_id": 1}, {"match_id": 2}]
+    assert "without a closing ']'" in caplog.text
+
+
+def test_malformed_element_stops_parsing_but_consumes_the_stream():
+    consumed = []
+
+    def chunks():
+        for chunk in ['[{"a": 1}, {"b": oops}, ', '{"c": 3}]', ' trailing']:
+            consumed.append(chunk)
+            yield chunk
+    assert list(ai_utils.iter_json_array(chunks())) == [{"a": 1}]
+    assert len(consumed) == 3
+
+
+def test_stream_without_an_array_yields_nothing(caplog):
+    assert list(ai_utils.iter_json_array(["Sorry, ", "I cannot help with that."])) == []
+    assert "No JSON array" in caplog.text
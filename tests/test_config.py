@@ -0,0 +1,19 @@
+# tests/test_config.py
+import pytest
+
+from src import config
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", True), ("true", True), ("TRUE", True), ("yes", True), (" Yes ", True),
+    ("0", False), ("false", False), ("no", False), ("", False), ("on", False),
+])
+def test_flags_parse_the_same_way(monkeypatch, value, expected):
+    monkeypatch.setenv("SOME_FLAG", value)
+    assert config._env_flag("SOME_FLAG", not expected) is expected
+
+
+def test_unset_flag_uses_the_default(monkeypatch):
+    monkeypatch.delenv("SOME_FLAG", raising=False)
+    assert config._env_flag("SOME_FLAG", True) is True
+    assert config._env_flag("SOME_FLAG", False) is False
@@ -0,0 +1,73 @@
+# tests/test_enrich_player_data.py
+import json
+
+import pytest
+
+from src import llm_cache
+from src import llm_client
+from src.etl import etl_05_enrich_player_data as etl_05
+
+PLAYER = {'identifier': 'abc123', 'name': 'R Sharma'}
+VALID_ANSWER = {
+    "batting_hand": "Right-hand bat", "bowling_hand": "Right-arm", "bowling_style": "RFM",
+    "date_of_birth": "1987-04-30", "country": "India", "player_role": "Batsman", "full_name": "Rohit Sharma",
+}
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, 'get_response_cache', lambda: None)
+
+
+def stub_model(answer):
+    text = answer if isinstance(answer, str) else json.dumps(answer)
+    return llm_client.StubGenerativeModel(lambda prompt: text, latency_seconds=0, latency_jitter=0)
+
+
+def test_valid_single_answer_is_returned():
+    assert etl_05.get_player_details_from_ai(PLAYER, stub_model(VALID_ANSWER)) == VALID_ANSWER
+
+
+@pytest.mark.parametrize("answer", [
+    [VALID_ANSWER],
+    "Rohit Sharma",
+    '"Rohit Sharma"',
+    {**VALID_ANSWER, "bowling_style": "very fast"},
+    {key: value for key, value in VALID_ANSWER.items() if key != "country"},
+    {**VALID_ANSWER, "date_of_birth": "30/04/1987"},
+])
+def test_invalid_single_answer_fails_only_that_player(answer):
+    assert etl_05.get_player_details_from_ai(PLAYER, stub_model(answer)) is None
+
+
+def test_batch_answers_are_validated_per_player():
+    other = {'identifier': 'def456', 'name': 'M Sharma'}
+    answer = [{**VALID_ANSWER, 'identifier': 'abc123'}, {**VALID_ANSWER, 'identifier': 'def456', 'player_role': 'Coach'}]
+    results = etl_05.get_batch_details_from_ai([PLAYER, other], stub_model(answer))
+    assert list(results) == ['abc123']
+
+
+def players(count):
+    return [{'identifier': f'id{i:03d}', 'name': f'Player {i}'} for i in range(count)]
+
+
+def test_batches_respect_the_size_cap_and_token_budget():
+    assert [len(b) for b in etl_05.plan_enrichment_batches(players(25), 10 ** 6, 10)] == [10, 10, 5]
+    # Every player carries its context on top of the answer estimate, so three answers' worth fits fewer than three
+    fixed = etl_05.ai_utils.estimate_tokens(etl_05.build_batch_enrichment_prompt([]))
+    budget = fixed + 3 * etl_05.BATCH_OUTPUT_TOKENS_PER_PLAYER
+    assert [len(b) for b in etl_05.plan_enrichment_batches(players(4), budget, 10)] == [2, 2]
+    # A player that alone exceeds the budget still gets a batch of its own
+    assert etl_05.plan_enrichment_batches(players(2), 0, 10) == [[p] for p in players(2)]
+
+
+def test_players_missing_from_a_batch_answer_are_retried():
+    def respond(prompt):
+        answer = json.loads(llm_client.stub_player_batch_response(prompt)[len("```json\n"):-len("\n```")])
+        return json.dumps([{**VALID_ANSWER, 'identifier': a['identifier']} for a in answer[:2]])
+    model = llm_client.StubGenerativeModel(respond, latency_seconds=0, latency_jitter=0)
+
+    results = list(etl_05.enrich_players_in_batches(players(5), model, max_workers=1, token_budget=10 ** 6,
+                                                    max_attempts=2))
+    assert sorted(p['identifier'] for p, enriched in results if enriched) == ['id000', 'id001', 'id002', 'id003']
+    assert [p['identifier'] for p, enriched in results if enriched is None] == ['id004']
@@ -0,0 +1,99 @@
+# tests/test_enrichment_queue.py
+import re
+
+import pytest
+
+from src.etl import enrichment_queue
+
+
+class RecordingCursor:
+    """Stands in for a psycopg2 cursor: records every statement and returns canned rows."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class RecordingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def execute_values(monkeypatch):
+    calls = []
+
+    def fake(cursor, sql, argslist, fetch=False):
+        calls.append((" ".join(sql.split()), list(argslist)))
+        return [('pending',), ('failed',), ('pending',)]
+    monkeypatch.setattr(enrichment_queue.extras, 'execute_values', fake, raising=False)
+    return calls
+
+
+def test_enqueue_counts_only_pending_jobs(execute_values):
+    assert enrichment_queue.enqueue_jobs(None, enrichment_queue.PLAYER_JOB, ['a', 'b', 'c'], max_attempts=5) == 2
+    sql, rows = execute_values[0]
+    assert rows == [('player', 'a'), ('player', 'b'), ('player', 'c')]
+    assert "WHERE enrichment_jobs.status = 'done'" in sql
+
+
+def test_reopened_done_jobs_keep_their_attempts(execute_values):
+    enrichment_queue.enqueue_jobs(None, enrichment_queue.PLAYER_JOB, ['a'], max_attempts=4)
+    sql, _ = execute_values[0]
+    assert not re.search(r'\battempts\s*=', sql)
+    assert "WHEN enrichment_jobs.attempts >= 4 THEN 'failed'" in sql
+
+
+def test_enqueue_nothing_runs_no_statement(execute_values):
+    assert enrichment_queue.enqueue_jobs(None, enrichment_queue.MATCH_JOB, []) == 0
+    assert execute_values == []
+
+
+def test_claim_skips_locked_rows_and_commits():
+    cursor = RecordingCursor(rows=[('p1',), ('p2',)])
+    conn = RecordingConnection(cursor)
+    assert enrichment_queue.claim_jobs(conn, enrichment_queue.PLAYER_JOB, 2, 'host:1', lease_seconds=60) == ['p1', 'p2']
+    sql, params = cursor.statements[0]
+    assert 'FOR UPDATE SKIP LOCKED' in sql and 'attempts = attempts + 1' in sql
+    assert params == {'job_type': 'player', 'batch_size': 2, 'locked_by': 'host:1', 'lease_seconds': 60}
+    assert conn.commits == 1
+
+
+def test_complete_releases_the_lock():
+    cursor = RecordingCursor()
+    enrichment_queue.complete_jobs(cursor, enrichment_queue.MATCH_JOB, {'m1'})
+    sql, params = cursor.statements[0]
+    assert "status = 'done'" in sql and 'locked_by = NULL' in sql
+    assert params == ('match', ['m1'])
+    enrichment_queue.complete_jobs(cursor, enrichment_queue.MATCH_JOB, [])
+    assert len(cursor.statements) == 1
+
+
+def test_fail_backs_off_and_truncates_the_error():
+    cursor = RecordingCursor()
+    enrichment_queue.fail_jobs(cursor, enrichment_queue.PLAYER_JOB, ['p1'], "x" * 5000,
+                               max_attempts=3, retry_base_seconds=10)
+    sql, params = cursor.statements[0]
+    assert "WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'pending'" in sql
+    assert 'power(2, attempts - 1)' in sql
+    assert len(params['error']) == 2000
+    assert params['max_attempts'] == 3 and params['retry_base_seconds'] == 10
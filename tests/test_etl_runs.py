@@ -0,0 +1,36 @@
+# tests/test_etl_runs.py
+import pytest
+
+from src.etl import etl_runs
+
+
+@pytest.fixture
+def finished(monkeypatch):
+    finished = []
+    monkeypatch.setattr(etl_runs, 'start_run', lambda: 7)
+    monkeypatch.setattr(etl_runs, 'finish_run', lambda run_id, status: finished.append((run_id, status)) or 12)
+    return finished
+
+
+def test_recorded_run_completes(finished):
+    with etl_runs.recorded_run('player enrichment'):
+        pass
+    assert finished == [(7, 'completed')]
+
+
+def test_recorded_run_is_aborted_when_the_step_raises(finished):
+    with pytest.raises(ValueError):
+        with etl_runs.recorded_run('player enrichment'):
+            raise ValueError("boom")
+    assert finished == [(7, 'aborted')]
+
+
+def test_step_still_runs_when_the_run_cannot_be_recorded(monkeypatch, finished):
+    def unavailable():
+        raise RuntimeError("database down")
+    monkeypatch.setattr(etl_runs, 'start_run', unavailable)
+    ran = []
+    with etl_runs.recorded_run('innings timings'):
+        ran.append(True)
+    assert ran == [True] and finished == []
+
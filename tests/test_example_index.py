@@ -0,0 +1,22 @@
+# tests/test_example_index.py
+import pytest
+
+from src.text_to_sql.example_index import question_terms, PLAYER_LOOKUP_TERM
+
+
+@pytest.mark.parametrize("question", [
+    "Virat Kohli strike rate against left-arm spinners",
+    "How many runs did Virat Kohli score in 2016?",
+    "Did Rohit Sharma play in 2020?",
+])
+def test_player_names_are_detected(question):
+    assert PLAYER_LOOKUP_TERM in question_terms(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Which Player scored the most runs?",
+    "Head to head between Mumbai Indians and Chennai Super Kings",
+    "Most catches by a fielder",
+])
+def test_question_words_and_teams_are_not_players(question):
+    assert PLAYER_LOOKUP_TERM not in question_terms(question)
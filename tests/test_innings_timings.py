@@ -0,0 +1,123 @@
+# tests/test_innings_timings.py
+import datetime
+import json
+
+import pytest
+
+from src.etl import etl_06_innings_timings_and_delays as etl_06
+
+UTC = datetime.timezone.utc
+MATCH = {'match_id': '1082591', 'match_date_played': datetime.date(2017, 4, 5)}
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    statements = []
+
+    def fake(cursor, sql, argslist, page_size=100):
+        statements.append((" ".join(sql.split()), list(argslist)))
+    monkeypatch.setattr(etl_06.extras, 'execute_values', fake, raising=False)
+    return statements
+
+
+def innings(inning_id, **fields):
+    answer = {'inning_id': inning_id, 'total_duration_minutes': 95, 'playing_duration_minutes': 90,
+              'actual_starttime_utc': '14:30:00', 'actual_endtime_utc': '16:05:00',
+              'scheduled_starttime_utc': '14:30:00', 'delays': []}
+    answer.update(fields)
+    return answer
+
+
+def test_times_are_anchored_to_the_match_date(statements):
+    report = etl_06.write_timings_batch(None, [(MATCH, {'match_date_played': '2099-01-01', 'innings_1': innings(1)})])
+    assert report == []
+    sql, rows = statements[0]
+    assert sql.startswith("INSERT INTO InningsTimings")
+    assert rows == [(1, 95, 90, datetime.datetime(2017, 4, 5, 14, 30, tzinfo=UTC),
+                     datetime.datetime(2017, 4, 5, 16, 5, tzinfo=UTC), datetime.datetime(2017, 4, 5, 14, 30, tzinfo=UTC))]
+
+
+def test_malformed_values_become_null_and_are_reported(statements):
+    answer = {'innings_1': innings(1, actual_endtime_utc='4:05 PM', total_duration_minutes='about 95',
+                                   playing_duration_minutes='90', scheduled_starttime_utc='')}
+    report = etl_06.write_timings_batch(None, [(MATCH, answer)])
+    _, rows = statements[0]
+    assert rows[0][1:3] == (None, 90)
+    assert rows[0][4] is None and rows[0][5] is None
+    assert sorted((entry['field'], entry['value']) for entry in report) == [
+        ('actual_endtime_utc', '4:05 PM'), ('total_duration_minutes', 'about 95')]
+
+
+def test_delays_are_written_per_innings(statements):
+    delay = {'reason': 'rain', 'start_time_utc': '15:10:00', 'resume_time_utc': '15:40:00',
+             'duration_minutes': 30, 'overs_completed': '12'}
+    etl_06.write_timings_batch(None, [(MATCH, {'innings_1': innings(1), 'innings_2': innings(2, delays=[delay])})])
+    timing_sql, timing_rows = statements[0]
+    delay_sql, delay_rows = statements[1]
+    assert [row[0] for row in timing_rows] == [1, 2]
+    assert delay_sql.startswith("INSERT INTO InningsDelays")
+    assert delay_rows == [(2, 'rain', datetime.datetime(2017, 4, 5, 15, 10, tzinfo=UTC),
+                           datetime.datetime(2017, 4, 5, 15, 40, tzinfo=UTC), 30, 12)]
+
+
+def test_last_answer_for_an_innings_wins(statements):
+    etl_06.write_timings_batch(None, [(MATCH, {'innings_1': innings(1, total_duration_minutes=80)}),
+                                      (MATCH, {'innings_1': innings(1, total_duration_minutes=85)})])
+    _, rows = statements[0]
+    assert len(rows) == 1 and rows[0][1] == 85
+
+
+def test_nothing_to_write_runs_no_statement(statements):
+    assert etl_06.write_timings_batch(None, [(MATCH, {'innings_1': None})]) == []
+    assert statements == []
+
+
+# --- Chunk planning and retries ---
+
+def requested_matches(count):
+    return [{'match_id': str(i), 'inning_1_id': i * 10 + 1, 'inning_2_id': i * 10 + 2} for i in range(count)]
+
+
+def truncating_model(answered_per_prompt):
+    """A stub model whose answer only ever covers the first `answered_per_prompt` matches of a prompt."""
+    def respond(prompt):
+        answer = etl_06.llm_client.stub_timings_response(prompt)
+        matches = json.loads(answer[len("```json\n"):-len("\n```")])
+        return json.dumps(matches[:answered_per_prompt])
+    return etl_06.llm_client.StubGenerativeModel(respond, latency_seconds=0, latency_jitter=0)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(etl_06.config, 'LLM_CACHE_ENABLED', False)
+
+
+def test_chunks_are_sized_by_the_output_token_budget():
+    matches = requested_matches(25)
+    per_match = etl_06.TIMINGS_OUTPUT_TOKENS_PER_MATCH
+    assert [len(c) for c in etl_06.plan_timing_chunks(matches, per_match * 4, 10)] == [4] * 6 + [1]
+    assert [len(c) for c in etl_06.plan_timing_chunks(matches, per_match * 40, 10)] == [10, 10, 5]
+    assert [len(c) for c in etl_06.plan_timing_chunks(matches[:2], 1, 10)] == [1, 1]
+
+
+def test_answers_for_the_wrong_innings_are_rejected():
+    match = requested_matches(1)[0]
+    assert etl_06.validate_match_timings({'match_id': '0', 'innings_1': innings(1), 'innings_2': None}, match)
+    assert not etl_06.validate_match_timings({'match_id': '0', 'innings_1': innings(2)}, match)
+    assert not etl_06.validate_match_timings({'match_id': '0', 'innings_1': innings(1, delays='rain')}, match)
+    assert not etl_06.validate_match_timings({'match_id': '1', 'innings_1': innings(1)}, match)
+
+
+def test_missing_matches_are_retried_in_smaller_chunks():
+    report = []
+    results = list(etl_06.enrich_matches_in_chunks(requested_matches(10), truncating_model(2), max_workers=2,
+                                                   max_chunk_size=4, max_attempts=3, chunk_report=report))
+    assert sorted(m['match_id'] for m, enriched in results if enriched) == [str(i) for i in range(10)]
+    assert sorted((r['attempt'], r['size'], r['returned']) for r in report) == [
+        (1, 2, 2), (1, 4, 2), (1, 4, 2), (2, 2, 2), (2, 2, 2)]
+
+
+def test_matches_still_missing_after_the_last_attempt_are_yielded_empty():
+    results = list(etl_06.enrich_matches_in_chunks(requested_matches(6), truncating_model(1), max_workers=1,
+                                                   max_chunk_size=3, max_attempts=1))
+    assert sorted(m['match_id'] for m, enriched in results if enriched is None) == ['1', '2', '4', '5']
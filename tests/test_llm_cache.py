@@ -0,0 +1,64 @@
+# tests/test_llm_cache.py
+import pytest
+
+from src import ai_utils
+from src import llm_cache
+from src import llm_client
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return llm_cache.LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), ttl_seconds=3600, max_bytes=0)
+
+
+def test_responses_are_keyed_by_model_prompt_and_config(cache):
+    cache.put("gemini-2.5-flash", "prompt", "answer", {'temperature': 0})
+    assert cache.get("gemini-2.5-flash", "prompt", {'temperature': 0}) == "answer"
+    assert cache.get("gemini-2.5-flash", "prompt", {'temperature': 1}) is None
+    assert cache.get("gemini-2.5-pro", "prompt", {'temperature': 0}) is None
+    assert cache.get("gemini-2.5-flash", "prompt ", {'temperature': 0}) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 3
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    llm_cache.LLMResponseCache(path=path, ttl_seconds=0, max_bytes=0).put("m", "prompt", "answer")
+    assert llm_cache.LLMResponseCache(path=path, ttl_seconds=0, max_bytes=0).get("m", "prompt") == "answer"
+
+
+def test_expired_entries_are_misses(cache, monkeypatch):
+    cache.put("m", "prompt", "answer")
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now + 7200)
+    assert cache.get("m", "prompt") is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: clock[0])
+    probe = llm_cache.LLMResponseCache(path=str(tmp_path / "probe.sqlite3"), ttl_seconds=0, max_bytes=0)
+    probe.put("m", "p", "x" * 200)
+    entry_bytes = probe.stats()['size_bytes']
+
+    # Room for two entries; going over evicts down to 90% of the budget
+    cache = llm_cache.LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), ttl_seconds=0,
+                                       max_bytes=int(entry_bytes * 2.5))
+    for prompt in ("first", "second"):
+        clock[0] += 1
+        cache.put("m", prompt, "x" * 200)
+    clock[0] += 1
+    cache.get("m", "first")
+    clock[0] += 1
+    cache.put("m", "third", "x" * 200)
+    assert cache.get("m", "second") is None
+    assert cache.get("m", "first") is not None and cache.get("m", "third") is not None
+
+
+def test_generate_text_replays_cached_answers_without_calling_the_model(cache):
+    model = llm_client.StubGenerativeModel(lambda prompt: "fresh", latency_seconds=0, latency_jitter=0)
+    assert ai_utils.generate_text(model, "prompt", cache=cache) == ("fresh", False)
+    assert ai_utils.generate_text(model, "prompt", cache=cache) == ("fresh", False)
+    cache.put(llm_cache.model_name_of(model), "prompt", "cached")
+    assert ai_utils.generate_text(model, "prompt", cache=cache) == ("cached", True)
+    assert model.calls == 2
@@ -0,0 +1,107 @@
+# tests/test_llm_client.py
+import json
+
+import pytest
+
+from src import config
+from src import llm_client
+
+
+@pytest.fixture(autouse=True)
+def quiet_accounting(monkeypatch):
+    monkeypatch.setattr(config, 'AI_CALL_LOG_ENABLED', False)
+    monkeypatch.setattr(llm_client, '_token_callbacks', [])
+    llm_client.usage_stats.reset()
+    yield
+    llm_client.usage_stats.reset()
+
+
+def stub_client(role, response_fn=None, **kwargs):
+    model = llm_client.StubGenerativeModel(response_fn or llm_client.stub_responder(role),
+                                           latency_seconds=0, latency_jitter=0, model_name=f"stub/{role}", **kwargs)
+    return llm_client.LLMClient(model, role, 'stub')
+
+
+def fenced_json(text):
+    assert text.startswith("```json\n") and text.endswith("\n```")
+    return json.loads(text[len("```json\n"):-len("\n```")])
+
+
+def test_stub_answers_single_and_batched_enrichment_prompts():
+    respond = llm_client.stub_responder('enrichment')
+    single = fenced_json(respond("Tell me about V Kohli"))
+    assert single['bowling_style'] and single['player_role']
+
+    batch = fenced_json(respond('[{"identifier": "abc123", "name": "V Kohli"}, {"identifier": "def456", "name": "MS Dhoni"}]'))
+    assert [p['identifier'] for p in batch] == ["abc123", "def456"]
+
+
+def test_stub_answers_every_match_in_a_timings_prompt():
+    matches = [{"match_id": 1, "inning_1_id": 11, "inning_2_id": 12}, {"match_id": 2, "inning_1_id": 21, "inning_2_id": 22}]
+    answer = fenced_json(llm_client.stub_timings_response(f"Match Details JSON Array:\n{json.dumps(matches)}"))
+    assert [(m['match_id'], m['innings_1']['inning_id'], m['innings_2']['inning_id']) for m in answer] == \
+        [(1, 11, 12), (2, 21, 22)]
+
+
+def test_recorded_responses_are_replayed_for_the_exact_prompt(tmp_path):
+    path = str(tmp_path / "recordings" / "llm.jsonl")
+    llm_client.record_response('sql', 'gemini-2.5-pro', "prompt", "first", path=path)
+    llm_client.record_response('sql', 'gemini-2.5-pro', "prompt", "second", path=path)
+
+    respond = llm_client.stub_responder('sql', llm_client.load_recordings(path))
+    assert respond("prompt") == "second"
+    assert respond("other prompt") == llm_client.stub_sql_response("other prompt")
+    assert llm_client.load_recordings(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_calls_are_accounted_per_provider_role_and_model():
+    client = stub_client('summary')
+    assert client.generate_text("How many matches?") == llm_client.stub_summary_response("")
+    client.generate_text("And in 2020?")
+
+    stats = llm_client.usage_stats.snapshot()[('stub', 'summary', 'stub/summary')]
+    assert stats['requests'] == 2 and stats['errors'] == 0
+    assert stats['prompt_tokens'] > 0 and stats['completion_tokens'] > 0
+
+
+def test_streamed_calls_are_accounted_once_the_stream_is_exhausted():
+    text = "x" * (llm_client.STUB_STREAM_CHUNK_CHARS * 2 + 10)
+    client = stub_client('summary', lambda prompt: text)
+    chunks = client.generate_content("prompt", stream=True)
+    assert llm_client.usage_stats.snapshot() == {}
+
+    assert "".join(chunk.text for chunk in chunks) == text
+    stats = llm_client.usage_stats.snapshot()[('stub', 'summary', 'stub/summary')]
+    assert stats['requests'] == 1
+    assert stats['completion_tokens'] == llm_client.estimate_tokens(text)
+
+
+def test_failed_calls_are_counted_as_errors_and_reraised():
+    client = stub_client('sql', quota_error_rate=1.0)
+    with pytest.raises(llm_client.StubQuotaError):
+        client.generate_content("prompt")
+    stats = llm_client.usage_stats.snapshot()[('stub', 'sql', 'stub/sql')]
+    assert stats['requests'] == 1 and stats['errors'] == 1
+
+
+def test_token_callbacks_fire_and_a_failing_callback_is_ignored():
+    seen = []
+
+    def broken(prompt_tokens, completion_tokens):
+        raise RuntimeError("boom")
+
+    llm_client.add_token_callback(broken)
+    llm_client.add_token_callback(lambda p, c: seen.append((p, c)))
+    llm_client.add_token_callback(broken)
+    assert len(llm_client._token_callbacks) == 2
+
+    stub_client('summary').generate_text("prompt")
+    assert len(seen) == 1 and seen[0][0] > 0
+
+
+def test_get_client_rejects_unknown_roles_and_providers():
+    assert llm_client.get_client('sql', 'stub').provider == 'stub'
+    with pytest.raises(ValueError):
+        llm_client.get_client('poetry', 'stub')
+    with pytest.raises(RuntimeError):
+        llm_client.get_client('sql', 'nope')
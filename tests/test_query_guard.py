@@ -0,0 +1,71 @@
+# tests/test_query_guard.py
+from src.text_to_sql.query_guard import QueryGuard, assess_plan
+
+
+def scan(relation, rows, **fields):
+    return {'Node Type': 'Seq Scan', 'Relation Name': relation, 'Plan Rows': rows, 'Total Cost': rows / 10, **fields}
+
+
+def plan(total_cost=100.0, rows=10.0, children=(), **fields):
+    return {'Node Type': 'Aggregate', 'Total Cost': total_cost, 'Plan Rows': rows, 'Plans': list(children), **fields}
+
+
+def test_plan_within_budget_is_accepted():
+    verdict = assess_plan(plan(children=[scan('deliveries', 250_000)]), max_cost=1_000_000, max_rows=100_000)
+    assert verdict.ok and verdict.feedback() == ""
+
+
+def test_cost_and_row_budgets():
+    verdict = assess_plan(plan(total_cost=2_000_000, rows=500_000), max_cost=1_000_000, max_rows=100_000)
+    assert len(verdict.problems) == 2
+    assert "2,000,000" in verdict.problems[0] and "LIMIT" in verdict.problems[1]
+
+
+def test_zero_budget_means_unlimited():
+    assert assess_plan(plan(total_cost=1e12, rows=1e9), max_cost=0, max_rows=0).ok
+
+
+def test_cartesian_join_of_large_inputs_is_rejected():
+    join = {'Node Type': 'Nested Loop', 'Plan Rows': 1e8, 'Plans': [scan('deliveries', 250_000), scan('wickets', 12_000)]}
+    verdict = assess_plan(plan(children=[join]), max_cost=0, max_rows=0)
+    assert not verdict.ok and "cartesian join" in verdict.feedback()
+
+
+def test_nested_loops_with_a_condition_or_small_side_are_fine():
+    filtered = {'Node Type': 'Nested Loop', 'Join Filter': '(a.id = b.id)',
+                'Plans': [scan('deliveries', 250_000), scan('wickets', 12_000)]}
+    indexed = {'Node Type': 'Nested Loop',
+               'Plans': [scan('deliveries', 250_000),
+                         {'Node Type': 'Index Scan', 'Plan Rows': 5000, 'Index Cond': '(match_id = d.match_id)'}]}
+    small = {'Node Type': 'Nested Loop', 'Plans': [scan('deliveries', 250_000), scan('teams', 15)]}
+    for join in (filtered, indexed, small):
+        assert assess_plan(plan(children=[join]), max_cost=0, max_rows=0).ok
+
+
+def test_per_row_player_lookup_is_rejected():
+    lookup = scan('deliveries', 1000, Filter="(batter_id = get_player_id_by_name('V Kohli'::text))")
+    verdict = assess_plan(plan(children=[lookup]), max_cost=0, max_rows=0)
+    assert "MATERIALIZED CTE" in verdict.feedback() and "deliveries" in verdict.feedback()
+
+
+def test_verdicts_are_cached_per_generation():
+    explained, generation = [], [1]
+
+    def explain(sql):
+        explained.append(sql)
+        return plan()
+    guard = QueryGuard(max_cost=1000, max_rows=1000, explain_fn=explain, generation_fn=lambda: generation[0])
+    guard.check("SELECT m.season_year FROM matches m")
+    guard.check("select x.season_year from matches x;")
+    assert len(explained) == 1 and guard.plan_cache_hits == 1
+    generation[0] = 2
+    guard.check("SELECT m.season_year FROM matches m")
+    assert len(explained) == 2
+
+
+def test_verdicts_are_not_cached_without_a_generation():
+    explained = []
+    guard = QueryGuard(explain_fn=lambda sql: explained.append(sql) or plan(), generation_fn=lambda: None)
+    guard.check("SELECT 1")
+    guard.check("SELECT 1")
+    assert len(explained) == 2
@@ -0,0 +1,122 @@
+# tests/test_query_log.py
+import json
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from src import config
+from src import llm_client
+from src.text_to_sql import query_log
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+
+    @contextmanager
+    def cursor(self):
+        yield None
+
+    def commit(self):
+        self.commits += 1
+
+
+class Batches(list):
+    """Rows passed to each INSERT, one list per batch; `written` is set after the first one."""
+
+    def __init__(self):
+        super().__init__()
+        self.written = threading.Event()
+
+
+@pytest.fixture
+def inserted(monkeypatch):
+    batches = Batches()
+
+    @contextmanager
+    def pooled_connection():
+        yield FakeConnection()
+
+    def execute_values(cursor, sql, rows):
+        batches.append(list(rows))
+        batches.written.set()
+    monkeypatch.setattr(query_log.db_utils, 'pooled_connection', pooled_connection)
+    monkeypatch.setattr(query_log.extras, 'execute_values', execute_values, raising=False)
+    return batches
+
+
+def record(n: int) -> dict:
+    trace = query_log.Trace(f"question {n}")
+    with trace.span('execute'):
+        pass
+    trace.sql, trace.success = "SELECT 1", True
+    return trace.record()
+
+
+def test_full_batches_are_written_together(inserted):
+    writer = query_log.QueryLogWriter(batch_size=3, flush_seconds=60)
+    for n in range(7):
+        writer.write(record(n))
+    writer.close()
+    assert [len(batch) for batch in inserted] == [3, 3, 1]
+    assert writer.stats()['written'] == 7
+
+
+def test_partial_batch_is_flushed_after_flush_seconds(inserted):
+    writer = query_log.QueryLogWriter(batch_size=50, flush_seconds=0.05)
+    writer.write(record(1))
+    assert inserted.written.wait(timeout=2)
+    assert [len(batch) for batch in inserted] == [1]
+    writer.close()
+
+
+def test_spans_are_stored_as_json(inserted):
+    writer = query_log.QueryLogWriter(batch_size=1, flush_seconds=60)
+    writer.write(record(1))
+    writer.close()
+    row = dict(zip(query_log.COLUMNS, inserted[0][0]))
+    assert json.loads(row['spans'])[0]['name'] == 'execute'
+    assert row['answer_path'] == query_log.PATH_LLM and row['sql_text'] == "select 1"
+
+
+def test_unreachable_database_drops_the_batch(monkeypatch):
+    @contextmanager
+    def unavailable():
+        raise RuntimeError("database down")
+        yield
+    monkeypatch.setattr(query_log.db_utils, 'pooled_connection', unavailable)
+    writer = query_log.QueryLogWriter(batch_size=2, flush_seconds=60)
+    writer.write(record(1))
+    writer.write(record(2))
+    writer.close()
+    assert writer.stats() == {'written': 0, 'dropped': 2, 'queued': 0}
+
+
+def test_llm_tokens_are_added_to_the_open_span(monkeypatch):
+    monkeypatch.setattr(config, 'QUERY_LOG_ENABLED', False)
+    assert query_log.record_tokens in llm_client._token_callbacks
+    with query_log.traced("who won") as trace:
+        query_log.record_tokens(5, 5)  # no open span: not attributed to any stage
+        with query_log.span('generate'):
+            query_log.record_tokens(120, 30)
+        with query_log.span('summarise'):
+            query_log.record_tokens(80, 20)
+    row = trace.record()
+    assert [(s['name'], s['prompt_tokens'], s['completion_tokens']) for s in row['spans']] == [
+        ('generate', 120, 30), ('summarise', 80, 20)]
+    assert (row['prompt_tokens'], row['completion_tokens']) == (200, 50)
+    assert query_log.current_trace() is None
+
+
+def test_failed_span_records_the_first_error_class(monkeypatch):
+    monkeypatch.setattr(config, 'QUERY_LOG_ENABLED', False)
+    with query_log.traced("who won") as trace:
+        with pytest.raises(ZeroDivisionError):
+            with query_log.span('execute'):
+                1 / 0
+        query_log.record_error('ZeroDivisionError')
+        query_log.record_error('CostGuardRejected')
+    row = trace.record()
+    assert row['spans'][0]['error'] == 'ZeroDivisionError'
+    assert row['success'] is False and row['error_class'] == 'ZeroDivisionError'
@@ -0,0 +1,69 @@
+# tests/test_question_cache.py
+import pytest
+
+from src.text_to_sql.question_cache import QuestionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = QuestionCache(path=str(tmp_path / "questions.sqlite3"), generation_fn=lambda: 1,
+                          name_words_fn=lambda: frozenset({'mohit', 'sharma', 'ishan', 'wankhede'}))
+    cache.put("How many runs did Mohit Sharma score in 2023", "SELECT 1", [(1,)], ["runs"], "Mohit")
+    cache.put("Ishan Sharma wickets in 2019", "SELECT 2", [(2,)], ["wickets"], "Ishan")
+    cache.put("Which bowler has the best economy in 2019", "SELECT 3", [(3,)], ["economy"], "economy")
+    cache.put("how many runs did mohit sharma score in 2022", "SELECT 4", [(4,)], ["runs"], "mohit")
+    cache.put("highest score at wankhede", "SELECT 5", [(5,)], ["runs"], "wankhede")
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "How many runs did Rohit Sharma score in 2023",
+    "how many runs did rohit sharma score in 2023",
+    "how many runs did rohit sharma score in 2022",
+    "Ishant Sharma wickets in 2019",
+    "highest score at wankhade",
+    "Which bowler has the best economy in 2018",
+    "Which batter has the best economy in 2019",
+])
+def test_different_names_numbers_and_words_never_match(cache, question):
+    assert cache.get(question) is None
+
+
+def test_unknown_words_need_an_exact_match_without_a_name_index(tmp_path):
+    cache = QuestionCache(path=str(tmp_path / "questions.sqlite3"), generation_fn=lambda: 1,
+                          name_words_fn=lambda: frozenset())
+    cache.put("how many runs did mohit sharma score in 2023", "SELECT 1", [(1,)], ["runs"], "mohit")
+    assert cache.get("how many runs did rohit sharma score in 2023") is None
+
+
+@pytest.mark.parametrize("question", [
+    "Which bowler has the best econmy in 2019",
+    "Which bowler has the best economy in 2019?",
+    "please tell me which bowler has the best economy in 2019",
+])
+def test_typos_in_question_words_still_match(cache, question):
+    answer = cache.get(question)
+    assert answer is not None and answer['summary'] == "economy"
+
+
+def test_same_name_matches(cache):
+    answer = cache.get("how many runs did Mohit Sharma score in 2023?")
+    assert answer is not None and answer['summary'] == "Mohit"
+
+
+def test_unknown_generation_is_never_served(tmp_path):
+    cache = QuestionCache(path=str(tmp_path / "questions.sqlite3"), generation_fn=lambda: None,
+                          name_words_fn=lambda: frozenset())
+    cache.put("highest score at wankhede", "SELECT 5", [(5,)], ["runs"], "wankhede")
+    assert cache.get("highest score at wankhede") is None
+
+
+def test_new_generation_drops_old_answers(tmp_path):
+    generation = [1]
+    cache = QuestionCache(path=str(tmp_path / "questions.sqlite3"), generation_fn=lambda: generation[0],
+                          name_words_fn=lambda: frozenset())
+    cache.put("highest score at wankhede", "SELECT 5", [(5,)], ["runs"], "wankhede")
+    assert cache.get("highest score at wankhede") is not None
+    generation[0] = 2
+    assert cache.get("highest score at wankhede") is None
+    assert cache.stats()['entries'] == 0
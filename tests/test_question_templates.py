@@ -0,0 +1,66 @@
+# tests/test_question_templates.py
+import pytest
+
+from src.text_to_sql.dimension_index import DimensionIndex
+from src.text_to_sql.question_templates import TemplateMatcher, load_templates, question_shape
+
+PLAYERS = [
+    ('ba607b88', 'Josh Hazlewood', 'Josh Reginald Hazlewood', 'JR Hazlewood', 'JR Hazlewood'),
+    ('ba607b89', 'Virat Kohli', 'Virat Kohli', 'V Kohli', 'V Kohli'),
+]
+TEAMS = [(1, 'Chennai Super Kings'), (2, 'Mumbai Indians')]
+VENUES = [(10, 'Wankhede Stadium', 'Mumbai'), (11, 'Wankhede Stadium, Mumbai', 'Mumbai')]
+SEASONS = [2023, 2024, 2025]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return DimensionIndex(PLAYERS, TEAMS, VENUES, SEASONS)
+
+
+@pytest.fixture(scope="module")
+def matcher(index):
+    return TemplateMatcher(load_templates(), index_fn=lambda: index)
+
+
+def test_question_shape_replaces_names_and_seasons(index):
+    shape, slots = question_shape("How many wickets did JR Hazlewood take in the 2025 season?", index)
+    assert shape == "how many wickets <player> take <season>"
+    assert slots == {'player': ('player', 'ba607b88'), 'season': ('season', 2025)}
+
+
+def test_second_team_gets_a_numbered_slot(index):
+    _, slots = question_shape("CSK vs MI head to head", index)
+    assert slots == {'team': ('team', 1), 'team2': ('team', 2)}
+
+
+def test_every_template_loads():
+    names = [template.name for template in load_templates()]
+    assert len(names) == len(set(names)) and "Bowler figures in a season" in names
+
+
+@pytest.mark.parametrize("question, template, fragments", [
+    ("How many runs did Josh Hazlewood concede in 2025?", "Bowler figures in a season",
+     ["'ba607b88'", "season_year = 2025"]),
+    ("Virat Kohli runs in season 2024", "Batting in a season", ["'ba607b89'", "2024"]),
+    ("csk vs mi", "Team head-to-head", []),
+    ("top 5 run scorers at wankhede", "Top run scorers at a venue", ["(10, 11)"]),
+])
+def test_common_questions_use_a_template(matcher, question, template, fragments):
+    match = matcher.match(question)
+    assert match is not None and match.template == template
+    assert all(fragment in match.sql for fragment in fragments)
+    assert '{' not in match.sql
+
+
+@pytest.mark.parametrize("question", [
+    "How many runs did Rohit Sharma concede in 2025?",
+    "How many runs did Josh Hazlewood concede in 2019?",
+    "Which bowler has the best economy in death overs across all seasons?",
+])
+def test_unrecognised_names_or_shapes_fall_back_to_the_llm(matcher, question):
+    assert matcher.match(question) is None
+
+
+def test_no_index_means_no_template():
+    assert TemplateMatcher(load_templates(), index_fn=lambda: None).match("csk vs mi") is None
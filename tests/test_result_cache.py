@@ -0,0 +1,73 @@
+# tests/test_result_cache.py
+from src.text_to_sql.result_cache import ResultCache
+
+ROWS = [('V Kohli', 973), ('DA Warner', 848)]
+HEADERS = ['player', 'runs']
+
+
+def make_cache(generation=(1,), **kwargs):
+    generation = list(generation)
+    cache = ResultCache(generation_fn=lambda: generation[0], **{'max_entries': 10, 'max_bytes': 0, **kwargs})
+    return cache, generation
+
+
+def test_equivalent_sql_hits_the_same_entry():
+    cache, _ = make_cache()
+    cache.put("SELECT p.name, p.runs FROM players p;", ROWS, HEADERS, "2 rows", execution_seconds=0.5)
+    assert cache.get("select x.name,  x.runs from players as x") == (ROWS, HEADERS, "2 rows")
+    assert cache.stats()['hits'] == 1 and cache.stats()['seconds_saved'] == 0.5
+
+
+def test_empty_results_keep_their_headers():
+    cache, _ = make_cache()
+    cache.put("SELECT name FROM players WHERE false", [], ['name'])
+    assert cache.get("SELECT name FROM players WHERE false") == ([], ['name'], "")
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache, _ = make_cache(max_entries=2)
+    cache.put("SELECT 1", [(1,)], ['a'])
+    cache.put("SELECT 2", [(2,)], ['a'])
+    cache.get("SELECT 1")
+    cache.put("SELECT 3", [(3,)], ['a'])
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") is not None and cache.get("SELECT 3") is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_memory_budget_evicts_and_skips_oversized_results():
+    small, _ = make_cache()
+    small.put("SELECT 1", ROWS, HEADERS)
+    entry_bytes = small.stats()['size_bytes']
+
+    cache, _ = make_cache(max_bytes=entry_bytes * 2)
+    cache.put("SELECT 1", ROWS, HEADERS)
+    cache.put("SELECT 2", ROWS, HEADERS)
+    cache.put("SELECT 3", ROWS, HEADERS)
+    assert cache.stats()['entries'] == 2 and cache.stats()['size_bytes'] <= entry_bytes * 2
+    cache.put("SELECT 4", ROWS * 100, HEADERS)
+    assert cache.get("SELECT 4") is None
+
+
+def test_new_generation_clears_the_cache():
+    cache, generation = make_cache()
+    cache.put("SELECT 1", ROWS, HEADERS)
+    generation[0] = 2
+    assert cache.get("SELECT 1") is None
+    assert cache.stats()['entries'] == 0 and cache.stats()['generation'] == 2
+
+
+def test_unknown_generation_neither_serves_nor_stores():
+    cache, generation = make_cache()
+    cache.put("SELECT 1", ROWS, HEADERS)
+    generation[0] = None
+    assert cache.get("SELECT 1") is None
+    cache.put("SELECT 2", ROWS, HEADERS)
+    generation[0] = 1
+    assert cache.get("SELECT 1") is not None and cache.get("SELECT 2") is None
+
+
+def test_column_aliases_are_part_of_the_key():
+    cache, _ = make_cache()
+    cache.put("SELECT count(*) AS m FROM matches m", [(74,)], ['m'])
+    assert cache.get("SELECT count(*) AS x FROM matches x") is None
@@ -0,0 +1,76 @@
+# tests/test_result_refinement.py
+import pytest
+
+from src.text_to_sql.result_refinement import PreviousResult, SessionResults, classify_follow_up
+
+HEADERS = ['player', 'batting_hand', 'team', 'total_runs', 'strike_rate']
+ROWS = [
+    ('V Kohli', 'Right-hand bat', 'Royal Challengers Bangalore', 973, 152.0),
+    ('DA Warner', 'Left-hand bat', 'Sunrisers Hyderabad', 848, 151.4),
+    ('AB de Villiers', 'Right-hand bat', 'Royal Challengers Bangalore', 687, 168.8),
+    ('Q de Kock', 'Left-hand bat', None, 445, 136.5),
+]
+
+
+@pytest.fixture
+def previous():
+    return PreviousResult("top run scorers in 2016", "SELECT ...", ROWS, HEADERS)
+
+
+@pytest.mark.parametrize("question, kind", [
+    ("sort by strike rate", 'sort'),
+    ("order them by sr ascending", 'sort'),
+    ("only the top 2", 'top_n'),
+    ("bottom 1 by total runs", 'top_n'),
+    ("only those with strike rate above 150", 'filter'),
+    ("500 runs or more", 'filter'),
+    ("now only show left-handers", 'match'),
+    ("exclude Royal Challengers Bangalore", 'exclude'),
+    ("how many are there", 'count'),
+    ("what is the total runs", 'aggregate'),
+    ("what's the average strike rate", 'aggregate'),
+    ("sum of total runs", 'aggregate'),
+    ("the highest strike rate of them", 'aggregate'),
+])
+def test_refinements_are_recognised(previous, question, kind):
+    refinement = classify_follow_up(question, previous)
+    assert refinement is not None and refinement.kind == kind
+
+
+@pytest.mark.parametrize("question", [
+    "show the total runs",
+    "total runs",
+    "sort by economy",
+    "who won the 2016 final",
+    "only show bowlers from Chennai",
+])
+def test_other_questions_go_to_the_database(previous, question):
+    assert classify_follow_up(question, previous) is None
+
+
+def test_aggregate_sums_the_named_column(previous):
+    refinement = classify_follow_up("what is the total runs", previous)
+    assert 'SELECT SUM("total_runs")' in refinement.sql
+    assert previous.query(refinement.sql)[0] == [(973 + 848 + 687 + 445,)]
+
+
+def test_exclusion_keeps_rows_without_a_value(previous):
+    rows, _ = previous.query(classify_follow_up("exclude Royal Challengers Bangalore", previous).sql)
+    assert [row[0] for row in rows] == ['DA Warner', 'Q de Kock']
+
+
+def test_filter_and_sort_run_over_the_previous_rows(previous):
+    rows, _ = previous.query(classify_follow_up("strike rate at least 151.4", previous).sql)
+    assert [row[0] for row in rows] == ['V Kohli', 'DA Warner', 'AB de Villiers']
+    rows, _ = previous.query(classify_follow_up("sort by strike rate", previous).sql)
+    assert rows[0][0] == 'AB de Villiers'
+
+
+def test_refined_results_can_be_chained():
+    sessions = SessionResults(max_sessions=2, max_rows=100)
+    sessions.put('s1', "top run scorers in 2016", "SELECT ...", ROWS, HEADERS)
+    refinement, rows, headers, _ = sessions.refine('s1', "only show left-handers")
+    sessions.put('s1', "only show left-handers", refinement.sql, rows, headers)
+    _, rows, _, answer = sessions.refine('s1', "how many are there")
+    assert rows == [(2,)] and answer
+    assert sessions.refine('unknown', "how many are there") is None
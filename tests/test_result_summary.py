@@ -0,0 +1,44 @@
+# tests/test_result_summary.py
+from decimal import Decimal
+
+from src.text_to_sql.result_summary import encode_results, summarise_locally
+
+
+def test_ranking_is_summarised_locally():
+    rows = [("V Kohli", 973), ("DA Warner", 848), ("AB de Villiers", 687)]
+    assert summarise_locally(rows, ["player", "total_runs"]) == (
+        "V Kohli leads with 973 total runs, followed by DA Warner (848) and AB de Villiers (687).")
+
+
+def test_season_by_season_table_goes_to_the_llm():
+    rows = [(2008, "Rajasthan Royals"), (2009, "Deccan Chargers"), (2010, "Chennai Super Kings")]
+    assert summarise_locally(rows, ["season_year", "winner"]) is None
+
+
+def test_season_by_season_figures_go_to_the_llm():
+    rows = [("V Kohli", 2016, 973), ("V Kohli", 2013, 639), ("V Kohli", 2011, 557)]
+    assert summarise_locally(rows, ["player", "season", "runs"]) is None
+
+
+def test_constant_season_column_does_not_rank():
+    rows = [("V Kohli", 2016, Decimal("973")), ("DA Warner", 2016, Decimal("848"))]
+    assert summarise_locally(rows, ["player", "season_year", "runs"]) == (
+        "V Kohli leads with 973 runs, followed by DA Warner (848).")
+
+
+def test_id_columns_are_not_measures():
+    rows = [(335982, "Kolkata Knight Riders"), (335983, "Chennai Super Kings")]
+    assert summarise_locally(rows, ["match_id", "winner"]) is None
+
+
+def test_short_results_are_encoded_in_full():
+    rows = [("V Kohli", 12345, Decimal("138.456")), ("Smith | Jr", None, 0.5)]
+    assert encode_results(rows, ["player", "runs", "strike_rate"], top_k=5) == (
+        "player|runs|strike_rate\nV Kohli|12345|138.46\nSmith / Jr||0.5")
+
+
+def test_long_results_keep_the_leaders_and_column_statistics():
+    rows = [(f"Player {i}", 100 - i) for i in range(10)]
+    assert encode_results(rows, ["player", "runs"], top_k=2).split("\n") == [
+        "player|runs", "Player 0|100", "Player 1|99",
+        "(8 more rows; statistics over all 10 rows:)", "runs: min 91, max 100, mean 95.5"]
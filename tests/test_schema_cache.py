@@ -0,0 +1,62 @@
+# tests/test_schema_cache.py
+import os
+
+import pytest
+
+from src.text_to_sql import schema_cache
+
+TABLE_INFO = {'teams': "CREATE TABLE teams (...)", 'matches': "CREATE TABLE matches (...)"}
+
+
+@pytest.fixture
+def catalog():
+    return {'version': "v1", 'reflections': 0}
+
+
+def make_cache(tmp_path, catalog, check_interval_seconds=0):
+    def reflect(ignore_tables):
+        catalog['reflections'] += 1
+        return dict(TABLE_INFO)
+    return schema_cache.SchemaCache(cache_dir=str(tmp_path), check_interval_seconds=check_interval_seconds,
+                                    reflect_fn=reflect, version_fn=lambda: catalog['version'])
+
+
+def test_schema_is_reflected_once_while_the_catalog_is_unchanged(tmp_path, catalog):
+    cache = make_cache(tmp_path, catalog)
+    assert cache.get_schema_text() == "CREATE TABLE matches (...)\n\nCREATE TABLE teams (...)"
+    cache.get_table_info()
+    assert catalog['reflections'] == 1
+
+
+def test_a_catalog_change_triggers_a_new_reflection(tmp_path, catalog):
+    cache = make_cache(tmp_path, catalog)
+    cache.get_table_info()
+    catalog['version'] = "v2"
+    cache.get_table_info()
+    assert catalog['reflections'] == 2
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_the_fingerprint_is_not_rechecked_within_the_interval(tmp_path, catalog):
+    cache = make_cache(tmp_path, catalog, check_interval_seconds=3600)
+    cache.get_table_info()
+    catalog['version'] = "v2"
+    cache.get_table_info()
+    assert catalog['reflections'] == 1
+
+
+def test_a_restart_loads_the_schema_from_disk(tmp_path, catalog):
+    make_cache(tmp_path, catalog).get_table_info()
+    assert make_cache(tmp_path, catalog).get_table_info() == TABLE_INFO
+    assert catalog['reflections'] == 1
+
+
+def test_an_unreadable_cache_file_is_reflected_again(tmp_path, catalog):
+    cache = make_cache(tmp_path, catalog)
+    cache.get_table_info()
+    [name] = os.listdir(tmp_path)
+    with open(tmp_path / name, 'w') as f:
+        f.write("{truncated")
+
+    assert make_cache(tmp_path, catalog).get_table_info() == TABLE_INFO
+    assert catalog['reflections'] == 2
@@ -0,0 +1,34 @@
+# tests/test_schema_selector.py
+import pytest
+
+from src.text_to_sql.schema_cache import AGENT_IGNORED_TABLES
+from src.text_to_sql.schema_selector import SchemaSelector, parse_ddl
+
+
+@pytest.fixture(scope="module")
+def selector_and_tables():
+    selector = SchemaSelector(*parse_ddl())
+    available = {table for table in selector.tables if table not in AGENT_IGNORED_TABLES}
+    return selector, available
+
+
+# Question -> tables the SQL for it cannot be written without (names, not ids, per the prompt rules)
+REQUIRED_TABLES = {
+    "Head to head between Mumbai Indians and Chennai Super Kings": {'matches', 'teams'},
+    "Who scored the most runs for Chennai Super Kings in 2019?": {'deliveries', 'innings', 'matches', 'players', 'teams'},
+    "Virat Kohli strike rate against left-arm spinners": {'deliveries', 'players'},
+    "Most catches by a fielder": {'wicketfielders', 'players'},
+    "Who has the best economy in death overs?": {'deliveries', 'players'},
+    "How many matches were played in IPL 2023?": {'matches'},
+    "Which venue has the highest average first innings score?": {'innings', 'matches', 'venues'},
+    "Which team won the most matches?": {'matches', 'teams'},
+    "Most player of the match awards": {'playerofmatchawards', 'players'},
+}
+
+
+@pytest.mark.parametrize("question, required", REQUIRED_TABLES.items())
+def test_selected_schema_has_required_tables(selector_and_tables, question, required):
+    selector, available = selector_and_tables
+    # An empty selection means the full schema is used
+    selected = set(selector.select(question, available)) or available
+    assert required <= selected, f"missing {sorted(required - selected)}"
@@ -0,0 +1,82 @@
+# tests/test_sql_agent_service.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from sql_agent_service import SingleFlight
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def blocking_answer(release: threading.Event, calls: list, question: str) -> dict:
+    calls.append(question)
+    release.wait(timeout=5)
+    return {'answer': question.upper()}
+
+
+def test_identical_questions_share_one_run(executor):
+    flight = SingleFlight(executor, max_pending=10)
+    release, calls = threading.Event(), []
+
+    async def scenario():
+        first = asyncio.create_task(flight.run("q", blocking_answer, release, calls, "q"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(flight.run("q", blocking_answer, release, calls, "q"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await first, await second
+    (first, first_coalesced), (second, second_coalesced) = asyncio.run(scenario())
+    assert calls == ["q"]
+    assert first == second == {'answer': 'Q'}
+    assert (first_coalesced, second_coalesced) == (False, True)
+    assert flight.stats() == {'in_flight': 0, 'started': 1, 'coalesced': 1, 'rejected': 0}
+
+
+def test_finished_questions_run_again(executor):
+    flight = SingleFlight(executor, max_pending=10)
+    release, calls = threading.Event(), []
+    release.set()
+
+    async def scenario():
+        await flight.run("q", blocking_answer, release, calls, "q")
+        await flight.run("q", blocking_answer, release, calls, "q")
+    asyncio.run(scenario())
+    assert calls == ["q", "q"]
+
+
+def test_too_many_distinct_questions_are_rejected(executor):
+    flight = SingleFlight(executor, max_pending=1)
+    release, calls = threading.Event(), []
+
+    async def scenario():
+        first = asyncio.create_task(flight.run("a", blocking_answer, release, calls, "a"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await flight.run("b", blocking_answer, release, calls, "b")
+        release.set()
+        await first
+        return rejected.value.status_code
+    assert asyncio.run(scenario()) == 503
+    assert flight.stats()['rejected'] == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_run(executor):
+    flight = SingleFlight(executor, max_pending=10)
+    release, calls = threading.Event(), []
+
+    async def scenario():
+        first = asyncio.create_task(flight.run("q", blocking_answer, release, calls, "q"))
+        second = asyncio.create_task(flight.run("q", blocking_answer, release, calls, "q"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        return await second
+    assert asyncio.run(scenario()) == ({'answer': 'Q'}, True)
@@ -0,0 +1,34 @@
+# tests/test_sql_normalise.py
+import pytest
+
+from src.text_to_sql.sql_normalise import canonicalise_sql, sql_hash, strip_sql_comments
+
+
+@pytest.mark.parametrize("first, second", [
+    ("SELECT m.season_year FROM matches m;", "select  x.season_year\nfrom Matches AS x"),
+    ("SELECT p.name FROM players p JOIN matchplayers mp ON p.identifier = mp.player_identifier",
+     "select a.name from players as a join matchplayers b on a.identifier = b.player_identifier -- roster"),
+    ("SELECT p.name FROM players p, teams t WHERE p.team = t.team_id",
+     "SELECT q.name FROM players q, teams r WHERE q.team = r.team_id"),
+])
+def test_trivially_different_queries_share_a_canonical_form(first, second):
+    assert canonicalise_sql(first) == canonicalise_sql(second)
+    assert sql_hash(first) == sql_hash(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("SELECT count(*) AS m FROM matches m", "SELECT count(*) AS x FROM matches x"),
+    ("SELECT season_year AS total FROM matches", "SELECT season_year AS runs FROM matches"),
+    ("SELECT * FROM matches WHERE venue = 'Eden'", "SELECT * FROM matches WHERE venue = 'EDEN'"),
+])
+def test_column_aliases_and_literals_are_kept(first, second):
+    assert canonicalise_sql(first) != canonicalise_sql(second)
+
+
+def test_column_alias_named_like_a_table_alias_is_not_renamed():
+    assert canonicalise_sql("SELECT count(*) AS m FROM matches m") == "select count (*) as m from matches t1"
+
+
+def test_strip_sql_comments_keeps_string_literals():
+    assert strip_sql_comments("SELECT '--not a comment' -- a comment\nFROM t /* gone */") == \
+        "SELECT '--not a comment'\nFROM t"